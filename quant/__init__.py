@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+量化策略公共模块
+
+- data: 行情数据 (本地缓存)
+- sources: 数据源 (Yahoo / 本地回放)
+- symbols: 股票代码表 (交易所/板块/状态)
+- fundamentals: 全市场快照 + 换手率/市值预筛选
+- scan: 并发扫描 (限速/重试)
+- panel: 全市场价格面板 (内存映射)
+- kernels: 多窗口滚动和/最值 (一次扫描算完一组窗口)
+- indicators: 横截面指标引擎 (日期 × 股票)
+- positions: 持仓引擎 (止损/止盈/最长持有，多只股票同时回测)
+- streaming: 流式指标 (每根K线 O(1) 更新，状态可持久化)
+- memo: 指标缓存 (LRU + 可选磁盘层)
+- sweep: 参数扫描 (全部参数组合一次广播计算、滚动前推优化)
+- runner: 多进程回测 (价格数据放共享内存)
+- rotation: 动量轮动回测 (日期 × 股票矩阵，定期选前 N 只)
+- pairs: 配对发现 (相关矩阵预筛选、批量协整检验和回测)
+- metrics: 绩效指标 (收益矩阵按列批量算夏普、回撤、卡玛等)
+- rules: A股交易规则 (涨跌停/停牌/T+1 成交掩码)
+- robustness: 稳健性检验 (策略收益块自助法/打乱重采样，收益、夏普、回撤置信区间)
+- scheduler: 常驻调度 (按时间表运行监控脚本，缓存和指标状态留在内存里)
+- cli: 命令行入口 (python3 -m quant <子命令>，选中时才导入对应脚本)
+"""
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""python3 -m quant <子命令> [参数...]，见 quant.cli"""
+
+import sys
+
+from quant.cli import main
+
+sys.exit(main())
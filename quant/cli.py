@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+统一命令行入口 - python3 -m quant <子命令> [参数...]
+
+各策略脚本在 COMMANDS 里登记 (只记脚本路径和入口函数名，不导入)，
+选中某个子命令时才导入对应脚本，pandas / numpy 等也只在那时加载。
+这个模块本身只用标准库，`python3 -m quant --help` 和 `latest` 不导入 pandas。
+
+子命令后面的参数原样交给脚本自己的 argparse:
+    python3 -m quant --help
+    python3 -m quant backtest --ignore-rules
+    python3 -m quant bollinger --surface --window 10:60 --std 1:3:0.25
+    python3 -m quant latest                 # 最新 Dual Thrust 信号
+    python3 -m quant latest short_signal    # 调度日志里 short_signal 最近一次的输出
+
+可以 alias quant='python3 -m quant'。
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+from datetime import datetime
+
+# 同 quant.data.ROOT (这里不导入 quant.data，避免加载 pandas)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(ROOT, 'logs')
+
+# 子命令 -> {'target': 脚本相对路径 / quant 模块名 / 函数, 'func': 入口函数名, 'help': 说明}
+COMMANDS = {}
+
+
+def register(name, target, func='main', help=''):
+    """登记子命令，不导入任何东西"""
+    COMMANDS[name] = {'target': target, 'func': func, 'help': help}
+
+
+def load(target):
+    """
+    导入脚本或模块
+    脚本按 python3 script.py 的方式: 所在目录放到 sys.path 最前，
+    模块以文件名登记到 sys.modules (多进程回测的子进程要按名字找到策略函数)
+    """
+    if not target.endswith('.py'):
+        return importlib.import_module(target)
+    path = os.path.join(ROOT, target)
+    name = os.path.splitext(os.path.basename(path))[0]
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def latest(argv):
+    """
+    打印最新信号，不导入 pandas
+    - 不带参数: logs/latest_signal.txt (dual_thrust_live 写入)
+    - 带任务名: logs/<任务名>_今天.log 里最近一次运行的输出 (quant.scheduler 写入)
+    """
+    if not argv:
+        path = os.path.join(LOG_DIR, 'latest_signal.txt')
+        if not os.path.exists(path):
+            print(f"没有信号文件: {os.path.relpath(path, ROOT)}")
+            return 1
+        print(f"更新于 {datetime.fromtimestamp(os.path.getmtime(path)):%Y-%m-%d %H:%M}")
+        with open(path) as f:
+            print(f.read().rstrip())
+        return 0
+
+    path = os.path.join(LOG_DIR, f"{argv[0]}_{datetime.now():%Y%m%d}.log")
+    if not os.path.exists(path):
+        print(f"今天还没有日志: {os.path.relpath(path, ROOT)}")
+        return 1
+    with open(path) as f:
+        lines = f.read().rstrip().split('\n')
+    # 每次运行以 "--- 任务名 完成/失败 时间 ---" 结尾
+    ends = [i for i, line in enumerate(lines) if line.startswith('--- ') and line.endswith(' ---')]
+    start = ends[-2] + 1 if len(ends) > 1 else 0
+    print('\n'.join(lines[start:]))
+    return 0
+
+
+# 回测
+register('backtest', 'strategies/moving_average/backtest.py', help='均线交叉回测')
+register('bollinger', 'strategies/moving_average/bollinger.py', help='布林带回测 / 参数曲面 / 重采样')
+register('optimize', 'strategies/moving_average/optimize.py', help='均线参数曲面 / 滚动前推优化')
+register('grid', 'strategies/moving_average/grid_trading.py', help='网格交易回测')
+register('momentum', 'strategies/momentum/momentum_backtest.py', help='RSI / MACD 回测')
+register('factor', 'strategies/momentum/factor_momentum.py', help='动量因子 / 轮动回测')
+register('dual-thrust', 'strategies/momentum/dual_thrust.py', help='Dual Thrust 日线回测')
+register('intraday', 'strategies/momentum/dual_thrust_intraday.py', help='Dual Thrust 日内 (分钟线)')
+register('smart-ma', 'short-term/smart_ma_strategy.py', help='智能均线 (量能 + 止损) 回测')
+register('pairs', 'strategies/arbitrage/pair_trading.py', help='配对交易 / 配对发现 / 监控')
+register('macro', 'strategies/macro/macro_analysis.py', help='宏观分析')
+# 信号 / 筛选
+register('signal', 'strategies/momentum/dual_thrust_live.py', help='Dual Thrust 今日信号')
+register('yang', 'short-term/yang_yongxing_enhanced.py', help='杨永兴十步法 增强版')
+register('yang-scan', 'short-term/yang_yongxing.py', help='杨永兴十步法 观察名单')
+register('yang-demo', 'short-term/yang_yongxing_10step.py', help='杨永兴十步法 演示')
+register('short', 'short-term/short_signal.py', 'check_short_term_signals', help='短线异动信号')
+register('macro-signal', 'strategies/macro/macro_strategy.py', help='金铜比 risk on/off')
+register('screen', 'short-term/screen_all_stocks.py', help='全A股十步法筛选')
+register('latest', latest, help='最新信号 (读日志，不导入 pandas)')
+# 数据 / 调度
+register('panel', 'quant.panel', help='构建全A股内存映射面板')
+register('replay', 'quant.sources', help='生成 / 录制回放数据')
+register('schedule', 'quant.scheduler', help='常驻调度 (代替 cron)')
+
+
+def usage():
+    width = max(len(name) for name in COMMANDS) + 2
+    lines = ['用法: python3 -m quant <子命令> [参数...]', '', '子命令:']
+    lines += [f"  {name:<{width}}{command['help']}" for name, command in COMMANDS.items()]
+    lines += ['', '各子命令的参数: python3 -m quant <子命令> --help']
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"未知子命令: {name}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    command = COMMANDS[name]
+    if callable(command['target']):
+        return command['target'](rest)
+    # 脚本的 argparse 读 sys.argv，帮助信息里显示为 "quant <子命令>"
+    sys.argv = [f"quant {name}"] + rest
+    getattr(load(command['target']), command['func'])()
+    return 0
@@ -0,0 +1,454 @@
+# -*- coding: utf-8 -*-
+"""
+行情数据 - 本地缓存
+
+- 每只股票的日线存为 data/cache/<ticker>.parquet
+- 只向 Yahoo 请求缓存最后一天之后的数据 (增量追加)
+- period='3y' 之类的请求直接从磁盘切片
+- 观察名单用 get_panel 一次批量下载
+- 数据从哪里来由 quant.sources 决定 (Yahoo / 本地回放)
+- 查不到数据的代码 (退市/代码错误) 记入负缓存，一段时间内不再请求
+- 1分钟线存为 data/cache/minute/<ticker>.parquet，每次只追加新K线，
+  Yahoo 只给最近几天，缓存能攒出更长的历史
+- 常驻进程 (quant.scheduler) 调用 keep_in_memory() 后，读过的缓存留在内存里，
+  文件没变就不再读盘
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from quant.sources import get_source, localize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get('QUANT_CACHE_DIR', os.path.join(ROOT, 'data', 'cache'))
+
+# 补下载全部历史时的起点
+EARLIEST = '1990-01-01'
+
+# 缓存在这段时间内 (秒) 视为最新，不访问网络
+CACHE_TTL = 15 * 60
+
+# 1分钟线缓存的有效时间 (秒)
+MINUTE_TTL = 60
+
+# 查不到数据的代码在这段时间内 (秒) 不再请求
+NEGATIVE_TTL = 7 * 24 * 3600
+
+PERIOD_UNITS = {
+    'd': 'days',
+    'wk': 'weeks',
+    'mo': 'months',
+    'y': 'years',
+}
+
+
+# 进程内缓存 {路径: (文件修改时间, DataFrame)}，None 为不启用
+_frames = None
+
+
+def keep_in_memory(enabled=True):
+    """启用/关闭进程内缓存 (一次性脚本不需要，常驻进程用)"""
+    global _frames
+    _frames = {} if enabled else None
+
+
+def _cache_path(ticker):
+    return os.path.join(CACHE_DIR, f"{ticker}.parquet")
+
+
+def _minute_path(ticker):
+    return os.path.join(CACHE_DIR, 'minute', f"{ticker}.parquet")
+
+
+def _meta_path(ticker):
+    return os.path.join(CACHE_DIR, f"{ticker}.json")
+
+
+def _read_meta(ticker):
+    try:
+        with open(_meta_path(ticker)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(ticker, meta):
+    with open(_meta_path(ticker), 'w') as f:
+        json.dump(meta, f)
+
+
+class FetchStatus:
+    """
+    每只股票最近一次下载结果，存为 data/cache/_status.json
+    - ok: 最近一次下载成功的时间
+    - failed / reason: 最近一次查不到数据的时间和原因
+    查不到数据且之后没成功过的代码，在 ttl 内直接跳过 (负缓存)
+    """
+
+    def __init__(self, path, ttl=NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.dirty = False
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path) as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, ticker):
+        with self.lock:
+            return dict(self._load().get(ticker, {}))
+
+    def blocked(self, ticker, now=None):
+        """是否在负缓存中"""
+        entry = self.get(ticker)
+        failed = entry.get('failed')
+        if failed is None or entry.get('ok', 0) > failed:
+            return False
+        now = time.time() if now is None else now
+        return now - failed < self.ttl
+
+    def mark_ok(self, ticker):
+        with self.lock:
+            entry = self._load().setdefault(ticker, {})
+            entry['ok'] = time.time()
+            self.dirty = True
+
+    def mark_failed(self, ticker, reason):
+        with self.lock:
+            entry = self._load().setdefault(ticker, {})
+            entry['failed'] = time.time()
+            entry['reason'] = reason
+            self.dirty = True
+
+    def table(self):
+        """所有记录的 DataFrame (index 为代码, 列 ok / failed / reason / blocked)"""
+        with self.lock:
+            df = pd.DataFrame.from_dict(self._load(), orient='index')
+        for col in ['ok', 'failed', 'reason']:
+            if col not in df:
+                df[col] = None
+        ok = df['ok'].astype(float).fillna(0)
+        failed = df['failed'].astype(float)
+        df['blocked'] = (failed > ok) & (time.time() - failed < self.ttl)
+        return df
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self._data, f)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+
+fetch_status = FetchStatus(os.path.join(CACHE_DIR, '_status.json'))
+atexit.register(fetch_status.save)
+
+
+def read_cache(ticker):
+    """读取本地缓存，没有则返回 None (启用进程内缓存时，文件没变直接返回内存里的)"""
+    path = _cache_path(ticker)
+    if not os.path.exists(path):
+        return None
+    if _frames is None:
+        return pd.read_parquet(path)
+    mtime = os.path.getmtime(path)
+    hit = _frames.get(path)
+    if hit is None or hit[0] != mtime:
+        hit = _frames[path] = (mtime, pd.read_parquet(path))
+    return hit[1]
+
+
+def write_cache(ticker, df):
+    """写入本地缓存 (先写临时文件再替换，避免读到半个文件)"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(ticker)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+    if _frames is not None:
+        _frames[path] = (os.path.getmtime(path), df)
+
+
+def period_start(period, now=None):
+    """
+    把 yfinance 风格的 period 换算成起始日期
+    - '3mo' / '1y' / '3y' -> 日历偏移
+    - '5d' -> 多留一些日历日，再按交易日条数截取 (见 get_history)
+    - 'max' -> None
+    """
+    now = get_source().now() if now is None else now
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    for suffix, unit in PERIOD_UNITS.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            n = int(period[:-len(suffix)])
+            if unit == 'days':
+                n = n * 2 + 10
+            return (now - pd.DateOffset(**{unit: n})).normalize()
+    raise ValueError(f"不支持的 period: {period}")
+
+
+def _fetch(ticker, start=None, **kwargs):
+    """从数据源下载日线"""
+    return get_source().history(ticker, start, **kwargs)
+
+
+def _align_tz(new, index):
+    """yf.download 返回不带时区的日期，按缓存的时区对齐"""
+    tz = getattr(index, 'tz', None)
+    if tz is not None and new.index.tz is None:
+        new = new.tz_localize(tz)
+    elif tz is None and new.index.tz is not None:
+        new = new.tz_localize(None)
+    return new
+
+
+def _merge(old, new):
+    """新数据覆盖重叠部分 (今天盘中的半根K线会被替换)"""
+    if old is None or len(old) == 0:
+        return new
+    if new is None or len(new) == 0:
+        return old
+    new = _align_tz(new, old.index)
+    new = new[~new.index.duplicated(keep='last')]
+    old = old[~old.index.isin(new.index)]
+    return pd.concat([old, new]).sort_index()
+
+
+def _is_stale(meta, refresh=False):
+    return refresh or time.time() - meta.get('updated', 0) > CACHE_TTL
+
+
+def _needs_head(cached, meta, start):
+    """请求的起始日期早于缓存覆盖的范围"""
+    # meta['start'] 为 None 表示已下载过全部历史
+    covered = meta.get('start', cached.index[0].strftime('%Y-%m-%d'))
+    return covered is not None and (
+        start is None or pd.Timestamp(start) < pd.Timestamp(covered)
+    )
+
+
+def _date_str(ts):
+    return None if ts is None else pd.Timestamp(ts).strftime('%Y-%m-%d')
+
+
+def update_cache(ticker, start=None, refresh=False, **kwargs):
+    """
+    增量更新缓存，返回完整的缓存数据
+    - 缓存在 CACHE_TTL 内更新过 -> 不访问网络
+    - 请求的起始日期早于缓存 -> 补下载前面缺的一段
+    - 其余情况只下载缓存最后一天之后的数据
+    """
+    if not get_source().cacheable:
+        return _fetch(ticker, start, **kwargs)
+
+    cached = read_cache(ticker)
+    meta = _read_meta(ticker)
+
+    if cached is not None and len(cached) > 0:
+        stale = _is_stale(meta, refresh)
+        need_head = _needs_head(cached, meta, start)
+        if not stale and not need_head:
+            return cached
+        try:
+            df = cached
+            if need_head:
+                head = _fetch(ticker, start or EARLIEST,
+                              end=cached.index[0].strftime('%Y-%m-%d'), **kwargs)
+                df = _merge(head, df)
+                meta['start'] = _date_str(start)
+            if stale:
+                tail = _fetch(ticker, cached.index[-1], **kwargs)
+                df = _merge(df, tail)
+                meta['updated'] = time.time()
+                fetch_status.mark_ok(ticker)
+        except Exception as e:
+            print(f"更新 {ticker} 失败，使用本地缓存: {e}")
+            return cached
+        write_cache(ticker, df)
+        _write_meta(ticker, meta)
+        return df
+
+    if fetch_status.blocked(ticker):
+        return None
+    df = _fetch(ticker, start, **kwargs)
+    if df is None or len(df) == 0:
+        fetch_status.mark_failed(ticker, '无数据')
+        return df
+    fetch_status.mark_ok(ticker)
+    write_cache(ticker, df)
+    _write_meta(ticker, {'start': _date_str(start), 'updated': time.time()})
+    return df
+
+
+def _slice(df, period, start=None, end=None):
+    if start is not None:
+        df = df[df.index >= localize(start, df.index)]
+    if end is not None:
+        df = df[df.index < localize(end, df.index)]
+    if period.endswith('d') and period[:-1].isdigit():
+        df = df.tail(int(period[:-1]))
+    return df
+
+
+def get_history(ticker, period='3y', start=None, end=None, refresh=False, **kwargs):
+    """
+    获取日线 (替代 yf.Ticker(ticker).history)
+
+    用法:
+        get_history('601899.SS', '3y')
+        get_history('601899.SS', start='2023-01-01')
+    """
+    if start is None:
+        start = period_start(period)
+    df = update_cache(ticker, start, refresh=refresh, **kwargs)
+    if df is None or len(df) == 0:
+        return pd.DataFrame()
+
+    df = _slice(df, period, start, end).copy()
+    df.attrs['ticker'] = ticker
+    return df
+
+
+def get_minutes(ticker, days=5, refresh=False):
+    """
+    1分钟线，最近 days 个交易日 (None 为缓存里的全部)
+    缓存超过 MINUTE_TTL 才向数据源请求，只请求缓存最后一根之后的K线
+    """
+    source = get_source()
+    path = _minute_path(ticker)
+    if not source.cacheable:
+        df = source.minutes(ticker)
+    else:
+        df = pd.read_parquet(path) if os.path.exists(path) else None
+        if df is None or refresh or time.time() - os.path.getmtime(path) > MINUTE_TTL:
+            try:
+                start = None if df is None or len(df) == 0 else df.index[-1].normalize()
+                df = _merge(df, source.minutes(ticker, start))
+                if df is not None and len(df) > 0:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp = f"{path}.{os.getpid()}.tmp"
+                    df.to_parquet(tmp)
+                    os.replace(tmp, path)
+            except Exception as e:
+                print(f"更新 {ticker} 分钟线失败，使用本地缓存: {e}")
+    if df is None or len(df) == 0:
+        return pd.DataFrame()
+
+    if days is not None:
+        dates = df.index.normalize()
+        df = df[dates >= dates.unique()[-days:][0]]
+    df = df.copy()
+    df.attrs['ticker'] = ticker
+    return df
+
+
+def _fetch_many(tickers, start):
+    """一次请求批量下载多只股票，返回 {ticker: DataFrame}"""
+    return get_source().download(tickers, start)
+
+
+def update_many(tickers, start=None, refresh=False):
+    """
+    批量更新缓存: 已是最新的直接读盘，其余合并成一次 yf.download
+    返回 {ticker: 完整缓存数据}
+    """
+    if not get_source().cacheable:
+        return _fetch_many(list(tickers), start)
+
+    data = {}
+    pending = {}
+    for ticker in tickers:
+        cached = read_cache(ticker)
+        meta = _read_meta(ticker)
+        if cached is None or len(cached) == 0:
+            if fetch_status.blocked(ticker):
+                continue
+            pending[ticker] = (cached, meta, start or EARLIEST, True)
+        elif _needs_head(cached, meta, start):
+            pending[ticker] = (cached, meta, start or EARLIEST, True)
+        elif _is_stale(meta, refresh):
+            pending[ticker] = (cached, meta, cached.index[-1], False)
+        else:
+            data[ticker] = cached
+
+    if not pending:
+        return data
+
+    fetch_start = min(pd.Timestamp(p[2]).tz_localize(None) for p in pending.values())
+    try:
+        fetched = _fetch_many(list(pending), fetch_start)
+    except Exception as e:
+        print(f"批量下载失败，使用本地缓存: {e}")
+        fetched = None
+
+    for ticker, (cached, meta, _, head) in pending.items():
+        new = None if fetched is None else fetched.get(ticker)
+        if new is None:
+            if cached is not None and len(cached) > 0:
+                data[ticker] = cached
+            elif fetched is not None:
+                fetch_status.mark_failed(ticker, '无数据')
+            continue
+        fetch_status.mark_ok(ticker)
+        df = _merge(cached, new)
+        if head:
+            meta['start'] = _date_str(start)
+        meta['updated'] = time.time()
+        write_cache(ticker, df)
+        _write_meta(ticker, meta)
+        data[ticker] = df
+    return data
+
+
+def get_panel(stocks, period='3y', start=None, end=None, refresh=False):
+    """
+    批量获取多只股票的日线，返回对齐后的面板
+    - stocks: {名称: 代码} 字典或代码列表
+    - 返回 DataFrame，行是日期 (不带时区)，列是 (代码, 字段) 两级索引
+    - 单只股票用 ticker_frame(panel, ticker) 取出
+    """
+    tickers = list(stocks.values()) if isinstance(stocks, dict) else list(stocks)
+    if start is None:
+        start = period_start(period)
+    data = update_many(tickers, start, refresh=refresh)
+
+    frames = {}
+    for ticker in tickers:
+        df = data.get(ticker)
+        if df is not None and len(df) > 0:
+            df = _slice(df, period, start, end)
+            if df.index.tz is not None:
+                df = df.tz_localize(None)
+            frames[ticker] = df
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1)
+
+
+def ticker_frame(panel, ticker):
+    """从面板里取出单只股票 (去掉对齐产生的空行)"""
+    if len(panel) == 0 or ticker not in panel.columns.get_level_values(0):
+        return pd.DataFrame()
+    df = panel[ticker].dropna(how='all').copy()
+    df.attrs['ticker'] = ticker
+    return df
+
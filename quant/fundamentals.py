@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+全市场快照 + 基本面预筛选
+
+十步法里的 "换手率5-10%"、"市值50-200亿" 只需要一张全市场快照就能判断，
+先用向量化条件筛掉大部分股票，再去下载剩下几百只的历史日线。
+
+用法:
+    snap = get_snapshot()
+    candidates = prefilter(snap, turnover=(5, 10), market_cap=(50, 200))
+"""
+
+import os
+import time
+
+import pandas as pd
+
+from quant.data import CACHE_DIR
+from quant.sources import get_source
+
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, '_snapshot.parquet')
+
+# 快照缓存时间 (秒)，盘中换手率一直在变
+SNAPSHOT_TTL = 15 * 60
+
+
+def get_snapshot(refresh=False):
+    """全市场快照 (代码、名称、最新价、换手率、总市值、流通市值、流通股本)"""
+    source = get_source()
+    if not source.cacheable:
+        return source.snapshot()
+    if (not refresh and os.path.exists(SNAPSHOT_PATH)
+            and time.time() - os.path.getmtime(SNAPSHOT_PATH) < SNAPSHOT_TTL):
+        return pd.read_parquet(SNAPSHOT_PATH)
+    df = source.snapshot()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df.to_parquet(SNAPSHOT_PATH)
+    return df
+
+
+def prefilter(snapshot, turnover=(5, 10), market_cap=(50, 200)):
+    """
+    按换手率 (%) 和总市值 (亿) 区间筛选，None 表示不限制
+    停牌/无报价 (NaN) 的股票一律剔除
+    """
+    mask = snapshot['price'].notna() & (snapshot['price'] > 0)
+    if turnover is not None:
+        mask &= snapshot['turnover'].between(*turnover)
+    if market_cap is not None:
+        low, high = market_cap
+        mask &= snapshot['market_cap'].between(low * 1e8, high * 1e8)
+    return snapshot[mask]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+横截面指标引擎 - 全市场一次算完
+
+输入是 (日期 × 股票) 的二维数组，一次 numpy 计算得到所有股票的
+MA5/10/20/60、量比、5日/20日涨幅、20日/60日新高 (和 yang_yongxing.calculate_indicators 定义一致)，
+不用再对几千只股票逐个 rolling。
+
+用法:
+    table = cross_section(close, high, volume, tickers)   # 每只股票最新一行
+"""
+
+import numpy as np
+import pandas as pd
+
+from quant import kernels
+
+
+def right_align(x):
+    """
+    每列的有效值挪到底部，NaN (停牌/未上市) 挪到顶部，有效值先后顺序不变
+    这样每只股票的滚动窗口都只包含它自己的交易日，和单独用 DataFrame 计算一致
+    """
+    x = np.asarray(x, dtype=float)
+    order = np.argsort(~np.isnan(x), axis=0, kind='stable')
+    return np.take_along_axis(x, order, axis=0)
+
+
+def pct_change(x, n):
+    """n 日涨跌幅 (同 pandas pct_change(n))"""
+    out = np.full(x.shape, np.nan)
+    out[n:] = x[n:] / x[:-n] - 1
+    return out
+
+
+def compute(close, high, volume):
+    """
+    全部指标的 (日期 × 股票) 数组，输入可以是 1-D (单只股票)
+    2-D 时需已 right_align
+    """
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    mas = kernels.rolling_means(close, (5, 10, 20, 60))
+    highs = kernels.rolling_max(high, (20, 60))
+    vol_ma20 = kernels.rolling_means(volume, (20,))[20]
+    return {
+        'MA5': mas[5],
+        'MA10': mas[10],
+        'MA20': mas[20],
+        'MA60': mas[60],
+        'VOL_MA20': vol_ma20,
+        'VOL_RATIO': volume / vol_ma20,
+        'RET_5D': pct_change(close, 5) * 100,
+        'RET_20D': pct_change(close, 20) * 100,
+        'HIGH_20D': highs[20],
+        'HIGH_60D': highs[60],
+    }
+
+
+def cross_section(close, high, volume, tickers):
+    """
+    每只股票最新一行的指标表 (index 为股票代码)
+    额外列: Close/High/Volume 最新值、BARS 有效K线数、VOL_RATIO_5D 近5日平均量比
+    """
+    close = right_align(close)
+    high = right_align(high)
+    volume = right_align(volume)
+    ind = compute(close, high, volume)
+
+    table = pd.DataFrame({name: arr[-1] for name, arr in ind.items()}, index=pd.Index(tickers))
+    table['Close'] = close[-1]
+    table['High'] = high[-1]
+    table['Volume'] = volume[-1]
+    table['BARS'] = (~np.isnan(close)).sum(axis=0)
+    table['VOL_RATIO_5D'] = ind['VOL_RATIO'][-5:].mean(axis=0)
+    return table
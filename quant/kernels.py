@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+多窗口滚动计算 - 一次扫描得到所有窗口
+
+MA5/10/20/60、20日/60日新高这类指标如果逐个 rolling()，每个窗口都要把序列扫一遍。
+这里一次算完一组窗口:
+- 滚动和/均值: 一次 cumsum，每个窗口只做一次相减 (标准差再加一次 x² 的 cumsum)
+- 滚动最大/最小: 稀疏表 (2 的幂长度区间的最值)，每个窗口由两段重叠区间拼出
+
+输入可以是 1-D (日期) 或 2-D (日期 × 股票)，沿第 0 轴计算。
+窗口内有 NaN 或数据不足时结果为 NaN (同 pandas rolling 默认)。
+
+用法:
+    mas = rolling_means(close, (5, 10, 20, 60))    # {5: MA5, 10: MA10, ...}
+    highs = rolling_max(high, (20, 60))
+    moments = rolling_moments(close, (20,))      # {20: (均值, 标准差)}
+"""
+
+import numpy as np
+
+
+def _windows(windows):
+    return sorted({int(w) for w in windows})
+
+
+def rolling_sums(x, windows):
+    """{窗口: 滚动和}，一次 cumsum"""
+    x = np.asarray(x, dtype=float)
+    valid = ~np.isnan(x)
+    zeros = np.zeros((1,) + x.shape[1:])
+    csum = np.concatenate([zeros, np.cumsum(np.where(valid, x, 0), axis=0)])
+    count = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    out = {}
+    for w in _windows(windows):
+        res = np.full(x.shape, np.nan)
+        if len(x) >= w:
+            total = csum[w:] - csum[:-w]
+            n = count[w:] - count[:-w]
+            res[w - 1:] = np.where(n == w, total, np.nan)
+        out[w] = res
+    return out
+
+
+def rolling_means(x, windows):
+    """{窗口: 滚动均值}"""
+    return {w: s / w for w, s in rolling_sums(x, windows).items()}
+
+
+def rolling_moments(x, windows):
+    """
+    {窗口: (滚动均值, 滚动标准差)}，标准差同 pandas rolling().std() (ddof=1)
+    一次 cumsum 得到 x 和 x² 的滚动和；先减去各列均值，避免大数相减损失精度
+    """
+    x = np.asarray(x, dtype=float)
+    center = np.nanmean(x, axis=0)
+    x = x - center
+    sums = rolling_sums(x, windows)
+    squares = rolling_sums(x ** 2, windows)
+    out = {}
+    for w in sums:
+        mean = sums[w] / w
+        var = (squares[w] - sums[w] * mean) / (w - 1) if w > 1 else np.full(x.shape, np.nan)
+        out[w] = (mean + center, np.sqrt(np.maximum(var, 0)))
+    return out
+
+
+def _extrema(x, windows, op):
+    """稀疏表: level[k][i] = op(x[i : i+k])，k 为 2 的幂"""
+    x = np.asarray(x, dtype=float)
+    windows = _windows(windows)
+    n = len(x)
+    powers = {1 << (w.bit_length() - 1) for w in windows}
+    levels = {1: x}
+    level, span = x, 1
+    while span * 2 <= max(powers):
+        level = op(level[:-span], level[span:]) if len(level) > span else level[:0]
+        span *= 2
+        if span in powers:
+            levels[span] = level
+    out = {}
+    for w in windows:
+        res = np.full(x.shape, np.nan)
+        if n >= w:
+            k = 1 << (w.bit_length() - 1)
+            t = levels[k]
+            res[w - 1:] = op(t[:n - w + 1], t[w - k:n - k + 1])
+        out[w] = res
+    return out
+
+
+def rolling_max(x, windows):
+    """{窗口: 滚动最大值}"""
+    return _extrema(x, windows, np.maximum)
+
+
+def rolling_min(x, windows):
+    """{窗口: 滚动最小值}"""
+    return _extrema(x, windows, np.minimum)
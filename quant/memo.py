@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+指标缓存 - 同一只股票、同一份数据、同一组参数的指标只算一次
+
+backtest / optimize / bollinger / momentum_backtest 都在同一条收盘价上算
+SMA20、rolling std、EMA12/26，在一个进程里依次跑这些脚本时会重复计算。
+
+- 缓存键: (股票代码, 数据版本, 指标名, 参数)
+- 数据版本: 长度、首尾日期、首尾值和数值总和的哈希 (不逐行哈希，命中时几微秒)，
+  数据更新、复权调整或切片不同就是不同版本
+- 内存: LRU，最多 MEMO_SIZE 条
+- 磁盘 (可选): 设置 QUANT_MEMO_DIR 或调用 enable_disk()，存成 .npy
+
+用法:
+    from quant.memo import sma, smas, rolling_std, ema
+    df['MA'] = sma(df, 20)
+    mas = smas(df, (10, 20, 50, 100, 200))   # 没算过的窗口一次扫描算完
+    df['STD'] = rolling_std(df, 20)
+    df['EMA12'] = ema(df, 12)
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from quant.kernels import rolling_means
+
+# 内存中最多保留的指标条数
+MEMO_SIZE = 512
+
+
+class IndicatorCache:
+    """LRU 指标缓存，可选磁盘层"""
+
+    def __init__(self, maxsize=MEMO_SIZE, disk_dir=None):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        ticker, version, name, params = key
+        tag = '-'.join(str(p) for p in params)
+        return os.path.join(self.disk_dir, ticker or '_', f"{name}-{tag}-{version}.npy")
+
+    def _load(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def _dump(self, key, value):
+        if self.disk_dir is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npy"
+        np.save(tmp, value)
+        os.replace(tmp, path)
+
+    def get(self, key, compute):
+        """取缓存，没有就调用 compute() 计算并存入"""
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key]
+        value = self._load(key)
+        if value is None:
+            self.misses += 1
+            value = np.asarray(compute(), dtype=float)
+            self._dump(key, value)
+        else:
+            self.hits += 1
+        value.setflags(write=False)
+        self.items[key] = value
+        if len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.items.clear()
+        self.hits = self.misses = 0
+
+
+cache = IndicatorCache(disk_dir=os.environ.get('QUANT_MEMO_DIR'))
+
+
+def enable_disk(path):
+    """打开磁盘缓存 (None 关闭)"""
+    cache.disk_dir = path
+
+
+def data_version(s):
+    """
+    数据版本: 长度、首尾日期、首尾值和数值总和的哈希
+    追加新K线改变长度和末尾，复权调整改变前面的价格 (首值和总和)；
+    只取两端加一次向量求和，不逐行哈希整个序列
+    """
+    values = s.to_numpy(dtype=float)
+    if len(values) == 0:
+        return 'empty'
+    # 日期索引直接取 int64 纳秒，不构造 Timestamp
+    index = s.index.asi8 if isinstance(s.index, pd.DatetimeIndex) else s.index
+    tag = f"{len(values)}|{index[0]}|{index[-1]}|{values[0]!r}|{values[-1]!r}|{values.sum()!r}"
+    return hashlib.blake2b(tag.encode(), digest_size=8).hexdigest()
+
+
+def _key(df, version, name, params, column):
+    return (df.attrs.get('ticker'), version, f"{name}_{column}", tuple(params))
+
+
+def _series(df, s, value):
+    return pd.Series(value.copy(), index=df.index, name=s.name)
+
+
+def cached(df, name, params, compute, column='Close'):
+    """
+    通用入口: compute(series) 返回和 df 等长的数组
+    股票代码取 df.attrs['ticker'] (get_history / ticker_frame 会设置)
+    """
+    s = df[column]
+    value = cache.get(_key(df, data_version(s), name, params, column), lambda: compute(s))
+    return _series(df, s, value)
+
+
+def smas(df, windows, column='Close'):
+    """
+    一组窗口的简单移动平均 {窗口: Series}
+    缓存里没有的窗口用 quant.kernels 一次 cumsum 算完
+    """
+    s = df[column]
+    version = data_version(s)
+    keys = {w: _key(df, version, 'sma', (w,), column) for w in windows}
+    # 先取出全部已缓存的值，再插入新算的: 插入时 LRU 淘汰的旧条目不影响这一次
+    values = {w: cache.get(key, None) for w, key in keys.items() if key in cache.items}
+    missing = [w for w in keys if w not in values]
+    fresh = {}
+
+    def compute(w):
+        if not fresh:
+            fresh.update(rolling_means(s.to_numpy(dtype=float), missing))
+        return fresh[w]
+
+    for w in missing:
+        values[w] = cache.get(keys[w], lambda w=w: compute(w))
+    return {w: _series(df, s, values[w]) for w in keys}
+
+
+def sma(df, window, column='Close'):
+    """简单移动平均 (同 rolling(window).mean())"""
+    return smas(df, (window,), column)[window]
+
+
+def rolling_std(df, window, column='Close'):
+    """滚动样本标准差 (同 rolling(window).std())"""
+    return cached(df, 'std', (window,), lambda s: s.rolling(window).std(), column)
+
+
+def ema(df, span, column='Close'):
+    """指数移动平均 (同 ewm(span=span).mean())"""
+    return cached(df, 'ema', (span,), lambda s: s.ewm(span=span).mean(), column)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+绩效指标 - 一次算完很多条收益曲线
+
+输入是收益矩阵 (日期 × 策略/参数组合)，每个指标沿日期方向一次向量化计算，
+几万、十几万条曲线按列分块处理，不用逐个建 DataFrame。
+
+- total_return / cagr: 总收益、年化收益 (年数 = 行数 / periods)
+- sharpe / sortino: 年化夏普 (ddof=1)、索提诺 (下行偏差以 0 为目标)
+- max_drawdown / drawdown_days: 最大回撤 (负数)、最长水下期 (创新高前经过的期数)
+- calmar: 年化收益 / |最大回撤|
+- hit_rate: 有收益的期数里赚钱的比例
+- exposure: 持仓期数占比 (给了 positions 按持仓算，否则按收益非 0 算)
+- trades: 持仓变化次数 (只在给了 positions 时计算)
+
+NaN 收益视为 0 (未持仓/停牌)；夏普、索提诺只用非 NaN 的期数 (同 Series.dropna())。
+
+用法:
+    summary = summarize(df[['Returns', 'Strategy_Returns']], positions=df[['Position']])
+    summary.loc['Strategy_Returns', 'sharpe']
+"""
+
+import numpy as np
+import pandas as pd
+
+# 年化用的交易日数
+TRADING_DAYS = 252
+
+# 每块列数: 块内几个 (日期 × 列) 临时数组留在缓存里
+CHUNK = 256
+
+
+def _block(r, periods, positions=None):
+    """一块 (日期, 列) 收益的全部指标，返回 {指标: (列,)}"""
+    valid = ~np.isnan(r)
+    r = np.where(valid, r, 0.0)
+    n = len(r)
+    count = valid.sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log = np.log1p(r)
+        log_total = log.sum(axis=0)
+        mean = r.sum(axis=0) / count
+        var = ((r * r).sum(axis=0) - count * mean ** 2) / (count - 1)
+        std = np.sqrt(var)
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods), 0.0)
+        downside = np.sqrt((np.minimum(r, 0) ** 2).sum(axis=0) / count)
+        sortino = np.where(downside > 0, mean / downside * np.sqrt(periods), np.nan)
+
+        # 对数净值从 0 开始 (前面补一行)，回撤在对数空间里算，最后再换回比例
+        equity = np.concatenate([np.zeros((1,) + r.shape[1:]), np.cumsum(log, axis=0)])
+        peak = np.maximum.accumulate(equity, axis=0)
+        max_drawdown = np.expm1((equity - peak).min(axis=0))
+        steps = np.arange(n + 1).reshape((-1,) + (1,) * (r.ndim - 1))
+        last_peak = np.maximum.accumulate(np.where(equity < peak, 0, steps), axis=0)
+        drawdown_days = (steps - last_peak).max(axis=0)
+
+        cagr = np.exp(log_total * periods / n) - 1
+        calmar = np.where(max_drawdown < 0, cagr / -max_drawdown, np.nan)
+        active = valid & (r != 0)
+        hit_rate = (active & (r > 0)).sum(axis=0) / active.sum(axis=0)
+
+    out = {
+        'total_return': np.expm1(log_total),
+        'cagr': cagr,
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'max_drawdown': max_drawdown,
+        'drawdown_days': drawdown_days,
+        'calmar': calmar,
+        'hit_rate': hit_rate,
+    }
+    if positions is None:
+        out['exposure'] = active.sum(axis=0) / n
+    else:
+        held = np.nan_to_num(positions) != 0
+        out['exposure'] = held.mean(axis=0)
+        changes = np.diff(np.nan_to_num(positions), axis=0) != 0
+        out['trades'] = held[0].astype(int) + changes.sum(axis=0)
+    return out
+
+
+def summarize(returns, positions=None, periods=TRADING_DAYS, chunk=CHUNK):
+    """
+    收益矩阵的绩效指标
+    - returns: (日期,) 或 (日期, 列) 的数组 / Series / DataFrame
+    - positions: 同形状的持仓 (可选)，用于 exposure 和 trades
+    - periods: 每年期数 (日线 252)
+    返回: 1-D 输入返回 Series (指标)，2-D 返回 DataFrame (行: 列名，列: 指标)
+    """
+    index = returns.columns if isinstance(returns, pd.DataFrame) else None
+    r = np.asarray(returns, dtype=float)
+    p = None if positions is None else np.asarray(positions, dtype=float)
+    if r.ndim == 1:
+        out = _block(r[:, None], periods, None if p is None else p.reshape(-1, 1))
+        return pd.Series({key: v[0] for key, v in out.items()})
+    if p is not None:
+        p = np.broadcast_to(p, r.shape)
+
+    parts = []
+    for start in range(0, r.shape[1], chunk):
+        cols = slice(start, start + chunk)
+        parts.append(_block(r[:, cols], periods, None if p is None else p[:, cols]))
+    table = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]} if parts else {}
+    return pd.DataFrame(table, index=index)
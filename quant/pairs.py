@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+配对发现 - 全部股票两两组合批量筛选
+
+几百只股票就有十几万个组合，逐对下载、回归、回测太慢。这里全部用矩阵运算:
+1. 相关系数: 对数收益标准化后一次矩阵乘法得到 (N × N) 相关矩阵
+2. 预筛选: 相关系数 >= min_corr，且属于同一行业 (groups 相同)
+3. 协整检验 (Engle-Granger): log(P1) 对 log(P2) 回归得到对冲比率，
+   残差做 ADF 检验 (不含常数项，lags 阶差分滞后)，所有候选对一批算完
+4. 回测: 同 pair_trading.pair_trading 的价格比率 z-score 策略，一批算完；
+   另用卡尔曼滤波的动态对冲比率 (quant.streaming.KalmanHedge) 再回测一遍
+
+ADF 统计量和 Engle-Granger 临界值 (两个变量、含常数项的大样本近似) 比较，
+越小越显著。
+
+用法:
+    closes = get_panel(tickers, '3y').xs('Close', axis=1, level=1)
+    table = discover(closes, groups=industries, min_corr=0.8, level=0.05)
+"""
+
+import numpy as np
+import pandas as pd
+
+from quant.kernels import rolling_moments
+from quant.streaming import KalmanHedge
+
+# 年化用的交易日数
+TRADING_DAYS = 252
+
+# Engle-Granger 临界值 (两个变量，含常数项)
+EG_CRITICAL = {0.01: -3.90, 0.05: -3.34, 0.10: -3.04}
+
+# z-score 开仓 / 平仓阈值 (同 pair_trading.pair_trading)
+ENTRY = 1.0
+EXIT = 0.5
+
+
+def full_history(closes):
+    """
+    只保留整段都有价格的股票 (中间停牌用前值补)，返回 float 数组和保留的列名
+    上市晚于开始日期的股票整段不参与
+    """
+    filled = closes.ffill()
+    keep = filled.notna().all().to_numpy()
+    return filled.to_numpy(dtype=float)[:, keep], closes.columns[keep]
+
+
+def correlation(prices):
+    """对数收益的相关矩阵 (N × N)，一次矩阵乘法"""
+    r = np.diff(np.log(prices), axis=0)
+    z = (r - r.mean(axis=0)) / r.std(axis=0)
+    return z.T @ z / len(z)
+
+
+def candidates(corr, min_corr=0.8, groups=None):
+    """
+    上三角中相关系数 >= min_corr 的 (i, j)
+    groups: 每列的分组 (如行业)，只保留同组的组合；空字符串/NaN 不与任何股票成对
+    """
+    mask = np.triu(corr >= min_corr, k=1)
+    if groups is not None:
+        groups = pd.Series(np.asarray(groups, dtype=object)).fillna('').to_numpy()
+        mask &= groups[:, None] == groups[None, :]
+        mask &= (groups != '')[:, None]
+    return np.nonzero(mask)
+
+
+def hedge_ratios(y, x):
+    """
+    逐列 OLS: y = alpha + beta * x + e
+    y / x 形状 (日期, 组合)，返回 (alpha, beta, 残差)
+    """
+    xc = x - x.mean(axis=0)
+    yc = y - y.mean(axis=0)
+    beta = (xc * yc).sum(axis=0) / (xc * xc).sum(axis=0)
+    alpha = y.mean(axis=0) - beta * x.mean(axis=0)
+    return alpha, beta, yc - beta * xc
+
+
+def adf_tstat(e, lags=1):
+    """
+    逐列 ADF 统计量 (不含常数项): Δe_t = γ e_{t-1} + Σ φ_k Δe_{t-k} + ε，返回 γ 的 t 值
+    e 形状 (日期, 组合)
+    """
+    de = np.diff(e, axis=0)
+    y = de[lags:]
+    X = [e[lags:-1]] + [de[lags - k:-k] for k in range(1, lags + 1)]
+    X = np.stack(X, axis=-1)                        # (样本, 组合, 回归项)
+    xtx = np.einsum('tpi,tpj->pij', X, X)
+    xty = np.einsum('tpi,tp->pi', X, y)
+    coef = np.linalg.solve(xtx, xty[..., None])[..., 0]
+    resid = y - np.einsum('tpi,pi->tp', X, coef)
+    dof = len(y) - X.shape[-1]
+    s2 = (resid ** 2).sum(axis=0) / dof
+    se = np.sqrt(s2 * np.linalg.inv(xtx)[:, 0, 0])
+    return coef[:, 0] / se
+
+
+def signals(z, entry=ENTRY, exit=EXIT):
+    """z < -entry: 1 (买 s1 卖 s2)；z > entry: -1；|z| < exit 或其余情况 0 (同 pair_trading)"""
+    signal = np.where(z < -entry, 1, np.where(z > entry, -1, 0))
+    return np.where((z > -exit) & (z < exit), 0, signal)
+
+
+def spread_stats(signal, s1, s2, hedge=1.0):
+    """
+    次日按信号持仓，收益 = 信号 × (s1 收益 - hedge × s2 收益)
+    hedge 为标量或 (日期, 组合) 数组 (当天收盘后的对冲比率)
+    返回 {'return', 'sharpe', 'trades'}，trades 为持仓变化次数
+    """
+    position = signal[:-1]
+    hedge = np.asarray(hedge, dtype=float)
+    if hedge.ndim:
+        hedge = hedge[:-1]
+    returns = position * ((s1[1:] / s1[:-1] - 1) - hedge * (s2[1:] / s2[:-1] - 1))
+    m = len(returns)
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0, ddof=1) if m > 1 else np.zeros(returns.shape[1:])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), 0.0)
+    trades = (position[:1] != 0).sum(axis=0) + (np.diff(position, axis=0) != 0).sum(axis=0)
+    return {'return': np.prod(1 + returns, axis=0) - 1, 'sharpe': sharpe, 'trades': trades}
+
+
+def zscore_backtest(s1, s2, window=60, entry=ENTRY, exit=EXIT):
+    """
+    价格比率 z-score 配对策略 (同 pair_trading.pair_trading)，逐列一批算完
+    s1 / s2 形状 (日期, 组合)，s1 / s2 等金额对冲
+    """
+    ratio = s1 / s2
+    ma, sd = rolling_moments(ratio, [window])[window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (ratio - ma) / sd
+    return spread_stats(signals(z, entry, exit), s1, s2)
+
+
+def kalman_zscores(s1, s2, delta=1e-6, ve=1e-4, warmup=20):
+    """
+    对数价格上的卡尔曼对冲比率，逐根推进、所有组合一起更新
+    返回 (z, beta)，形状 (日期, 组合)；第 t 行只用到第 t 根及之前的价格
+    """
+    y, x = np.log(s1), np.log(s2)
+    hedge = KalmanHedge(y.shape[1], delta, ve, warmup)
+    z = np.empty(y.shape)
+    beta = np.empty(y.shape)
+    for t in range(len(y)):
+        z[t], beta[t] = hedge.update(y[t], x[t])
+    return z, beta
+
+
+def kalman_backtest(s1, s2, delta=1e-6, ve=1e-4, entry=ENTRY, exit=EXIT, warmup=20):
+    """
+    卡尔曼价差 z-score 配对策略: 信号规则同 zscore_backtest，
+    按前一天收盘后的 beta 对冲 (对数价格的 beta 即收益的对冲比例)
+    """
+    z, beta = kalman_zscores(s1, s2, delta, ve, warmup)
+    return spread_stats(signals(z, entry, exit), s1, s2, beta)
+
+
+def discover(closes, groups=None, min_corr=0.8, level=0.05, lags=1, window=60, chunk=2000):
+    """
+    配对发现
+    - closes: (日期 × 股票) 收盘价 DataFrame
+    - groups: 每只股票的行业 (Series/dict，按列名对应)，None 时不按行业过滤
+    - level: 协整显著性水平 (EG_CRITICAL 里的 0.01 / 0.05 / 0.10)，None 时不过滤
+    返回通过筛选的组合表 (按 ADF 统计量从小到大):
+    s1, s2, group, corr, beta, adf, return, sharpe, trades, kalman_return, kalman_sharpe, kalman_trades
+    另在 attrs 里记录各阶段的数量: stocks, pairs, candidates
+    """
+    prices, tickers = full_history(closes)
+    n = len(tickers)
+    corr = correlation(prices)
+    if groups is not None:
+        groups = pd.Series(groups).reindex(tickers).to_numpy()
+    i, j = candidates(corr, min_corr, groups)
+
+    logp = np.log(prices)
+    parts = []
+    for start in range(0, len(i), chunk):
+        a, b = i[start:start + chunk], j[start:start + chunk]
+        _, beta, resid = hedge_ratios(logp[:, a], logp[:, b])
+        adf = adf_tstat(resid, lags)
+        keep = adf <= EG_CRITICAL[level] if level is not None else np.ones(len(a), dtype=bool)
+        a, b = a[keep], b[keep]
+        stats = zscore_backtest(prices[:, a], prices[:, b], window)
+        kalman = kalman_backtest(prices[:, a], prices[:, b])
+        parts.append(pd.DataFrame({
+            's1': tickers[a],
+            's2': tickers[b],
+            'group': groups[a] if groups is not None else None,
+            'corr': corr[a, b],
+            'beta': beta[keep],
+            'adf': adf[keep],
+            **stats,
+            **{f"kalman_{key}": v for key, v in kalman.items()},
+        }))
+
+    columns = ['s1', 's2', 'group', 'corr', 'beta', 'adf', 'return', 'sharpe', 'trades',
+               'kalman_return', 'kalman_sharpe', 'kalman_trades']
+    table = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    table = table.sort_values('adf', ignore_index=True)
+    table.attrs.update({'stocks': n, 'pairs': n * (n - 1) // 2, 'candidates': len(i)})
+    return table
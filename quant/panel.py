@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+全市场价格面板 - 内存映射
+
+- data/panel/panel.f32: float32 数组，形状 (股票, 日期, 字段)
+- data/panel/index.json: 股票代码、日期、字段
+- 读取时用 np.memmap，不复制数据
+
+用法:
+    python3 -m quant.panel --period 1y       # 构建全A股面板
+
+    from quant.panel import load_panel, CLOSE
+    panel = load_panel()
+    closes = panel[:, -60:, CLOSE]           # 全市场最近60天收盘价
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from quant.data import ROOT, get_history
+from quant.scan import scan
+from quant.symbols import get_a_stock_list
+
+PANEL_DIR = os.environ.get('QUANT_PANEL_DIR', os.path.join(ROOT, 'data', 'panel'))
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(FIELDS))
+
+
+class Panel:
+    """内存映射面板: data[股票, 日期, 字段]"""
+
+    def __init__(self, data, tickers, dates):
+        self.data = data
+        self.tickers = list(tickers)
+        self.dates = pd.DatetimeIndex(dates)
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._pos
+
+    def index(self, ticker):
+        """股票在面板中的行号"""
+        return self._pos[ticker]
+
+    def field(self, field):
+        """单个字段的 (日期 × 股票) DataFrame"""
+        f = FIELDS.index(field) if isinstance(field, str) else field
+        return pd.DataFrame(self.data[:, :, f].T, index=self.dates, columns=self.tickers)
+
+    def frame(self, ticker):
+        """单只股票的日线 DataFrame (去掉停牌/未上市的空行)"""
+        df = pd.DataFrame(self.data[self._pos[ticker]], index=self.dates, columns=FIELDS)
+        return df.dropna(how='all')
+
+
+def _paths(path):
+    return os.path.join(path, 'panel.f32'), os.path.join(path, 'index.json')
+
+
+def write_panel(frames, path=PANEL_DIR):
+    """
+    把 {ticker: DataFrame} 写成面板
+    - 日期取所有股票的并集，缺失处为 NaN
+    """
+    frames = {t: df for t, df in frames.items() if df is not None and len(df) > 0}
+    tickers = sorted(frames)
+    dates = set()
+    for ticker in tickers:
+        index = frames[ticker].index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        frames[ticker] = frames[ticker].set_axis(index.normalize())
+        dates.update(frames[ticker].index)
+    dates = pd.DatetimeIndex(sorted(dates))
+
+    os.makedirs(path, exist_ok=True)
+    data_path, index_path = _paths(path)
+    tmp = f"{data_path}.tmp"
+    shape = (len(tickers), len(dates), len(FIELDS))
+    data = np.memmap(tmp, dtype=np.float32, mode='w+', shape=shape)
+    data[:] = np.nan
+    for i, ticker in enumerate(tickers):
+        df = frames[ticker]
+        df = df[~df.index.duplicated(keep='last')]
+        data[i] = df.reindex(dates)[FIELDS].to_numpy(dtype=np.float32)
+    data.flush()
+    del data
+    os.replace(tmp, data_path)
+
+    with open(f"{index_path}.tmp", 'w') as f:
+        json.dump({
+            'tickers': tickers,
+            'dates': [d.strftime('%Y-%m-%d') for d in dates],
+            'fields': FIELDS,
+            'shape': list(shape),
+        }, f)
+    os.replace(f"{index_path}.tmp", index_path)
+    return load_panel(path)
+
+
+def load_panel(path=PANEL_DIR, mode='r'):
+    """只读映射面板，不把数据读进内存"""
+    data_path, index_path = _paths(path)
+    with open(index_path) as f:
+        index = json.load(f)
+    data = np.memmap(data_path, dtype=np.float32, mode=mode, shape=tuple(index['shape']))
+    return Panel(data, index['tickers'], pd.to_datetime(index['dates']))
+
+
+def build_panel(tickers, period='1y', path=PANEL_DIR, workers=16, rate=20):
+    """从日线缓存构建面板，缓存过期的股票并发增量更新"""
+    frames = {}
+
+    def load(ticker):
+        frames[ticker] = get_history(ticker, period, timeout=10)
+
+    scan(tickers, load, workers=workers, rate=rate)
+    return write_panel(frames, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='构建全A股内存映射面板')
+    parser.add_argument('--period', default='1y', help='历史长度，如 3mo / 1y / 3y')
+    parser.add_argument('--workers', type=int, default=16, help='并发线程数')
+    parser.add_argument('--rate', type=float, default=20, help='每秒最多请求数')
+    args = parser.parse_args(argv)
+
+    tickers = [s['ticker'] for s in get_a_stock_list()]
+    panel = build_panel(tickers, args.period, workers=args.workers, rate=args.rate)
+    print(f"面板已写入 {PANEL_DIR}: {len(panel)} 只股票 × {len(panel.dates)} 天")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+持仓引擎 - 进出场信号 + 止损/止盈/最长持有 -> 持仓、成交、净值
+
+止损这类规则依赖进场价，每根K线的持仓取决于之前的路径，没法简单 shift。
+这里按时间逐根推进，但每一步对所有股票同时做数组运算，
+一次跑完 (日期 × 股票) 整个面板；单只股票传 1-D 数组即可。
+
+规则 (每根K线，同 smart_ma_strategy 原来的循环):
+1. 空仓且有进场信号 -> 按收盘价全仓买入 (shares = cash / close)
+   持仓且有出场信号 -> 按收盘价卖出 (cash = shares * close)
+2. 仍持仓时检查 (成本 = cash / shares，即进场价):
+   - 止损: (close - 成本) / 成本 < -stop_loss
+   - 止盈: (close - 成本) / 成本 > take_profit
+   - 最长持有: 持有K线数 >= max_hold
+   触发则按收盘价卖出
+
+只看信号、不算资金的 "突破买入持有到跌破" 用 latch()，完全向量化。
+
+A股交易规则 (quant.rules.tradable 的掩码): buyable 为 False 时不买，sellable 为 False 时
+所有卖出 (出场信号/止损/止盈/最长持有) 都推迟，出场信号保留到能卖的那一天。
+
+用法:
+    result = simulate(close, sig == 1, sig == -1, start=60, stop_loss=0.05)
+    result['equity'][-1]       # 期末资金 (持仓按最后收盘价计)
+"""
+
+import numpy as np
+import pandas as pd
+
+# 成交类型 (fills 数组中的值)
+BUY = 1
+SELL = -1
+STOP_LOSS = -2
+TAKE_PROFIT = -3
+MAX_HOLD = -4
+
+
+def latch(entries, exits):
+    """
+    进场信号后一直持有，直到出场信号 (同一根都有时进场优先)
+    返回每根K线收盘后是否持仓 (bool 数组)，沿第 0 轴
+    """
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    state = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+    state = pd.DataFrame(state.reshape(len(state), -1)).ffill().to_numpy()
+    return (state == 1).reshape(entries.shape)
+
+
+def _columns(a, dtype):
+    a = np.asarray(a, dtype=dtype)
+    return a[:, None] if a.ndim == 1 else a
+
+
+def simulate(close, entries, exits, start=0, stop_loss=None, take_profit=None,
+             max_hold=None, capital=100000.0, buyable=None, sellable=None):
+    """
+    逐根推进的全仓多头回测
+    - close / entries / exits: 1-D (日期) 或 2-D (日期 × 股票)
+    - start: 从第几根K线开始交易 (之前的K线只用于算指标)
+    - buyable / sellable: 每根K线收盘能否买入 / 卖出 (同形状，默认都可以)
+    返回 dict:
+    - position: 每根收盘后是否持仓
+    - fills: 成交类型 (BUY/SELL/STOP_LOSS/TAKE_PROFIT/MAX_HOLD，0 为无成交)
+    - equity: 每根收盘后的资金 (持仓按收盘价计)
+    """
+    flat = np.ndim(close) == 1
+    close = _columns(close, float)
+    entries = _columns(entries, bool)
+    exits = _columns(exits, bool)
+    n, k = close.shape
+    buyable = np.ones((n, k), dtype=bool) if buyable is None else _columns(buyable, bool)
+    sellable = np.ones((n, k), dtype=bool) if sellable is None else _columns(sellable, bool)
+
+    cash = np.full(k, float(capital))
+    shares = np.zeros(k)
+    held = np.zeros(k, dtype=bool)
+    pending = np.zeros(k, dtype=bool)
+    since = np.zeros(k, dtype=int)
+    position = np.zeros((n, k), dtype=bool)
+    fills = np.zeros((n, k), dtype=np.int8)
+    equity = np.full((n, k), float(capital))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for t in range(start, n):
+            c = close[t]
+            buy = entries[t] & ~held & ~np.isnan(c) & buyable[t]
+            pending = (pending | exits[t]) & held
+            sell = pending & sellable[t]
+            pending &= ~sell
+            shares = np.where(buy, cash / c, shares)
+            cash = np.where(sell, shares * c, cash)
+            held = (held | buy) & ~sell
+            since = np.where(buy, t, since)
+            fills[t, buy] = BUY
+            fills[t, sell] = SELL
+
+            cost = cash / shares
+            change = (c - cost) / cost
+            for hit, kind in [
+                (None if stop_loss is None else change < -stop_loss, STOP_LOSS),
+                (None if take_profit is None else change > take_profit, TAKE_PROFIT),
+                (None if max_hold is None else t - since >= max_hold, MAX_HOLD),
+            ]:
+                if hit is None:
+                    continue
+                hit &= held & sellable[t]
+                cash = np.where(hit, shares * c, cash)
+                held &= ~hit
+                fills[t, hit] = kind
+
+            position[t] = held
+            equity[t] = np.where(held, shares * c, cash)
+
+    result = {'position': position, 'fills': fills, 'equity': equity}
+    if flat:
+        result = {name: arr[:, 0] for name, arr in result.items()}
+    return result
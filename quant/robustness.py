@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+稳健性检验 - 对策略收益重采样，看收益、夏普、回撤的置信区间
+
+单次回测只有一条收益路径，"策略收益 > 市场收益" 可能只是运气。
+把策略的日收益序列重采样几千上万次，每次得到一条新路径，统计指标的分布:
+- block: 圆形块自助法 (有放回)，随机起点连续取 block 天、首尾相接，保留短期的自相关和波动聚集
+- shuffle: 打乱顺序 (无放回)。总收益和夏普不变，只有回撤等路径指标有分布
+
+重采样的行号按块批量生成 (每块 chunk 次)，取值后得到 (日期 × 重采样) 矩阵，
+指标用 quant.metrics.summarize 一次算完，内存只占一块的大小。
+
+用法:
+    samples = resample(df['Strategy_Returns'], size=10000, block=20, seed=0)
+    table = intervals(samples, level=0.9, actual=summarize(df['Strategy_Returns']))
+    (samples['total_return'] > market_return).mean()      # 跑赢市场的比例
+
+脚本里 (只需提供各自的收益序列):
+    add_arguments(parser)                                  # --bootstrap/--method/--block/--level/--seed
+    opts = options(args)
+    print(describe(**opts))
+    report('RSI', df['Strategy_Returns'], market_return, **opts)
+"""
+
+import numpy as np
+import pandas as pd
+
+from quant.metrics import summarize
+
+# 重采样方法
+METHODS = ('block', 'shuffle')
+
+# 置信区间默认展示的指标
+METRICS = ['total_return', 'sharpe', 'max_drawdown']
+
+# 每块重采样次数: 块内 (日期 × 重采样) 矩阵约 chunk × 日期数 × 8 字节
+CHUNK = 1000
+
+
+def block_indices(rng, n, size, block=20):
+    """圆形块自助法的行号 (size, n): 每块随机起点连续 block 天，超出末尾从头接上"""
+    block = max(1, min(block, n))
+    starts = rng.integers(0, n, (size, -(-n // block)))
+    idx = (starts[:, :, None] + np.arange(block)) % n
+    return idx.reshape(size, -1)[:, :n]
+
+
+def shuffle_indices(rng, n, size):
+    """每行是 0..n-1 的一个随机排列 (size, n)"""
+    return rng.permuted(np.tile(np.arange(n), (size, 1)), axis=1)
+
+
+def resample(returns, size=10000, method='block', block=20, seed=None, chunk=CHUNK):
+    """
+    一条收益序列重采样 size 次，返回每次的指标表 (行: 重采样，列: summarize 的指标)
+    NaN 收益 (还没有持仓的开头) 先去掉
+    """
+    if method not in METHODS:
+        raise ValueError(f"未知重采样方法: {method} (可选 {', '.join(METHODS)})")
+    r = np.asarray(returns, dtype=float)
+    r = r[~np.isnan(r)]
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, size, chunk):
+        m = min(chunk, size - start)
+        if method == 'block':
+            idx = block_indices(rng, len(r), m, block)
+        else:
+            idx = shuffle_indices(rng, len(r), m)
+        parts.append(summarize(r[idx.T]))
+    return pd.concat(parts, ignore_index=True)
+
+
+def intervals(samples, level=0.9, actual=None, metrics=METRICS):
+    """
+    重采样指标的置信区间 (行: 指标，列: low / median / high)
+    - level: 双侧置信水平，0.9 即 5% ~ 95% 分位
+    - actual: 原始路径的指标 (Series)，给了就加一列 actual
+    """
+    tail = (1 - level) / 2
+    table = samples[list(metrics)].quantile([tail, 0.5, 1 - tail]).T
+    table.columns = ['low', 'median', 'high']
+    if actual is not None:
+        table.insert(0, 'actual', pd.Series(actual).reindex(table.index))
+    return table
+
+
+def add_arguments(parser):
+    """给脚本的 argparse 加上重采样参数 (--bootstrap 不给次数时为 10000，默认 0 不做)"""
+    parser.add_argument('--bootstrap', type=int, nargs='?', const=10000, default=0,
+                        help='策略收益重采样次数 (默认 10000)')
+    parser.add_argument('--method', choices=METHODS, default='block', help='重采样方法')
+    parser.add_argument('--block', type=int, default=20, help='块自助法的块长 (天)')
+    parser.add_argument('--level', type=float, default=0.9, help='置信水平')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+
+
+def options(args):
+    """add_arguments 的解析结果 -> report() 的关键字参数"""
+    return {'size': args.bootstrap, 'method': args.method, 'block': args.block,
+            'level': args.level, 'seed': args.seed}
+
+
+def describe(size=10000, method='block', block=20, level=0.9, seed=None):
+    """一行说明: 重采样次数、方法、置信水平"""
+    detail = f"{method}, 块长 {block}" if method == 'block' else method
+    return f"重采样 {size} 次 ({detail}), {level*100:.0f}% 置信区间"
+
+
+def report(label, returns, market, size=10000, method='block', block=20, level=0.9, seed=None):
+    """
+    打印一条策略收益的 收益/夏普/回撤 置信区间和跑赢市场 (总收益 market) 的比例
+    返回 intervals() 的表，attrs['beat'] 为跑赢比例
+    """
+    samples = resample(returns, size, method, block, seed)
+    table = intervals(samples, level, summarize(returns))
+    table.attrs['beat'] = beat = (samples['total_return'] > market).mean()
+    ret, sharpe, drawdown = (table.loc[k] for k in ('total_return', 'sharpe', 'max_drawdown'))
+    print(f"{label} 收益 {ret['actual']*100:+.1f}% [{ret['low']*100:+.1f}%, {ret['high']*100:+.1f}%] "
+          f"夏普 {sharpe['actual']:.2f} [{sharpe['low']:.2f}, {sharpe['high']:.2f}] "
+          f"回撤 [{drawdown['low']*100:.1f}%, {drawdown['high']*100:.1f}%] "
+          f"| 市场 {market*100:+.1f}%, 跑赢 {beat*100:.0f}%")
+    return table
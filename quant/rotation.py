@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+轮动回测 - 定期买入过去 N 天涨幅最大的几只
+
+输入是 (日期 × 股票) 收盘价矩阵 (NaN 为停牌/未上市)，全部用数组运算:
+- 动量矩阵: close[t] / close[t - lookback] - 1，所有日期一次算完
+- 调仓日: 每行动量用 argpartition 选前 top 只，等权买入 (不足 top 只就少买，没有就空仓)
+- 两次调仓之间买入持有，不再平衡: 净值 = Σ 权重 × 收盘价[t] / 收盘价[调仓日]
+  (停牌按最后收盘价计)
+- 换手率: 调仓前 (随价格漂移后) 的权重和新权重之差，Σ|Δw| / 2，现金也算一项
+
+调仓按收盘价成交 (当天收盘出信号、当天收盘换仓)。
+cost 为单边费率，按每次调仓的成交金额 Σ|Δw| 扣除。
+
+用法:
+    from quant.panel import load_panel, CLOSE
+    panel = load_panel()
+    result = rotation(panel[:, :, CLOSE].T, lookback=60, top=10,
+                      rebalance=schedule(panel.dates, 'W'))
+    result['equity']       # 每天净值 (第一次调仓前为 NaN)
+    result['turnover']     # 每次调仓的换手率
+"""
+
+import numpy as np
+import pandas as pd
+
+# 年化用的交易日数
+TRADING_DAYS = 252
+
+
+def momentum(close, lookback):
+    """过去 lookback 天涨幅矩阵，前 lookback 行为 NaN"""
+    close = np.asarray(close, dtype=float)
+    out = np.full(close.shape, np.nan)
+    if len(close) > lookback:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[lookback:] = close[lookback:] / close[:-lookback] - 1
+    return out
+
+
+def schedule(dates, freq):
+    """
+    调仓日的行号
+    - freq 为整数: 每 freq 个交易日一次
+    - freq 为 pandas 周期 ('W' / 'M' / 'Q'): 每个周期的最后一个交易日
+    """
+    dates = pd.DatetimeIndex(dates)
+    if isinstance(freq, (int, np.integer)):
+        return np.arange(0, len(dates), int(freq))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    periods = dates.to_period(freq)
+    return np.flatnonzero(np.r_[periods[1:] != periods[:-1], True])
+
+
+def select(scores, top):
+    """
+    每行分数最高的 top 列 (NaN 不选)
+    返回 (列号, 权重)，形状 (行, top)；空位列号为 -1、权重为 0
+    """
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    top = min(top, scores.shape[1])
+    idx = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+    valid = np.isfinite(np.take_along_axis(scores, idx, axis=1))
+    count = valid.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(valid, 1.0 / count, 0.0)
+    return np.where(valid, idx, -1), weights
+
+
+def rotation(close, lookback=60, top=1, rebalance=5, cost=0.0, capital=1.0):
+    """
+    动量轮动回测
+    - close: (日期 × 股票) 收盘价
+    - rebalance: 调仓日行号 (见 schedule)，或整数 (每几个交易日一次)
+      动量不足 lookback 天的调仓日跳过
+    返回 dict:
+    - equity: (日期,) 每天收盘后的净值，第一次调仓前为 NaN
+    - rebalance: (调仓次数,) 调仓日行号
+    - holdings / weights: (调仓次数, top) 每次买入的列号 (-1 为空位) 和权重
+    - turnover: (调仓次数,) 换手率 (第一次从现金建仓为 1)
+    """
+    close = np.asarray(close, dtype=float)
+    n, k = close.shape
+    if isinstance(rebalance, (int, np.integer)):
+        rebalance = np.arange(lookback, n, int(rebalance))
+    rebalance = np.asarray(rebalance, dtype=int)
+    rebalance = rebalance[(rebalance >= lookback) & (rebalance < n)]
+    equity = np.full(n, np.nan)
+    if len(rebalance) == 0:
+        return {'equity': equity, 'rebalance': rebalance, 'holdings': np.empty((0, top), dtype=int),
+                'weights': np.empty((0, top)), 'turnover': np.empty(0)}
+
+    holdings, weights = select(momentum(close, lookback)[rebalance], top)
+    cash = 1 - weights.sum(axis=1)
+    # 停牌沿用最后收盘价；选中的股票在调仓日都有价格
+    filled = pd.DataFrame(close).ffill().to_numpy()
+    cols = np.maximum(holdings, 0)
+    base = filled[rebalance[:, None], cols]
+
+    # 每天属于哪一次调仓，相对调仓日的持仓增长
+    days = np.arange(rebalance[0], n)
+    seg = np.searchsorted(rebalance, days, side='right') - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(weights[seg] > 0, filled[days[:, None], cols[seg]] / base[seg], 0.0)
+    ratio = (weights[seg] * growth).sum(axis=1) + cash[seg]
+
+    # 调仓前一刻: 上一期的持仓按价格漂移后的权重
+    with np.errstate(divide='ignore', invalid='ignore'):
+        end_growth = np.where(weights[:-1] > 0, filled[rebalance[1:, None], cols[:-1]] / base[:-1], 0.0)
+    period = (weights[:-1] * end_growth).sum(axis=1) + cash[:-1]
+
+    rows = np.arange(len(rebalance))
+    before = np.zeros((len(rebalance), k + 1))
+    before[0, k] = 1.0
+    np.add.at(before, (rows[1:, None], cols[:-1]), weights[:-1] * end_growth / period[:, None])
+    before[1:, k] = cash[:-1] / period
+    after = np.zeros((len(rebalance), k + 1))
+    np.add.at(after, (rows[:, None], cols), weights)
+    after[:, k] = cash
+    traded = np.abs(after - before)[:, :k].sum(axis=1)
+    turnover = np.abs(after - before).sum(axis=1) / 2
+
+    # 每次调仓后的资金: 上一期收益 × (1 - 费用)
+    value = capital * np.cumprod(np.r_[1.0, period] * (1 - cost * traded))
+    equity[days] = value[seg] * ratio
+    return {
+        'equity': equity,
+        'rebalance': rebalance,
+        'holdings': holdings,
+        'weights': weights,
+        'turnover': turnover,
+    }
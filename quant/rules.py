@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+A股交易规则 - 可否成交的掩码 (日期 × 股票 一次算完)
+
+回测默认收盘价成交，但A股收盘时:
+- 涨停 (收盘价封在涨停价) 买不进
+- 跌停 (收盘价封在跌停价) 卖不出
+- 停牌 (成交量为 0 或没有K线) 买卖都不行
+- T+1: 当天买的股票当天不能卖。按收盘价每天最多调一次仓时，今天收盘买、
+  最早下一个交易日收盘卖，天然满足；盘中多次成交的策略要自己处理
+
+涨跌幅按板块 (quant.symbols 的代码规则) 和状态:
+主板 10%，创业板/科创板 20%，北交所 30%，主板 ST 5%。
+ST 状态取当前代码表，不是历史状态。新股上市初期不设涨跌幅，这里不区分。
+
+Yahoo 日线是复权价，所以用 收盘 / 前收 - 1 判断，而不是和涨停价比。
+涨停价要四舍五入到分，低价股实际涨幅会略低于 10%，留 TOLERANCE 的余量。
+
+目标持仓 -> 实际持仓: 加仓 (买入/平空) 要能买，减仓 (卖出/开空) 要能卖，
+不能成交时保持原来的持仓，见 constrain()。
+
+ST 状态要查代码表 (可能访问网络)，多进程回测时在主进程用 limit_map() 算好涨跌幅，
+作为参数传给子进程的 position(df, signal, rates)，子进程里不要调用 limit_rates()。
+
+用法:
+    df['Position'] = position(df, df['Signal'])          # 代替 df['Signal'].shift(1)
+    limits = limit_map(STOCKS.values())                   # 主进程: {代码: 涨跌幅}
+
+    buyable, sellable = tradable(closes, volumes, limit_rates(tickers))   # 全市场 (日期 × 股票)
+    held = constrain(targets, buyable, sellable)
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from quant.symbols import classify
+
+# 各板块涨跌幅
+LIMITS = {'主板': 0.10, '创业板': 0.20, '科创板': 0.20, '北交所': 0.30, 'B股': 0.10}
+# 主板 ST 涨跌幅
+ST_LIMIT = 0.05
+# 代码无法识别时按主板
+DEFAULT_LIMIT = 0.10
+
+# 涨跌幅判断的余量 (涨停价四舍五入到分)
+TOLERANCE = 0.002
+
+
+@lru_cache(maxsize=1)
+def st_tickers():
+    """代码表里当前为 ST 的股票 (取不到代码表时为空，ST 按普通股票处理)"""
+    from quant.symbols import symbol_master
+
+    try:
+        master = symbol_master()
+    except Exception as e:
+        print(f"代码表获取失败，ST 按普通股票处理: {e}")
+        return frozenset()
+    return frozenset(master.loc[master['status'] == 'ST', 'ticker'])
+
+
+def limit_rates(tickers, st=None):
+    """
+    每只股票的涨跌幅 (小数)
+    - st: ST 股票集合，默认取 st_tickers()
+    """
+    tickers = [str(t) for t in tickers]
+    if st is None:
+        st = st_tickers()
+    boards = classify([t.split('.')[0] for t in tickers])['board']
+    rates = boards.map(LIMITS).fillna(DEFAULT_LIMIT).to_numpy(dtype=float)
+    is_st = np.array([t in st for t in tickers], dtype=bool)
+    return np.where(is_st & (boards == '主板').to_numpy(), ST_LIMIT, rates)
+
+
+def limit_map(tickers, st=None):
+    """{代码: 涨跌幅}，在主进程里算好传给 quant.runner 的任务"""
+    tickers = [str(t) for t in tickers]
+    return dict(zip(tickers, limit_rates(tickers, st).tolist()))
+
+
+def tradable(close, volume, rates, tol=TOLERANCE):
+    """
+    收盘时能否买入 / 卖出
+    - close / volume: 1-D (日期) 或 2-D (日期 × 股票)，没有K线为 NaN
+    - rates: 涨跌幅，标量或每只股票一个
+    返回 (buyable, sellable) 布尔数组
+    """
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    suspended = np.isnan(close) | ~(np.nan_to_num(volume) > 0)
+
+    prev = pd.DataFrame(close.reshape(len(close), -1)).ffill().shift(1).to_numpy().reshape(close.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = close / prev - 1
+    limit_up = change >= np.asarray(rates) - tol
+    limit_down = change <= -np.asarray(rates) + tol
+    return ~suspended & ~limit_up, ~suspended & ~limit_down
+
+
+def _ffill(values, initial=0.0):
+    """沿第 0 轴用前值填 NaN，开头的 NaN 用 initial"""
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1)), -1)
+    idx = np.maximum.accumulate(idx, axis=0)
+    filled = np.take_along_axis(values, np.maximum(idx, 0), axis=0)
+    return np.where(idx >= 0, filled, initial)
+
+
+def constrain(target, buyable, sellable):
+    """
+    目标持仓 -> 实际持仓 (每天收盘后)
+    加仓要 buyable，减仓要 sellable，不能成交就保持前一天的实际持仓；目标为 NaN 视为 0
+
+    实际持仓依赖前一天，这里不逐日循环: 先只在买卖都可以的日子取目标值、其余沿用前值，
+    再用得到的前一天持仓判断只能单向成交的日子 (涨停/跌停)，重复到不再变化。
+    每轮都是整表的数组运算，通常一两轮就收敛。
+    """
+    target = np.nan_to_num(np.asarray(target, dtype=float))
+    buyable = np.asarray(buyable, dtype=bool)
+    sellable = np.asarray(sellable, dtype=bool)
+    free = buyable & sellable
+    decided = np.where(free, target, np.nan)
+    for _ in range(len(target) + 1):
+        held = _ffill(decided)
+        prev = np.concatenate([np.zeros_like(held[:1]), held[:-1]])
+        ok = free | (target == prev) | (buyable & (target > prev)) | (sellable & (target < prev))
+        update = np.where(ok, target, np.nan)
+        if np.array_equal(update, decided, equal_nan=True):
+            break
+        decided = update
+    return held
+
+
+def position(df, signal, rates=None):
+    """
+    单只股票的 signal -> Position: 同 signal.shift(1)，但换仓要满足当天能成交
+    - df: 日线 (Close / Volume)，股票代码取 df.attrs['ticker'] 决定涨跌幅
+    - rates: 直接给涨跌幅 (覆盖按代码推断的值)；子进程里必须给，见 limit_map()
+    """
+    if rates is None:
+        ticker = df.attrs.get('ticker')
+        rates = limit_rates([ticker])[0] if ticker else DEFAULT_LIMIT
+    buyable, sellable = tradable(df['Close'], df['Volume'], rates)
+    held = constrain(pd.Series(signal, index=df.index), buyable, sellable)
+    return pd.Series(held, index=df.index).shift(1)
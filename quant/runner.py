@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+多进程回测 - 价格数据放在共享内存里
+
+- 所有股票的 OHLCV 拼成一个 float64 数组放进共享内存，日期另放一块
+- 子进程启动时按名字挂上共享内存，取某只股票时直接切片，不用 pickle DataFrame
+- 任务是 (策略函数, 股票代码, 参数)，函数签名 fn(df, **params)，返回 dict 或一个数
+- 结果汇总成一张表: task (函数名), ticker, 参数..., 返回值...
+
+策略函数要能被子进程导入 (模块顶层定义的函数)，脚本要有 if __name__ == '__main__' 保护。
+
+用法:
+    frames = load_frames(STOCKS, '3y')
+    jobs = product_jobs(evaluate, frames, window=[10, 20, 30], num_std=[1.5, 2, 2.5])
+    table = run(jobs, frames, workers=32)
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from quant.data import get_panel, ticker_frame
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class SharedFrames:
+    """
+    把 {ticker: DataFrame} 放进共享内存
+    spec 是很小的描述信息 (共享内存名字、每只股票的起止行)，传给子进程即可
+    """
+
+    def __init__(self, frames, fields=FIELDS):
+        frames = {t: df for t, df in frames.items() if df is not None and len(df) > 0}
+        self.fields = list(fields)
+        self.tickers = list(frames)
+        lengths = [len(frames[t]) for t in self.tickers]
+        self.offsets = np.r_[0, np.cumsum(lengths)].astype(int)
+        total = int(self.offsets[-1])
+        tz = {str(frames[t].index.tz) for t in self.tickers if frames[t].index.tz is not None}
+        self.tz = tz.pop() if len(tz) == 1 else None
+
+        self._values = shared_memory.SharedMemory(create=True, size=max(total * len(self.fields), 1) * 8)
+        self._dates = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+        values = np.ndarray((total, len(self.fields)), dtype=np.float64, buffer=self._values.buf)
+        dates = np.ndarray((total,), dtype=np.int64, buffer=self._dates.buf)
+        for ticker, start, end in zip(self.tickers, self.offsets[:-1], self.offsets[1:]):
+            df = frames[ticker]
+            values[start:end] = df[self.fields].to_numpy(dtype=np.float64)
+            index = df.index.tz_convert(self.tz) if df.index.tz is not None and self.tz else df.index
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            dates[start:end] = index.as_unit('ns').asi8
+        del values, dates
+
+    @property
+    def spec(self):
+        return {
+            'values': self._values.name,
+            'dates': self._dates.name,
+            'fields': self.fields,
+            'tickers': self.tickers,
+            'offsets': self.offsets.tolist(),
+            'tz': self.tz,
+        }
+
+    def close(self):
+        for shm in (self._values, self._dates):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedReader:
+    """子进程里按 spec 挂上共享内存，取单只股票的 DataFrame"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._values = shared_memory.SharedMemory(name=spec['values'])
+        self._dates = shared_memory.SharedMemory(name=spec['dates'])
+        total = spec['offsets'][-1]
+        self.values = np.ndarray((total, len(spec['fields'])), dtype=np.float64, buffer=self._values.buf)
+        self.dates = np.ndarray((total,), dtype=np.int64, buffer=self._dates.buf)
+        self._pos = {t: i for i, t in enumerate(spec['tickers'])}
+
+    def frame(self, ticker):
+        i = self._pos[ticker]
+        start, end = self.spec['offsets'][i], self.spec['offsets'][i + 1]
+        index = pd.DatetimeIndex(self.dates[start:end].copy())
+        if self.spec['tz']:
+            index = index.tz_localize(self.spec['tz'])
+        df = pd.DataFrame(self.values[start:end], index=index.rename('Date'),
+                          columns=self.spec['fields'], copy=True)
+        df.attrs['ticker'] = ticker
+        return df
+
+    def close(self):
+        del self.values, self.dates
+        self._values.close()
+        self._dates.close()
+
+
+_reader = None
+
+
+def _init_worker(spec):
+    global _reader
+    _reader = SharedReader(spec)
+
+
+def _row(fn, ticker, params, result):
+    row = {'task': fn.__name__, 'ticker': ticker, **params}
+    if isinstance(result, dict):
+        row.update(result)
+    else:
+        row['value'] = result
+    return row
+
+
+def _run_job(job):
+    fn, ticker, params = job
+    try:
+        return _row(fn, ticker, params, fn(_reader.frame(ticker), **params))
+    except Exception as e:
+        return _row(fn, ticker, params, {'error': str(e)})
+
+
+def load_frames(stocks, period='3y'):
+    """观察名单一次批量下载，返回 {ticker: DataFrame}"""
+    panel = get_panel(stocks, period)
+    tickers = list(stocks.values()) if isinstance(stocks, dict) else list(stocks)
+    frames = {}
+    for ticker in tickers:
+        df = ticker_frame(panel, ticker)
+        if len(df) > 0:
+            frames[ticker] = df
+    return frames
+
+
+def product_jobs(fn, tickers, **grid):
+    """每只股票 × 参数网格的全部组合: product_jobs(f, tickers, window=[10, 20])"""
+    names = list(grid)
+    return [(fn, ticker, dict(zip(names, values)))
+            for ticker in tickers
+            for values in itertools.product(*(grid[n] for n in names))]
+
+
+def by_ticker(table):
+    """
+    每只股票一个任务时的结果表 -> {ticker: {列: 值}}
+    去掉空值，函数返回 None (如数据不足) 的股票得到空 dict
+    """
+    skip = {'task', 'ticker', 'value'}
+    out = {}
+    for row in table.to_dict('records'):
+        out[row['ticker']] = {k: v for k, v in row.items()
+                              if k not in skip and v is not None and not (isinstance(v, float) and np.isnan(v))}
+    return out
+
+
+def run(jobs, frames, workers=None):
+    """
+    并行执行任务，返回结果表 (按任务顺序)
+    - workers: 进程数，默认 CPU 核数；1 时在当前进程里顺序执行
+    - 出错的任务在 error 列记录原因
+    """
+    global _reader
+    jobs = [(fn, t, params) for fn, t, params in jobs if t in frames]
+    if not jobs:
+        return pd.DataFrame()
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+
+    with SharedFrames(frames) as shared:
+        if workers <= 1:
+            _reader = SharedReader(shared.spec)
+            try:
+                rows = [_run_job(job) for job in jobs]
+            finally:
+                _reader.close()
+                _reader = None
+        else:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(shared.spec,)) as pool:
+                rows = list(pool.map(_run_job, jobs, chunksize=chunksize))
+    return pd.DataFrame(rows)
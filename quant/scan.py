@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+并发扫描 - 全市场选股用
+
+- 线程池并发，限制同时请求数
+- 令牌桶限速，避免被 Yahoo 封
+- 失败自动重试 (指数退避)
+- 定期打印进度
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class TokenBucket:
+    """令牌桶限速: 平均每秒 rate 次，最多突发 capacity 次"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，不够就等"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def with_retry(fn, retries=3, backoff=1.0, limiter=None):
+    """
+    包装 fn: 失败后等待 backoff * 2^k (带随机抖动) 再试，最多重试 retries 次
+    limiter 不为空时每次调用前先取令牌
+    """
+    def wrapped(*args, **kwargs):
+        for attempt in range(retries + 1):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+    return wrapped
+
+
+def print_progress(done, total, failed, elapsed):
+    """默认进度输出"""
+    speed = done / elapsed if elapsed > 0 else 0
+    eta = (total - done) / speed if speed > 0 else 0
+    print(f"进度: {done}/{total} 失败 {failed} ({speed:.1f}只/秒, 预计剩余 {eta:.0f}秒)")
+
+
+def scan(items, task, workers=16, rate=None, retries=3, backoff=1.0,
+         progress=print_progress, progress_every=100):
+    """
+    并发执行 task(item)，返回 (结果列表, 失败列表)
+    - 结果按完成顺序排列，task 返回 None 的不计入结果
+    - 重试后仍然失败的 item 放进失败列表
+    - rate: 每秒最多请求次数，None 表示不限速
+    """
+    items = list(items)
+    limiter = TokenBucket(rate) if rate else None
+    run = with_retry(task, retries, backoff, limiter)
+
+    results = []
+    failed = []
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, item): item for item in items}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+                if result is not None:
+                    results.append(result)
+            except Exception:
+                failed.append(futures[future])
+            if progress and (done % progress_every == 0 or done == len(items)):
+                progress(done, len(items), len(failed), time.monotonic() - start)
+    return results, failed
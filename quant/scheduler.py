@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+常驻调度 - 代替 cron + check_dual_thrust.sh / check_yang.sh
+
+cron 每次启动一个新的 Python，重新 import pandas、重新读缓存和状态文件。
+这里一个进程常驻:
+- 策略脚本只 import 一次，启动时先把股票池的日线读进内存
+- 日线缓存和指标状态留在内存里 (quant.data / quant.streaming 的 keep_in_memory)，
+  文件没变就不再读盘；缓存过了 CACHE_TTL 照常增量下载
+- 按 JOBS 的时间表运行，输出追加到 logs/<任务名>_YYYYMMDD.log (同原来的 shell 脚本)
+- 只在周一到周五运行 (节假日不区分)，every 类任务只在交易时段内
+
+用法:
+    python3 -m quant.scheduler                      # 常驻运行
+    python3 -m quant.scheduler --every 10           # 盘中短线监控改为每 10 分钟
+    python3 -m quant.scheduler --once dual_thrust   # 立即运行一次 (调试)
+    python3 -m quant.scheduler --list               # 打印时间表
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime, timedelta
+
+from quant import data, streaming
+from quant.data import ROOT
+
+LOG_DIR = os.path.join(ROOT, 'logs')
+
+# 任务: 脚本、入口函数、股票池 (启动时预读)、时间 (at: 固定时刻 / every: 盘中每 N 分钟)
+JOBS = [
+    {'name': 'dual_thrust', 'script': 'strategies/momentum/dual_thrust_live.py',
+     'func': 'main', 'universe': 'STOCKS', 'at': ['09:00']},
+    {'name': 'yang_yongxing', 'script': 'short-term/yang_yongxing_enhanced.py',
+     'func': 'main', 'universe': 'STOCKS', 'at': ['14:30']},
+    {'name': 'short_signal', 'script': 'short-term/short_signal.py',
+     'func': 'check_short_term_signals', 'universe': 'WATCH_LIST', 'every': 5},
+]
+
+# A股交易时段
+SESSIONS = [('09:30', '11:30'), ('13:00', '15:00')]
+
+# 空闲时最长睡多久 (秒)，系统时间调整后也能及时醒来
+MAX_SLEEP = 60
+
+
+def _at(day, hhmm):
+    hour, minute = map(int, hhmm.split(':'))
+    return datetime(day.year, day.month, day.day, hour, minute)
+
+
+def run_times(job, day):
+    """某天该任务的全部运行时刻，周末为空"""
+    if day.weekday() >= 5:
+        return []
+    if 'at' in job:
+        return sorted(_at(day, t) for t in job['at'])
+    times = []
+    for start, end in SESSIONS:
+        t, end = _at(day, start), _at(day, end)
+        while t <= end:
+            times.append(t)
+            t += timedelta(minutes=job['every'])
+    return times
+
+
+def next_run(job, now):
+    """now 及之后的下一次运行时刻"""
+    for k in range(8):
+        for t in run_times(job, now.date() + timedelta(days=k)):
+            if t >= now:
+                return t
+    return None
+
+
+class Scheduler:
+    """按时间表在同一个进程里运行各任务"""
+
+    def __init__(self, jobs=JOBS, log_dir=LOG_DIR):
+        self.jobs = {job['name']: job for job in jobs}
+        self.log_dir = log_dir
+        self.modules = {}
+        data.keep_in_memory()
+        streaming.keep_in_memory()
+
+    def module(self, job):
+        """脚本只 import 一次"""
+        if job['name'] not in self.modules:
+            path = os.path.join(ROOT, job['script'])
+            spec = importlib.util.spec_from_file_location(f"jobs.{job['name']}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.modules[job['name']] = module
+        return self.modules[job['name']]
+
+    def warm(self):
+        """导入全部脚本，股票池日线读进内存"""
+        for job in self.jobs.values():
+            started = time.perf_counter()
+            module = self.module(job)
+            if job.get('universe'):
+                data.get_panel(getattr(module, job['universe']), '3mo')
+            print(f"预热 {job['name']}: {(time.perf_counter() - started)*1000:.0f}ms")
+
+    def run(self, name):
+        """运行一次任务，输出追加到当天的日志，返回用时 (秒)"""
+        job = self.jobs[name]
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, f"{name}_{datetime.now().strftime('%Y%m%d')}.log")
+        started = time.perf_counter()
+        ok = True
+        with open(path, 'a') as f, redirect_stdout(f), redirect_stderr(f):
+            try:
+                getattr(self.module(job), job['func'])()
+            except Exception:
+                traceback.print_exc()
+                ok = False
+                # 任务中途失败，内存里的状态可能只更新了一半，下次从文件重新读
+                streaming.keep_in_memory()
+            elapsed = time.perf_counter() - started
+            print(f"--- {name} {'完成' if ok else '失败'} {datetime.now():%Y-%m-%d %H:%M:%S} "
+                  f"用时 {elapsed*1000:.0f}ms ---")
+        data.fetch_status.save()
+        print(f"{datetime.now():%H:%M:%S} {name} {'完成' if ok else '失败'} "
+              f"{elapsed*1000:.0f}ms -> {os.path.relpath(path, ROOT)}")
+        return elapsed
+
+    def loop(self):
+        """常驻运行，到点执行"""
+        upcoming = {name: next_run(job, datetime.now()) for name, job in self.jobs.items()}
+        while True:
+            name = min(upcoming, key=upcoming.get)
+            wait = (upcoming[name] - datetime.now()).total_seconds()
+            if wait > 0:
+                time.sleep(min(wait, MAX_SLEEP))
+                continue
+            self.run(name)
+            upcoming[name] = next_run(self.jobs[name], max(datetime.now(), upcoming[name] + timedelta(seconds=1)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='常驻调度: 按时间表运行监控脚本')
+    parser.add_argument('--every', type=int, default=None, help='盘中任务间隔 (分钟)')
+    parser.add_argument('--jobs', nargs='+', choices=[job['name'] for job in JOBS], help='只运行这些任务')
+    parser.add_argument('--once', nargs='+', choices=[job['name'] for job in JOBS], help='立即运行一次后退出')
+    parser.add_argument('--list', action='store_true', help='打印时间表')
+    args = parser.parse_args(argv)
+
+    jobs = [dict(job) for job in JOBS if not args.jobs or job['name'] in args.jobs]
+    for job in jobs:
+        if args.every and 'every' in job:
+            job['every'] = args.every
+
+    if args.list:
+        now = datetime.now()
+        for job in jobs:
+            when = ', '.join(job['at']) if 'at' in job else f"交易时段每 {job['every']} 分钟"
+            print(f"{job['name']:<14}{when:<20}下次 {next_run(job, now):%m-%d %H:%M}  {job['script']}")
+        return
+
+    scheduler = Scheduler(jobs)
+    if args.once:
+        for name in args.once:
+            scheduler.run(name)
+        return
+
+    print(f"调度启动 {datetime.now():%Y-%m-%d %H:%M}, 日志: {os.path.relpath(LOG_DIR, ROOT)}/")
+    scheduler.warm()
+    try:
+        scheduler.loop()
+    except KeyboardInterrupt:
+        print("调度退出")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+数据源 - 可替换的行情后端
+
+- YahooSource: 日线走 yfinance，A股列表走 akshare (默认)
+- ReplaySource: 从本地目录回放，不需要网络
+    <root>/<ticker>.parquet 或 <ticker>.csv   日线 (和 data/cache 的格式相同)
+    <root>/minute/<ticker>.parquet            可选, 1分钟线
+    <root>/stock_list.csv                     A股列表 (code, name)
+    <root>/snapshot.csv                       全市场快照 (见 SNAPSHOT_COLUMNS)
+    <root>/industries.csv                     可选, 行业分类 (code, industry)
+    <root>/manifest.json                      可选, {"end": "2026-02-25"} 回放的"今天"
+
+切换方式:
+    export QUANT_SOURCE=replay:data/replay     # 或在代码里 set_source(ReplaySource(...))
+
+生成模拟数据 / 录制真实数据:
+    python3 -m quant.sources generate data/replay --n 5000 --days 750 --minutes 60
+    python3 -m quant.sources record data/replay --period 3y
+"""
+
+import argparse
+import json
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+TZ = 'Asia/Shanghai'
+
+# Yahoo 1分钟线只能取最近几天
+MINUTE_DAYS = 7
+
+# 全市场快照的列: 代码、名称、最新价、换手率(%)、总市值(元)、流通市值(元)、流通股本(股)
+SNAPSHOT_COLUMNS = ['code', 'name', 'price', 'turnover', 'market_cap', 'float_cap', 'float_shares']
+
+# 模拟数据用的行业
+SYNTHETIC_INDUSTRIES = ['有色金属', '小金属', '半导体', '通信设备', '消费电子', '银行', '医药商业', '电力行业']
+
+
+class YahooSource:
+    """yfinance + akshare"""
+
+    name = 'yahoo'
+    # 网络数据源，经过 data/cache 缓存
+    cacheable = True
+
+    def now(self):
+        return pd.Timestamp.now()
+
+    def history(self, ticker, start=None, end=None, **kwargs):
+        """单只股票日线"""
+        import yfinance as yf
+
+        if start is None:
+            return yf.Ticker(ticker).history(period='max', **kwargs)
+        return yf.Ticker(ticker).history(start=pd.Timestamp(start).strftime('%Y-%m-%d'),
+                                         end=end, **kwargs)
+
+    def download(self, tickers, start=None):
+        """一次请求批量下载多只股票，返回 {ticker: DataFrame}"""
+        import yfinance as yf
+
+        raw = yf.download(tickers, start=None if start is None else pd.Timestamp(start).strftime('%Y-%m-%d'),
+                          group_by='ticker', actions=True, threads=True, progress=False)
+        if raw is None or len(raw) == 0:
+            return {}
+        if not isinstance(raw.columns, pd.MultiIndex):
+            raw = pd.concat({tickers[0]: raw}, axis=1)
+        frames = {}
+        for ticker in tickers:
+            if ticker in raw.columns.get_level_values(0):
+                df = raw[ticker].dropna(how='all')
+                if len(df) > 0:
+                    frames[ticker] = df
+        return frames
+
+    def minutes(self, ticker, start=None):
+        """1分钟线 (Yahoo 只保留最近 MINUTE_DAYS 天)"""
+        import yfinance as yf
+
+        oldest = self.now() - pd.Timedelta(days=MINUTE_DAYS - 1)
+        if start is None or pd.Timestamp(start).tz_localize(None) < oldest:
+            return yf.Ticker(ticker).history(period=f"{MINUTE_DAYS}d", interval='1m')
+        return yf.Ticker(ticker).history(start=pd.Timestamp(start).strftime('%Y-%m-%d'),
+                                         interval='1m')
+
+    def stock_list(self):
+        """A股代码和名称 (code, name)"""
+        import akshare as ak
+
+        return ak.stock_info_a_code_name()[['code', 'name']]
+
+    def snapshot(self):
+        """全市场实时快照 (东方财富)，一次请求"""
+        import akshare as ak
+
+        df = ak.stock_zh_a_spot_em().rename(columns={
+            '代码': 'code', '名称': 'name', '最新价': 'price', '换手率': 'turnover',
+            '总市值': 'market_cap', '流通市值': 'float_cap',
+        })
+        df['float_shares'] = df['float_cap'] / df['price']
+        return df[SNAPSHOT_COLUMNS]
+
+    def industries(self):
+        """行业分类 (code, industry)，东方财富行业板块，每个板块一次请求"""
+        import akshare as ak
+
+        frames = []
+        for board in ak.stock_board_industry_name_em()['板块名称']:
+            cons = ak.stock_board_industry_cons_em(symbol=board)
+            frames.append(pd.DataFrame({'code': cons['代码'].astype(str), 'industry': board}))
+        if not frames:
+            return pd.DataFrame(columns=['code', 'industry'])
+        return pd.concat(frames, ignore_index=True).drop_duplicates('code')
+
+
+class ReplaySource:
+    """从本地文件回放日线和A股列表"""
+
+    name = 'replay'
+    # 本身就是本地文件，不再写 data/cache
+    cacheable = False
+
+    def __init__(self, root):
+        self.root = root
+        manifest = os.path.join(root, 'manifest.json')
+        self.manifest = {}
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                self.manifest = json.load(f)
+
+    def now(self):
+        """回放的"今天": manifest 里的 end，没有则用当前时间"""
+        if 'end' in self.manifest:
+            return pd.Timestamp(self.manifest['end']) + pd.Timedelta(hours=15)
+        return pd.Timestamp.now()
+
+    def _read(self, ticker, folder=''):
+        path = os.path.join(self.root, folder, f"{ticker}.parquet")
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        path = os.path.join(self.root, folder, f"{ticker}.csv")
+        if os.path.exists(path):
+            df = pd.read_csv(path, index_col=0)
+            df.index = pd.to_datetime(df.index, utc=True).tz_convert(TZ)
+            return df
+        return None
+
+    def history(self, ticker, start=None, end=None, **kwargs):
+        df = self._read(ticker)
+        if df is None:
+            return pd.DataFrame()
+        if start is not None:
+            df = df[df.index >= localize(start, df.index)]
+        if end is not None:
+            df = df[df.index < localize(end, df.index)]
+        return df
+
+    def download(self, tickers, start=None):
+        frames = {}
+        for ticker in tickers:
+            df = self.history(ticker, start)
+            if len(df) > 0:
+                frames[ticker] = df
+        return frames
+
+    def minutes(self, ticker, start=None):
+        df = self._read(ticker, 'minute')
+        if df is None:
+            return pd.DataFrame()
+        if start is not None:
+            df = df[df.index >= localize(start, df.index)]
+        return df
+
+    def stock_list(self):
+        return pd.read_csv(os.path.join(self.root, 'stock_list.csv'), dtype={'code': str})
+
+    def snapshot(self):
+        return pd.read_csv(os.path.join(self.root, 'snapshot.csv'), dtype={'code': str})
+
+    def industries(self):
+        path = os.path.join(self.root, 'industries.csv')
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=['code', 'industry'])
+        return pd.read_csv(path, dtype={'code': str})
+
+
+def localize(ts, index):
+    """让日期和索引的时区一致，便于比较"""
+    ts = pd.Timestamp(ts)
+    tz = getattr(index, 'tz', None)
+    if tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(tz)
+    if tz is None and ts.tzinfo is not None:
+        return ts.tz_localize(None)
+    return ts
+
+
+_source = None
+
+
+def source_from_env():
+    """QUANT_SOURCE=yahoo (默认) 或 replay:<目录>"""
+    spec = os.environ.get('QUANT_SOURCE', 'yahoo')
+    if spec == 'yahoo':
+        return YahooSource()
+    if spec.startswith('replay:'):
+        return ReplaySource(spec[len('replay:'):])
+    raise ValueError(f"未知数据源: {spec}")
+
+
+def get_source():
+    global _source
+    if _source is None:
+        _source = source_from_env()
+    return _source
+
+
+def set_source(source):
+    """替换全局数据源，返回原来的数据源"""
+    global _source
+    old, _source = _source, source
+    return old
+
+
+def synthetic_codes(n):
+    """模拟A股代码: 沪市主板/科创板, 深市主板/创业板 轮流分配"""
+    prefixes = ['600', '000', '300', '601', '002', '688']
+    codes = [f"{prefixes[i % len(prefixes)]}{i // len(prefixes) + 1:03d}" for i in range(n)]
+    return pd.DataFrame({'code': codes, 'name': [f"模拟{c}" for c in codes]})
+
+
+def synthetic_history(ticker, days=750, end='2026-02-25', seed=0):
+    """
+    模拟日线 (几何布朗运动)
+    同一个 ticker + seed 每次生成的数据完全相同
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(ticker.encode())])
+    dates = pd.bdate_range(end=end, periods=days, tz=TZ)
+    drift = rng.normal(0.0003, 0.0005)
+    vol = rng.uniform(0.015, 0.035)
+    close = rng.uniform(5, 100) * np.exp(np.cumsum(rng.normal(drift, vol, days)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, vol / 3, days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, days)))
+    volume = rng.lognormal(np.log(rng.uniform(1e6, 5e7)), 0.4, days).round()
+    return pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+        'Dividends': 0.0, 'Stock Splits': 0.0,
+    }, index=dates.rename('Date'))
+
+
+def session_minutes(day):
+    """A股一天的240根1分钟K线时间: 09:31-11:30, 13:01-15:00 (按收盘时间标记)"""
+    day = pd.Timestamp(day).normalize()
+    morning = pd.date_range(day + pd.Timedelta('09:31:00'), periods=120, freq='min')
+    afternoon = pd.date_range(day + pd.Timedelta('13:01:00'), periods=120, freq='min')
+    return morning.append(afternoon)
+
+
+def synthetic_minutes(ticker, daily, seed=0):
+    """
+    按日线生成模拟1分钟线: 每天从开盘价走到收盘价 (布朗桥)，
+    高于/低于开收盘价的部分分别缩放到当天最高/最低价，成交量按日成交量随机拆分
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(ticker.encode()), 1])
+    days = len(daily)
+    steps = rng.normal(size=(days, 240)).cumsum(axis=1)
+    t = np.arange(1, 241) / 240
+    bridge = steps - t * steps[:, -1:]
+    open_, high, low, close = (daily[c].to_numpy()[:, None] for c in ['Open', 'High', 'Low', 'Close'])
+    path = open_ + (close - open_) * t + bridge * (high - low) / 10
+    path[:, -1] = close[:, 0]
+    top, bottom = np.maximum(open_, close), np.minimum(open_, close)
+    peak = np.maximum(path.max(axis=1, keepdims=True), top)
+    trough = np.minimum(path.min(axis=1, keepdims=True), bottom)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        above = top + (path - top) * (high - top) / (peak - top)
+        below = bottom + (path - bottom) * (bottom - low) / (bottom - trough)
+    path = np.where(path > top, above, np.where(path < bottom, below, path))
+    # 没有越过开收盘价的日子，把最高/最低点直接放到路径上
+    rows = np.arange(days)
+    path[rows, path[:, :-1].argmax(axis=1)] = high[:, 0]
+    path[rows, path[:, :-1].argmin(axis=1)] = low[:, 0]
+    prev = np.concatenate([open_, path[:, :-1]], axis=1)
+    weights = rng.uniform(0.5, 1.5, (days, 240))
+    volume = (daily['Volume'].to_numpy()[:, None] * weights / weights.sum(axis=1, keepdims=True)).round()
+
+    index = pd.DatetimeIndex(np.concatenate([session_minutes(d) for d in daily.index.tz_localize(None)]))
+    if daily.index.tz is not None:
+        index = index.tz_localize(daily.index.tz)
+    return pd.DataFrame({
+        'Open': prev.ravel(),
+        'High': np.maximum(prev, path).ravel(),
+        'Low': np.minimum(prev, path).ravel(),
+        'Close': path.ravel(),
+        'Volume': volume.ravel(),
+    }, index=index.rename('Datetime'))
+
+
+def synthetic_snapshot(codes, last_bars, seed=0):
+    """
+    模拟快照: 流通股本随机生成 (总市值 10-500 亿)，
+    换手率 = 最后一天成交量 / 流通股本
+    """
+    rng = np.random.default_rng(seed)
+    price = np.array([bar['Close'] for bar in last_bars])
+    volume = np.array([bar['Volume'] for bar in last_bars])
+    market_cap = np.exp(rng.uniform(np.log(10e8), np.log(500e8), len(price)))
+    float_cap = market_cap * rng.uniform(0.3, 1.0, len(price))
+    float_shares = float_cap / price
+    return pd.DataFrame({
+        'code': codes['code'].to_numpy(),
+        'name': codes['name'].to_numpy(),
+        'price': price,
+        'turnover': volume / float_shares * 100,
+        'market_cap': market_cap,
+        'float_cap': float_cap,
+        'float_shares': float_shares,
+    })[SNAPSHOT_COLUMNS]
+
+
+def synthetic_industries(codes, seed=0):
+    """模拟行业分类: 随机分到 SYNTHETIC_INDUSTRIES 里"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'code': codes['code'].to_numpy(),
+        'industry': rng.choice(SYNTHETIC_INDUSTRIES, len(codes)),
+    })
+
+
+def generate(root, n=5000, days=750, end='2026-02-25', seed=0, minutes=0):
+    """生成一套模拟回放数据，minutes > 0 时再为最近 minutes 天生成1分钟线"""
+    os.makedirs(root, exist_ok=True)
+    if minutes:
+        os.makedirs(os.path.join(root, 'minute'), exist_ok=True)
+    codes = synthetic_codes(n)
+    codes.to_csv(os.path.join(root, 'stock_list.csv'), index=False)
+    last_bars = []
+    for code in codes['code']:
+        ticker = f"{code}.SS" if code.startswith('6') else f"{code}.SZ"
+        df = synthetic_history(ticker, days, end, seed)
+        df.to_parquet(os.path.join(root, f"{ticker}.parquet"))
+        if minutes:
+            synthetic_minutes(ticker, df.tail(minutes), seed).to_parquet(
+                os.path.join(root, 'minute', f"{ticker}.parquet"))
+        last_bars.append(df.iloc[-1])
+    synthetic_snapshot(codes, last_bars, seed).to_csv(os.path.join(root, 'snapshot.csv'), index=False)
+    synthetic_industries(codes, seed).to_csv(os.path.join(root, 'industries.csv'), index=False)
+    with open(os.path.join(root, 'manifest.json'), 'w') as f:
+        json.dump({'end': pd.Timestamp(end).strftime('%Y-%m-%d'), 'seed': seed, 'synthetic': True}, f)
+
+
+def record(root, tickers=None, period='3y', minutes=False):
+    """把当前数据源的日线和A股列表录制到本地，供以后回放 (minutes: 同时录制1分钟线缓存)"""
+    from quant.data import get_history, get_minutes
+    from quant.symbols import get_a_stock_list
+
+    os.makedirs(root, exist_ok=True)
+    stocks = get_a_stock_list()
+    pd.DataFrame(stocks)[['code', 'name']].to_csv(os.path.join(root, 'stock_list.csv'), index=False)
+    get_source().snapshot().to_csv(os.path.join(root, 'snapshot.csv'), index=False)
+    get_source().industries().to_csv(os.path.join(root, 'industries.csv'), index=False)
+    if tickers is None:
+        tickers = [s['ticker'] for s in stocks]
+    for ticker in tickers:
+        df = get_history(ticker, period)
+        if len(df) > 0:
+            df.to_parquet(os.path.join(root, f"{ticker}.parquet"))
+        if minutes:
+            df = get_minutes(ticker, days=None)
+            if len(df) > 0:
+                os.makedirs(os.path.join(root, 'minute'), exist_ok=True)
+                df.to_parquet(os.path.join(root, 'minute', f"{ticker}.parquet"))
+    with open(os.path.join(root, 'manifest.json'), 'w') as f:
+        json.dump({'end': pd.Timestamp.now().strftime('%Y-%m-%d'), 'synthetic': False}, f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='回放数据: 生成模拟数据 / 录制真实数据')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    gen = sub.add_parser('generate', help='生成模拟数据')
+    gen.add_argument('root')
+    gen.add_argument('--n', type=int, default=5000, help='股票数量')
+    gen.add_argument('--days', type=int, default=750, help='交易日数量')
+    gen.add_argument('--end', default='2026-02-25', help='最后一个交易日')
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('--minutes', type=int, default=0, help='为最近N天生成1分钟线')
+    rec = sub.add_parser('record', help='录制真实数据')
+    rec.add_argument('root')
+    rec.add_argument('--period', default='3y')
+    rec.add_argument('--minutes', action='store_true', help='同时录制1分钟线')
+    rec.add_argument('tickers', nargs='*', help='只录制这些代码 (默认全部A股)')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'generate':
+        generate(args.root, args.n, args.days, args.end, args.seed, args.minutes)
+    else:
+        record(args.root, args.tickers or None, args.period, args.minutes)
+    print(f"回放数据已写入 {args.root}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+流式指标 - 每来一根K线 O(1) 更新
+
+盘中监控不用每次拉3个月数据重算 rolling，只保存指标状态，新K线来了更新一次。
+状态可以存成 JSON，下次启动接着用；常驻进程调用 keep_in_memory() 后，
+状态对象留在内存里，文件没被别的进程改过就不再解析 JSON。
+
+- RollingStats: 滚动均值/标准差 (Welford 增删)
+- RollingMax / RollingMin: 滚动最大/最小值 (单调队列)
+- EMA: 指数移动平均 (默认 adjust=True，和 pandas ewm(span).mean() 一致)
+- WilderRSI: Wilder 平滑 RSI
+- DualThrustRange: Dual Thrust 的 HH/LC 区间和上下轨
+- KalmanHedge: 配对交易的动态对冲比率和价差 z-score (卡尔曼滤波，多个组合一起更新)
+
+update(x) 提交一根已完成的K线；peek(x) 只看"如果下一根是 x"的结果，不改状态
+(盘中用今天还没走完的K线判断信号)。
+"""
+
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+
+class RollingStats:
+    """滚动均值和样本标准差 (ddof=1，同 pandas rolling().std())"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _add(self, x):
+        self.values.append(x)
+        d = x - self.mean
+        self.mean += d / len(self.values)
+        self.m2 += d * (x - self.mean)
+
+    def _remove(self):
+        y = self.values.popleft()
+        n = len(self.values)
+        if n == 0:
+            self.mean = self.m2 = 0.0
+            return
+        d = y - self.mean
+        self.mean -= d / n
+        self.m2 -= d * (y - self.mean)
+
+    def update(self, x):
+        self._add(float(x))
+        if len(self.values) > self.window:
+            self._remove()
+        return self.value
+
+    @property
+    def ready(self):
+        return len(self.values) == self.window
+
+    @property
+    def value(self):
+        return self.mean if self.ready else math.nan
+
+    @property
+    def std(self):
+        if not self.ready or self.window < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.window - 1))
+
+    def peek(self, x):
+        """如果下一根是 x，均值是多少"""
+        n = len(self.values)
+        if n + 1 < self.window:
+            return math.nan
+        total = self.mean * n + x
+        if n + 1 > self.window:
+            total -= self.values[0]
+        return total / self.window
+
+    def to_dict(self):
+        return {'type': 'RollingStats', 'window': self.window, 'values': list(self.values),
+                'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['window'])
+        obj.values = deque(d['values'])
+        obj.mean, obj.m2 = d['mean'], d['m2']
+        return obj
+
+
+class RollingMax:
+    """滚动最大值，单调队列存 (序号, 值)"""
+
+    sign = 1
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.queue = deque()
+
+    def _better(self, a, b):
+        return a * self.sign >= b * self.sign
+
+    def update(self, x):
+        x = float(x)
+        while self.queue and self._better(x, self.queue[-1][1]):
+            self.queue.pop()
+        self.queue.append((self.count, x))
+        self.count += 1
+        while self.queue[0][0] <= self.count - 1 - self.window:
+            self.queue.popleft()
+        return self.value
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+    @property
+    def value(self):
+        return self.queue[0][1] if self.ready else math.nan
+
+    def peek(self, x):
+        """如果下一根是 x，窗口内最大值是多少"""
+        if self.count + 1 < self.window:
+            return math.nan
+        # 下一根进来后最老的一根 (序号 count - window) 会被挤出
+        for i, v in self.queue:
+            if i > self.count - self.window:
+                return v if self._better(v, x) else x
+        return x
+
+    def to_dict(self):
+        return {'type': type(self).__name__, 'window': self.window,
+                'count': self.count, 'queue': [list(e) for e in self.queue]}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['window'])
+        obj.count = d['count']
+        obj.queue = deque(tuple(e) for e in d['queue'])
+        return obj
+
+
+class RollingMin(RollingMax):
+    """滚动最小值"""
+
+    sign = -1
+
+
+class EMA:
+    """
+    指数移动平均，alpha = 2 / (span + 1)
+    adjust=True 时和 pandas ewm(span=span).mean() 相同 (按权重和归一)
+    """
+
+    def __init__(self, span, adjust=True):
+        self.span = span
+        self.adjust = adjust
+        self.alpha = 2 / (span + 1)
+        self.num = 0.0
+        self.den = 0.0
+
+    def _next(self, x):
+        if self.adjust:
+            return x + (1 - self.alpha) * self.num, 1 + (1 - self.alpha) * self.den
+        if self.den == 0:
+            return x, 1.0
+        return self.alpha * x + (1 - self.alpha) * self.num, 1.0
+
+    def update(self, x):
+        self.num, self.den = self._next(float(x))
+        return self.value
+
+    @property
+    def value(self):
+        return self.num / self.den if self.den else math.nan
+
+    def peek(self, x):
+        num, den = self._next(float(x))
+        return num / den
+
+    def to_dict(self):
+        return {'type': 'EMA', 'span': self.span, 'adjust': self.adjust,
+                'num': self.num, 'den': self.den}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['span'], d['adjust'])
+        obj.num, obj.den = d['num'], d['den']
+        return obj
+
+
+class WilderRSI:
+    """Wilder RSI: 前 period 根取简单平均，之后 avg = (avg * (n-1) + x) / n"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def _next(self, x):
+        delta = x - self.prev
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        n = self.period
+        if self.count < n:
+            k = self.count + 1
+            return (self.avg_gain * self.count + gain) / k, (self.avg_loss * self.count + loss) / k
+        return (self.avg_gain * (n - 1) + gain) / n, (self.avg_loss * (n - 1) + loss) / n
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else 50.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    def update(self, x):
+        x = float(x)
+        if self.prev is not None:
+            self.avg_gain, self.avg_loss = self._next(x)
+            self.count += 1
+        self.prev = x
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.period:
+            return math.nan
+        return self._rsi(self.avg_gain, self.avg_loss)
+
+    def peek(self, x):
+        if self.prev is None or self.count + 1 < self.period:
+            return math.nan
+        return self._rsi(*self._next(float(x)))
+
+    def to_dict(self):
+        return {'type': 'WilderRSI', 'period': self.period, 'prev': self.prev, 'count': self.count,
+                'avg_gain': self.avg_gain, 'avg_loss': self.avg_loss}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['period'])
+        obj.prev, obj.count = d['prev'], d['count']
+        obj.avg_gain, obj.avg_loss = d['avg_gain'], d['avg_loss']
+        return obj
+
+
+class DualThrustRange:
+    """
+    Dual Thrust 区间 (同 dual_thrust_live.get_signal)
+    - HH / LC: 最近 n 根已完成K线的最高价 / 最低价
+    - Range = max(HH - 昨收, 昨收 - LC)
+    - 今日上轨 = 昨开 + k1 * Range，下轨 = 昨开 - k2 * Range
+    """
+
+    def __init__(self, n=22, k1=0.5, k2=0.5):
+        self.n = n
+        self.k1 = k1
+        self.k2 = k2
+        self.hh = RollingMax(n)
+        self.lc = RollingMin(n)
+        self.last_open = math.nan
+        self.last_close = math.nan
+
+    def update(self, open_, high, low, close):
+        self.hh.update(high)
+        self.lc.update(low)
+        self.last_open = float(open_)
+        self.last_close = float(close)
+        return self.bands()
+
+    @property
+    def count(self):
+        return self.hh.count
+
+    @property
+    def range(self):
+        hh = self.hh.queue[0][1] if self.hh.queue else math.nan
+        lc = self.lc.queue[0][1] if self.lc.queue else math.nan
+        return max(hh - self.last_close, self.last_close - lc)
+
+    def bands(self):
+        """今日 (上轨, 下轨)"""
+        r = self.range
+        return self.last_open + self.k1 * r, self.last_open - self.k2 * r
+
+    def signal(self, price):
+        """价格相对今日区间: 'BUY' / 'SELL' / '持有'"""
+        upper, lower = self.bands()
+        if price > upper:
+            return "BUY"
+        if price < lower:
+            return "SELL"
+        return "持有"
+
+    def to_dict(self):
+        return {'type': 'DualThrustRange', 'n': self.n, 'k1': self.k1, 'k2': self.k2,
+                'hh': self.hh.to_dict(), 'lc': self.lc.to_dict(),
+                'last_open': self.last_open, 'last_close': self.last_close}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['n'], d['k1'], d['k2'])
+        obj.hh = RollingMax.from_dict(d['hh'])
+        obj.lc = RollingMin.from_dict(d['lc'])
+        obj.last_open, obj.last_close = d['last_open'], d['last_close']
+        return obj
+
+
+class KalmanHedge:
+    """
+    卡尔曼滤波对冲比率: y = alpha + beta * x + e，(alpha, beta) 按随机游走缓慢变化
+    (配对交易里 y / x 用两只股票的对数价格)
+    - delta: 参数漂移速度，越大越快适应新关系 (过程噪声 = delta / (1 - delta))
+    - ve: 观测噪声方差 (默认按对数价格、残差日波动 1% 左右设定)
+    - warmup: 前 warmup 根只更新参数，z-score 为 NaN
+    y / x 为标量或数组 (size 个组合同时更新)，某个组合为 NaN (停牌) 时该组合这根不更新。
+    update 返回 (z, beta): z = 预测误差 / 预测标准差，用的是这根之前的参数，没有未来函数；
+    beta 为更新后的对冲比率。
+    """
+
+    def __init__(self, size=1, delta=1e-6, ve=1e-4, warmup=20):
+        self.delta = delta
+        self.ve = ve
+        self.warmup = warmup
+        self.theta = np.zeros((size, 2))
+        # 初始参数未知，给很大的方差，前几根很快收敛
+        self.cov = np.tile(np.eye(2) * 100.0, (size, 1, 1))
+        self.count = np.zeros(size, dtype=int)
+
+    def _predict(self, y, x):
+        xv = np.stack([np.ones_like(x), x], axis=-1)
+        r = self.cov + self.delta / (1 - self.delta) * np.eye(2)
+        error = y - (xv * self.theta).sum(axis=-1)
+        q = np.einsum('pi,pij,pj->p', xv, r, xv) + self.ve
+        return xv, r, error, q
+
+    def _z(self, error, q, count):
+        return np.where(count >= self.warmup, error / np.sqrt(q), np.nan)
+
+    def update(self, y, x):
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        valid = ~(np.isnan(y) | np.isnan(x))
+        y, x = np.where(valid, y, 0.0), np.where(valid, x, 0.0)
+        xv, r, error, q = self._predict(y, x)
+        z = np.where(valid, self._z(error, q, self.count), np.nan)
+
+        gain = np.einsum('pij,pj->pi', r, xv) / q[:, None]
+        theta = self.theta + gain * error[:, None]
+        cov = r - gain[:, :, None] * np.einsum('pi,pij->pj', xv, r)[:, None, :]
+        self.theta = np.where(valid[:, None], theta, self.theta)
+        self.cov = np.where(valid[:, None, None], cov, self.cov)
+        self.count = self.count + valid
+        return z, self.beta
+
+    @property
+    def beta(self):
+        return self.theta[:, 1]
+
+    @property
+    def alpha(self):
+        return self.theta[:, 0]
+
+    def peek(self, y, x):
+        """如果下一根是 (y, x)，z-score 是多少"""
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        _, _, error, q = self._predict(y, x)
+        return self._z(error, q, self.count + 1)
+
+    def to_dict(self):
+        return {'type': 'KalmanHedge', 'delta': self.delta, 've': self.ve, 'warmup': self.warmup,
+                'theta': self.theta.tolist(), 'cov': self.cov.tolist(), 'count': self.count.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(len(d['theta']), d['delta'], d['ve'], d['warmup'])
+        obj.theta = np.array(d['theta'], dtype=float).reshape(-1, 2)
+        obj.cov = np.array(d['cov'], dtype=float).reshape(-1, 2, 2)
+        obj.count = np.array(d['count'], dtype=int)
+        return obj
+
+
+TYPES = {cls.__name__: cls for cls in
+         [RollingStats, RollingMax, RollingMin, EMA, WilderRSI, DualThrustRange, KalmanHedge]}
+
+
+def to_state(obj):
+    """指标对象 (可嵌套在 dict/list 里) -> 可 JSON 序列化的结构"""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, dict):
+        return {k: to_state(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_state(v) for v in obj]
+    return obj
+
+
+def from_state(state):
+    """to_state 的逆过程"""
+    if isinstance(state, dict):
+        if state.get('type') in TYPES:
+            return TYPES[state['type']].from_dict(state)
+        return {k: from_state(v) for k, v in state.items()}
+    if isinstance(state, list):
+        return [from_state(v) for v in state]
+    return state
+
+
+def pending_bars(entry, df, warmup):
+    """
+    找出某只股票还没喂给状态的K线
+    - entry: 该股票的状态，记录 'last' (最后处理的日期) 和 'last_close'
+    - df: 日线，最后一根视为今天 (可能还没收盘)，不提交
+    返回 (要提交的K线, 是否需要重建状态)
+    日期对不上、或者收盘价变了 (除权后复权价调整)，就用最近 warmup 根重建
+    """
+    done = df.iloc[:-1]
+    if entry and len(done) > 0:
+        dates = list(done.index.strftime('%Y-%m-%d'))
+        if entry.get('last') in dates:
+            pos = dates.index(entry['last'])
+            if done['Close'].iloc[pos] == entry.get('last_close'):
+                return done.iloc[pos + 1:], False
+    return done.tail(warmup), True
+
+
+def mark_done(entry, df):
+    """记录已处理到倒数第二根K线"""
+    if len(df) > 1:
+        entry['last'] = df.index[-2].strftime('%Y-%m-%d')
+        entry['last_close'] = float(df['Close'].iloc[-2])
+
+
+# 进程内状态 {路径: (文件修改时间, 状态对象)}，None 为不启用
+_states = None
+
+
+def keep_in_memory(enabled=True):
+    """启用/关闭进程内状态缓存 (常驻进程用)"""
+    global _states
+    _states = {} if enabled else None
+
+
+def save_state(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(to_state(obj), f)
+    os.replace(tmp, path)
+    if _states is not None:
+        _states[path] = (os.path.getmtime(path), obj)
+
+
+def load_state(path):
+    """读取状态文件，不存在返回空 dict"""
+    if not os.path.exists(path):
+        return {}
+    mtime = os.path.getmtime(path)
+    if _states is not None and path in _states and _states[path][0] == mtime:
+        return _states[path][1]
+    with open(path) as f:
+        state = from_state(json.load(f))
+    if _states is not None:
+        _states[path] = (mtime, state)
+    return state
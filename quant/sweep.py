@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+参数扫描 - 全部参数组合一次广播计算
+
+均线交叉 (同 optimize.backtest_ma): 短均线 > 长均线次日做多，否则次日做空。
+每天的策略收益只有 +r / -r 两种，所以:
+- 总收益: log(1 + 策略收益) 的和 = Σ 做多日 [log(1+r) - log(1-r)] + Σ log(1-r)
+- 夏普: Σ 策略收益 = 2 Σ 做多日 r - Σ r，平方和恒为 Σ r²
+都是 "做多矩阵 @ 向量"，均线由 quant.kernels 一次 cumsum 得到，
+几万个组合不用逐个建 DataFrame。
+
+用法:
+    surface = ma_crossover_surface(close, range(2, 121), range(10, 251))
+    surface['return']    # (短均线 × 长均线) 总收益
+    surface['sharpe']    # 年化夏普
+
+    folds = walk_forward(close, range(2, 121), range(10, 251), train=250, test=20)
+    bands = bollinger_surface(close, range(10, 61), [1.5, 2, 2.5])   # 布林带 窗口 × 倍数
+"""
+
+import numpy as np
+
+from quant.kernels import rolling_means, rolling_moments
+
+# 年化用的交易日数
+TRADING_DAYS = 252
+
+
+def ma_long_mask(close, shorts, longs, chunk=32):
+    """
+    每次 chunk 个短均线，产出 (短均线切片, 做多矩阵)
+    做多矩阵形状 (日期-1, 短均线, 长均线)，第 t 行表示第 t+1 天是否持多
+    (按日期在前排列，取一段日期是连续内存)
+    (均线为 NaN 时不成立，同 np.where(short > long, 1, -1) 记为做空)
+    """
+    shorts = list(shorts)
+    mas = rolling_means(close, shorts + list(longs))
+    long_mas = np.stack([mas[w][:-1] for w in longs], axis=1)
+    for i in range(0, len(shorts), chunk):
+        short_mas = np.stack([mas[w][:-1] for w in shorts[i:i + chunk]], axis=1)
+        yield slice(i, i + chunk), short_mas[:, :, None] > long_mas[:, None, :]
+
+
+def segment_sums(close, shorts, longs, bounds):
+    """
+    按时间段汇总每个组合的做多部分，之后任意几段连起来的统计都是 O(1)
+    - bounds: 严格递增的收益序号边界，从 0 到 len(close) - 1
+      (第 j 个收益是 close[j+1] / close[j] - 1)，第 k 段为 [bounds[k], bounds[k+1])
+    返回 dict，每段一列 (最后一维):
+    - edge: (S, L, K) 做多日 log(1+r) - log(1-r) 之和
+    - long_r: (S, L, K) 做多日 r 之和
+    - down / r / r2 / n: (K,) 全部日子的 log(1-r)、r、r² 之和及天数
+    """
+    close = np.asarray(close, dtype=float)
+    shorts = list(shorts)
+    longs = list(longs)
+    r = close[1:] / close[:-1] - 1
+    up, down = np.log1p(r), np.log1p(-r)
+    starts = np.asarray(bounds)[:-1]
+    weights = np.stack([up - down, r], axis=1)
+
+    # 每段一次矩阵乘法: (2, 段内天数) @ (段内天数, 短 × 长)
+    sums = np.empty((len(shorts), len(longs), len(starts), 2))
+    for rows, mask in ma_long_mask(close, shorts, longs):
+        flat = mask.reshape(len(mask), -1)
+        for k, (a, b) in enumerate(zip(bounds[:-1], bounds[1:])):
+            part = weights[a:b].T @ flat[a:b].astype(float)
+            sums[rows, :, k] = part.reshape(2, *mask.shape[1:]).transpose(1, 2, 0)
+    return {
+        'edge': sums[..., 0],
+        'long_r': sums[..., 1],
+        'down': np.add.reduceat(down, starts),
+        'r': np.add.reduceat(r, starts),
+        'r2': np.add.reduceat(r ** 2, starts),
+        'n': np.diff(bounds).astype(float),
+    }
+
+
+def _prefix(sums):
+    """各项沿时间段做前缀和 (前面补 0)"""
+    return {key: np.concatenate([np.zeros(v.shape[:-1] + (1,)), np.cumsum(v, axis=-1)], axis=-1)
+            for key, v in sums.items()}
+
+
+def _stats(prefix, a, b):
+    """第 a 段到第 b 段 (不含) 的总收益和年化夏普，形状 (S, L)"""
+    part = {key: v[..., b] - v[..., a] for key, v in prefix.items()}
+    m = part['n']
+    log_total = part['edge'] + part['down']
+    mean = (2 * part['long_r'] - part['r']) / m
+    var = (part['r2'] - m * mean ** 2) / (m - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(var > 0, mean / np.sqrt(var) * np.sqrt(TRADING_DAYS), 0.0)
+    return {'return': np.expm1(log_total), 'sharpe': sharpe}
+
+
+def _mask_invalid(stats, shorts, longs):
+    invalid = np.asarray(list(shorts))[:, None] >= np.asarray(list(longs))[None, :]
+    return {key: np.where(invalid, np.nan, v) for key, v in stats.items()}
+
+
+def ma_crossover_surface(close, shorts, longs):
+    """
+    全部 (short, long) 组合的总收益和年化夏普
+    返回 {'return': (S, L), 'sharpe': (S, L)}，short >= long 的组合为 NaN
+    """
+    shorts, longs = list(shorts), list(longs)
+    prefix = _prefix(segment_sums(close, shorts, longs, [0, len(close) - 1]))
+    return _mask_invalid(_stats(prefix, 0, 1), shorts, longs)
+
+
+def walk_forward(close, shorts, longs, train=250, test=20, folds=None, metric='sharpe'):
+    """
+    滚动前推优化: 在前 train 天上选 metric 最高的 (short, long)，用在之后 test 天上
+    均线在全部历史上只算一次 (均线只用过去的数据)，各折只是时间段不同，
+    所以所有折共用一次 segment_sums
+    - folds: 只做最后 folds 折 (默认能放下的全部)
+    返回每折一行的 list[dict]: 训练/测试区间 (收益序号)、选出的参数、样本内外表现
+    """
+    shorts, longs = list(shorts), list(longs)
+    m = len(close) - 1
+    starts = list(range(train, m - test + 1, test))
+    if folds is not None:
+        starts = starts[-folds:]
+    if not starts:
+        return []
+    bounds = sorted({0, m} | {s - train for s in starts} | set(starts) | {s + test for s in starts})
+    prefix = _prefix(segment_sums(close, shorts, longs, bounds))
+    pos = {b: k for k, b in enumerate(bounds)}
+
+    rows = []
+    for s in starts:
+        fit = _mask_invalid(_stats(prefix, pos[s - train], pos[s]), shorts, longs)
+        score = np.where(np.isnan(fit[metric]), -np.inf, fit[metric])
+        i, j = np.unravel_index(np.argmax(score), score.shape)
+        out = _stats(prefix, pos[s], pos[s + test])
+        rows.append({
+            'train_start': s - train,
+            'test_start': s,
+            'test_end': s + test,
+            'short': shorts[i],
+            'long': longs[j],
+            'train_return': fit['return'][i, j],
+            'train_sharpe': fit['sharpe'][i, j],
+            'test_return': out['return'][i, j],
+            'test_sharpe': out['sharpe'][i, j],
+        })
+    return rows
+
+
+def bollinger_surface(close, windows, num_stds):
+    """
+    布林带 (同 bollinger.bollinger_returns(rules=False)) 全部 (window, num_std) 组合
+    信号: 收盘 < 下轨 -> 1，收盘 > 上轨 -> -1，上穿中轨 -> 0 (优先)，其余 0；次日按信号持仓
+    每个窗口的均值/标准差只算一次，num_std 沿新的一维广播
+    返回 {'return': (W, K), 'sharpe': (W, K), 'trades': (W, K)}，trades 为持仓变化次数
+    """
+    close = np.asarray(close, dtype=float)
+    windows = list(windows)
+    num_stds = np.asarray(list(num_stds), dtype=float)
+    moments = rolling_moments(close, windows)
+    ma = np.stack([moments[w][0] for w in windows])[:, None, :]
+    sd = np.stack([moments[w][1] for w in windows])[:, None, :]
+    k = num_stds[None, :, None]
+
+    cross = (close[1:] > ma[..., 1:]) & (close[:-1] < ma[..., :-1])
+    cross = np.concatenate([np.zeros_like(cross[..., :1]), cross], axis=-1)
+    signal = np.where(close < ma - k * sd, 1, np.where(close > ma + k * sd, -1, 0))
+    position = np.where(cross, 0, signal)[..., :-1]
+
+    r = close[1:] / close[:-1] - 1
+    long, short = position == 1, position == -1
+    m = len(r)
+    log_total = long @ np.log1p(r) + short @ np.log1p(-r)
+    mean = (long.astype(float) @ r - short.astype(float) @ r) / m
+    var = ((long | short).astype(float) @ r ** 2 - m * mean ** 2) / (m - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(var > 0, mean / np.sqrt(var) * np.sqrt(TRADING_DAYS), 0.0)
+    trades = (position[..., :1] != 0).sum(axis=-1) + (np.diff(position, axis=-1) != 0).sum(axis=-1)
+    return {'return': np.expm1(log_total), 'sharpe': sharpe, 'trades': trades}
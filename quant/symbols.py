@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+股票代码表 (symbol master)
+
+- 由A股列表一次性向量化生成: 代码、名称、Yahoo 代码、交易所、板块、状态
+- 缓存到 data/cache/_symbols.parquet，每天重建一次
+- 合并下载记录 (quant.data.fetch_status): 最近成功时间、是否在负缓存中
+- 行业分类单独缓存到 data/cache/_industries.parquet (要逐个板块请求，每周重建一次)
+
+交易所后缀:
+    60xxxx / 688xxx / 900xxx(B股)     -> .SS 上交所
+    00xxxx / 30xxxx / 200xxx(B股)     -> .SZ 深交所
+    4xxxxx / 8xxxxx / 920xxx          -> .BJ 北交所 (Yahoo 基本没有数据，靠负缓存跳过)
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from quant.data import CACHE_DIR, fetch_status
+from quant.sources import get_source
+
+SYMBOLS_PATH = os.path.join(CACHE_DIR, '_symbols.parquet')
+INDUSTRIES_PATH = os.path.join(CACHE_DIR, '_industries.parquet')
+
+# 代码表缓存时间 (秒)
+SYMBOLS_TTL = 24 * 3600
+
+# 行业分类缓存时间 (秒)
+INDUSTRIES_TTL = 7 * 24 * 3600
+
+# (代码前缀, 后缀, 交易所, 板块)，长前缀在前
+PREFIX_RULES = [
+    ('688', '.SS', '上交所', '科创板'),
+    ('689', '.SS', '上交所', '科创板'),
+    ('900', '.SS', '上交所', 'B股'),
+    ('60', '.SS', '上交所', '主板'),
+    ('300', '.SZ', '深交所', '创业板'),
+    ('301', '.SZ', '深交所', '创业板'),
+    ('200', '.SZ', '深交所', 'B股'),
+    ('00', '.SZ', '深交所', '主板'),
+    ('920', '.BJ', '北交所', '北交所'),
+    ('4', '.BJ', '北交所', '北交所'),
+    ('8', '.BJ', '北交所', '北交所'),
+]
+
+
+def classify(codes):
+    """
+    向量化判断交易所和板块
+    返回 DataFrame (ticker, suffix, exchange, board)，无法识别的 suffix 为空
+    """
+    codes = pd.Series(codes, dtype=str).str.zfill(6).reset_index(drop=True)
+    conds = [codes.str.startswith(prefix) for prefix, _, _, _ in PREFIX_RULES]
+    suffix = np.select(conds, [r[1] for r in PREFIX_RULES], default='')
+    exchange = np.select(conds, [r[2] for r in PREFIX_RULES], default='')
+    board = np.select(conds, [r[3] for r in PREFIX_RULES], default='')
+    ticker = np.where(suffix != '', codes + suffix, '')
+    return pd.DataFrame({
+        'code': codes,
+        'ticker': ticker,
+        'suffix': suffix,
+        'exchange': exchange,
+        'board': board,
+    })
+
+
+def _write_parquet(df, path):
+    """先写临时文件再替换，并发进程不会读到/写坏半个文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+def build_symbol_master():
+    """从数据源的A股列表生成代码表"""
+    stocks = get_source().stock_list()
+    df = classify(stocks['code'])
+    df['name'] = stocks['name'].astype(str).str.replace(' ', '').to_numpy()
+    df['status'] = np.select(
+        [df['name'].str.contains('退'), df['name'].str.contains('ST')],
+        ['退市', 'ST'],
+        default='正常',
+    )
+    df.loc[df['suffix'] == '', 'status'] = '未知'
+    return df[['code', 'name', 'ticker', 'exchange', 'board', 'status']]
+
+
+def symbol_master(refresh=False):
+    """
+    代码表 (带缓存)，附加下载记录:
+    - last_ok: 最近一次下载成功的时间
+    - blocked: 是否在负缓存中 (查不到数据，暂不请求)
+    """
+    if (not refresh and os.path.exists(SYMBOLS_PATH)
+            and time.time() - os.path.getmtime(SYMBOLS_PATH) < SYMBOLS_TTL):
+        df = pd.read_parquet(SYMBOLS_PATH)
+    else:
+        df = build_symbol_master()
+        if get_source().cacheable:
+            _write_parquet(df, SYMBOLS_PATH)
+
+    status = fetch_status.table()
+    last_ok = status['ok'].reindex(df['ticker']).to_numpy(dtype=float)
+    df['last_ok'] = pd.to_datetime(last_ok, unit='s')
+    df['blocked'] = status['blocked'].reindex(df['ticker']).fillna(False).to_numpy(dtype=bool)
+    return df
+
+
+def get_a_stock_list(include_blocked=False):
+    """
+    可交易的A股列表 [{'code', 'name', 'ticker'}, ...]
+    - 去掉退市/无法识别的代码
+    - 默认去掉负缓存中的代码
+    """
+    print("获取A股列表...")
+    df = symbol_master()
+    mask = ~df['status'].isin(['退市', '未知'])
+    if not include_blocked:
+        mask &= ~df['blocked']
+    return df.loc[mask, ['code', 'name', 'ticker']].to_dict('records')
+
+
+def get_industries(refresh=False):
+    """
+    行业分类 Series: index 为 Yahoo 代码，值为行业名称
+    数据源没有行业数据时返回空 Series
+    """
+    if (not refresh and os.path.exists(INDUSTRIES_PATH)
+            and time.time() - os.path.getmtime(INDUSTRIES_PATH) < INDUSTRIES_TTL):
+        df = pd.read_parquet(INDUSTRIES_PATH)
+    else:
+        df = get_source().industries()
+        if get_source().cacheable and len(df) > 0:
+            _write_parquet(df, INDUSTRIES_PATH)
+    tickers = classify(df['code'])['ticker'].to_numpy()
+    return pd.Series(df['industry'].to_numpy(), index=pd.Index(tickers, name='ticker'),
+                     name='industry')[tickers != '']
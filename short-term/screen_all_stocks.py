@@ -3,106 +3,129 @@
 """
 杨永兴十步法 - 全A股筛选
 扫描所有A股，找出符合十步法的股票
+
+用法:
+    python3 screen_all_stocks.py                # 全市场
+    python3 screen_all_stocks.py --limit 100    # 演示: 前100只
+    python3 screen_all_stocks.py --workers 32 --rate 30
+    python3 screen_all_stocks.py --no-prefilter       # 不按换手率/市值预筛
+    python3 screen_all_stocks.py --panel              # 用 python3 -m quant.panel 生成的面板
 """
 
-import akshare as ak
-import yfinance as yf
+import argparse
+import os
 import pandas as pd
 from datetime import datetime
-import time
 import sys
 
-def get_a_stock_list():
-    """获取A股列表"""
-    print("获取A股列表...")
-    df = ak.stock_info_a_code_name()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from quant.data import get_history
+from quant.fundamentals import get_snapshot, prefilter
+from quant.indicators import cross_section
+from quant.panel import CLOSE, HIGH, VOLUME, load_panel
+from quant.scan import scan
+from quant.sources import get_source
+from quant.symbols import get_a_stock_list
+
+# Yahoo 默认限速 (每秒请求数)；本地回放等其他数据源默认不限速
+YAHOO_RATE = 20
+
+def score_table(table, stocks):
+    """
+    十步法打分 (向量化)
+    - table: quant.indicators.cross_section 的结果
+    - stocks: {ticker: 股票信息}
+    返回分数 >= 3 的股票列表
+    """
+    price = table['Close']
+    ret_20d = table['RET_20D']
+    vol_ratio = table['VOL_RATIO']
     
-    # 转换代码格式
-    stocks = []
-    for _, row in df.iterrows():
-        code = row['code']
-        name = row['name']
-        
-        # 沪市 .SS, 深市 .SZ
-        if code.startswith('6'):
-            ticker = f"{code}.SS"
-        else:
-            ticker = f"{code}.SZ"
-        
-        stocks.append({'code': code, 'name': name, 'ticker': ticker})
+    # (条件, 分数, 信号)
+    rules = [
+        ((ret_20d >= 3) & (ret_20d <= 5), 2, "涨幅3-5%"),   # 涨幅3-5%
+        (ret_20d > 10, 1, "强势"),                          # 强势股
+        (vol_ratio > 1, 2, "放量"),                         # 放量
+        ((table['MA5'] > table['MA10']) & (table['MA10'] > table['MA20']), 3, "多头"),  # 多头
+        (price > table['MA5'], 1, "MA5上"),                 # MA5上方
+        (price >= table['HIGH_20D'], 2, "新高"),            # 20日新高
+    ]
+    score = sum(mask.to_numpy(dtype=int) * points for mask, points, _ in rules)
+    passed = (score >= 3) & (table['BARS'].to_numpy() >= 20)
     
-    return stocks
+    results = []
+    for i in passed.nonzero()[0]:
+        ticker = table.index[i]
+        results.append({
+            'name': stocks[ticker]['name'],
+            'code': stocks[ticker]['code'],
+            'price': price.iloc[i],
+            'ret_20d': ret_20d.iloc[i],
+            'vol_ratio': vol_ratio.iloc[i],
+            'score': int(score[i]),
+            'checks': [label for mask, _, label in rules if mask.iloc[i]],
+        })
+    return results
 
-def check_stock(ticker, name):
-    """检查单只股票"""
-    try:
-        df = yf.Ticker(ticker).history(period='3mo', timeout=10)
-        if df is None or len(df) < 20:
-            return None
-        
-        price = df['Close'].iloc[-1]
-        ma5 = df['Close'].rolling(5).mean().iloc[-1]
-        ma10 = df['Close'].rolling(10).mean().iloc[-1]
-        ma20 = df['Close'].rolling(20).mean().iloc[-1]
-        
-        vol = df['Volume'].iloc[-1]
-        vol_ma = df['Volume'].rolling(20).mean().iloc[-1]
-        
-        ret_20d = (price / df['Close'].iloc[-20] - 1) * 100
-        vol_ratio = vol / vol_ma
-        
-        # 筛选条件
-        score = 0
-        checks = []
-        
-        # 涨幅3-5%
-        if 3 <= ret_20d <= 5:
-            score += 2
-            checks.append("涨幅3-5%")
-        
-        # 强势股
-        if ret_20d > 10:
-            score += 1
-            checks.append("强势")
-        
-        # 放量
-        if vol_ratio > 1:
-            score += 2
-            checks.append("放量")
-        
-        # 多头
-        if ma5 > ma10 > ma20:
-            score += 3
-            checks.append("多头")
-        
-        # MA5上方
-        if price > ma5:
-            score += 1
-            checks.append("MA5上")
-        
-        # 20日新高
-        high_20 = df['High'].rolling(20).max().iloc[-1]
-        if price >= high_20:
-            score += 2
-            checks.append("新高")
-        
-        if score >= 3:
-            return {
-                'name': name,
-                'code': code,
-                'price': price,
-                'ret_20d': ret_20d,
-                'vol_ratio': vol_ratio,
-                'score': score,
-                'checks': checks
-            }
-        
+def fetch_stock(stock, fetch=None):
+    """
+    下载单只股票近3个月日线
+    - fetch(ticker) 可替换数据来源，默认走本地缓存 + Yahoo
+    - 下载失败直接抛异常，由 scan 负责重试
+    """
+    if fetch is None:
+        df = get_history(stock['ticker'], '3mo', timeout=10)
+    else:
+        df = fetch(stock['ticker'])
+    if df is None or len(df) == 0:
         return None
+    return stock['ticker'], df
+
+def load_arrays(stocks, args, fetch=None):
+    """收盘价/最高价/成交量的 (日期 × 股票) 数组"""
+    if args.panel:
+        panel = load_panel()
+        tickers = [s['ticker'] for s in stocks if s['ticker'] in panel]
+        rows = [panel.index(t) for t in tickers]
+        data = panel[rows, -90:]
+        return tickers, data[:, :, CLOSE].T, data[:, :, HIGH].T, data[:, :, VOLUME].T
     
-    except Exception as e:
-        return None
+    frames, failed = scan(
+        stocks,
+        lambda stock: fetch_stock(stock, fetch),
+        workers=args.workers,
+        rate=args.rate or None,
+        retries=args.retries,
+    )
+    if failed:
+        print(f"\n下载失败 {len(failed)} 只: {' '.join(s['code'] for s in failed[:20])}")
+    frames = dict(frames)
+    tickers = list(frames)
+    fields = [pd.DataFrame({t: frames[t][f] for t in tickers}).to_numpy(dtype=float)
+              for f in ['Close', 'High', 'Volume']]
+    return (tickers, *fields)
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='杨永兴十步法 - 全A股筛选')
+    parser.add_argument('--limit', type=int, default=0, help='只筛选前N只 (0=全部)')
+    parser.add_argument('--workers', type=int, default=16, help='并发线程数')
+    parser.add_argument('--rate', type=float, default=None,
+                        help=f'每秒最多请求数 (0=不限速，默认 Yahoo {YAHOO_RATE}、本地回放不限速)')
+    parser.add_argument('--retries', type=int, default=3, help='失败重试次数')
+    parser.add_argument('--turnover', type=float, nargs=2, default=[5, 10], metavar=('MIN', 'MAX'),
+                        help='换手率区间 (%%)')
+    parser.add_argument('--cap', type=float, nargs=2, default=[50, 200], metavar=('MIN', 'MAX'),
+                        help='总市值区间 (亿)')
+    parser.add_argument('--no-prefilter', action='store_true', help='不做换手率/市值预筛选')
+    parser.add_argument('--panel', action='store_true', help='从 data/panel 内存映射面板读取，不下载')
+    args = parser.parse_args(argv)
+    if args.rate is None:
+        args.rate = YAHOO_RATE if get_source().name == 'yahoo' else 0
+    return args
+
+def main(argv=None, fetch=None):
+    args = parse_args(argv)
+    
     print("="*70)
     print(f"杨永兴十步法 - 全A股筛选")
     print(f"开始时间: {datetime.now()}")
@@ -112,24 +135,31 @@ def main():
     stocks = get_a_stock_list()
     print(f"共计 {len(stocks)} 只A股\n")
     
-    # 筛选结果
-    results = []
+    # 十步法 4/5: 换手率5-10%，市值50-200亿 - 用一张快照先筛掉大部分
+    if not args.no_prefilter:
+        candidates = prefilter(get_snapshot(), args.turnover, args.cap)
+        keep = set(candidates['code'])
+        stocks = [s for s in stocks if s['code'] in keep]
+        print(f"预筛选 (换手率 {args.turnover[0]:g}-{args.turnover[1]:g}%, "
+              f"市值 {args.cap[0]:g}-{args.cap[1]:g}亿): 剩余 {len(stocks)} 只\n")
     
-    # 筛选 (演示用，先筛选100只)
-    # 实际使用时可改为全部
-    sample_size = min(100, len(stocks))
-    print(f"演示模式: 筛选前 {sample_size} 只股票...")
-    print("(如需全量筛选，修改代码中的 sample_size)")
+    if args.limit:
+        stocks = stocks[:args.limit]
+    if args.panel:
+        print(f"筛选 {len(stocks)} 只股票 (内存映射面板)...")
+    else:
+        print(f"筛选 {len(stocks)} 只股票 (并发 {args.workers}, 限速 {args.rate or '不限'}/秒)...")
     print()
     
-    for i, stock in enumerate(stocks[:sample_size]):
-        if i % 20 == 0:
-            print(f"进度: {i}/{sample_size}")
-        
-        result = check_stock(stock['ticker'], stock['name'])
-        if result:
-            results.append(result)
-            print(f"  ✓ {result['name']}: {result['score']}分 - {' '.join(result['checks'])}")
+    tickers, close, high, volume = load_arrays(stocks, args, fetch)
+    
+    # 全部股票的指标一次算完
+    by_ticker = {s['ticker']: s for s in stocks}
+    results = []
+    if tickers:
+        results = score_table(cross_section(close, high, volume, tickers), by_ticker)
+    for result in results:
+        print(f"  ✓ {result['name']}: {result['score']}分 - {' '.join(result['checks'])}")
     
     # 排序
     results.sort(key=lambda x: x['score'], reverse=True)
@@ -148,7 +178,8 @@ def main():
     # 保存结果
     if results:
         df = pd.DataFrame(results)
-        df.to_csv(f'~/quant-strategy/logs/yang_screening_{datetime.now().strftime("%Y%m%d")}.csv', index=False)
+        log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs')
+        df.to_csv(os.path.join(log_dir, f'yang_screening_{datetime.now().strftime("%Y%m%d")}.csv'), index=False)
         print(f"\n结果已保存到 logs/")
 
 if __name__ == "__main__":
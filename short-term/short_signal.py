@@ -7,10 +7,14 @@
 - 板块轮动
 """
 
-import yfinance as yf
+import os
+import sys
 import pandas as pd
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from quant.data import get_panel, ticker_frame
+
 # 观察名单
 WATCH_LIST = {
     '比亚迪': '002594.SZ',
@@ -28,10 +32,12 @@ def check_short_term_signals():
     
     signals = []
     
+    # 获取近期数据，一次批量下载
+    panel = get_panel(WATCH_LIST, '5d')
+    
     for name, ticker in WATCH_LIST.items():
         try:
-            # 获取近期数据
-            df = yf.Ticker(ticker).history(period='5d')
+            df = ticker_frame(panel, ticker)
             if len(df) < 2:
                 continue
             
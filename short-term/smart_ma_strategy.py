@@ -2,9 +2,22 @@
 # -*- coding: utf-8 -*-
 """
 智能均线策略 - 双均线 + 成交量 + 止损
+
+用法:
+    python3 smart_ma_strategy.py                  # 按A股规则: 涨停买不进、跌停/停牌卖不出
+    python3 smart_ma_strategy.py --ignore-rules   # 不考虑涨跌停/停牌 (收盘价总能成交)
 """
 
-import yfinance as yf
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from quant.data import get_history
+from quant.positions import simulate
+from quant.rules import limit_rates, tradable
 
 STOCKS = {
     '紫金矿业': '601899.SS',
@@ -14,64 +27,59 @@ STOCKS = {
     '剑桥科技': '603083.SS',
 }
 
-def backtest(ticker):
-    """双均线策略"""
-    df = yf.download(ticker, start='2023-01-01', progress=False)
-    if len(df) < 60:
-        return None
-    
-    # 计算指标
+def signals(df):
+    """
+    MA5/MA20 交叉信号: 1 放量金叉买入，-1 死叉卖出，0 无操作
+    """
     ma5 = df['Close'].rolling(5).mean()
     ma20 = df['Close'].rolling(20).mean()
     vol_ma = df['Volume'].rolling(20).mean()
     
-    # 信号
-    sig = [0] * len(df)
-    for i in range(1, len(df)):
-        if ma5.iloc[i-1] <= ma20.iloc[i-1] and ma5.iloc[i] > ma20.iloc[i]:
-            if df['Volume'].iloc[i] > vol_ma.iloc[i] * 1.5:
-                sig[i] = 1  # 买入
-        elif ma5.iloc[i-1] >= ma20.iloc[i-1] and ma5.iloc[i] < ma20.iloc[i]:
-            sig[i] = -1  # 卖出
-    
-    # 回测
-    cash = 100000
-    pos = 0
-    shares = 0
+    golden = (ma5.shift(1) <= ma20.shift(1)) & (ma5 > ma20)
+    dead = (ma5.shift(1) >= ma20.shift(1)) & (ma5 < ma20)
+    volume_ok = df['Volume'] > vol_ma * 1.5
+    return np.where(golden, np.where(volume_ok, 1, 0), np.where(dead, -1, 0))
+
+def backtest(ticker, rules=True):
+    """双均线策略 (rules: 按A股涨跌停/停牌限制成交)"""
+    df = get_history(ticker, start='2023-01-01')
+    if len(df) < 60:
+        return None
     
-    for i in range(60, len(df)):
-        if sig[i] == 1 and pos == 0:
-            shares = cash / df['Close'].iloc[i]
-            pos = 1
-        elif sig[i] == -1 and pos == 1:
-            cash = shares * df['Close'].iloc[i]
-            pos = 0
-        
-        # 止损5%
-        if pos == 1:
-            cost = cash / shares
-            if (df['Close'].iloc[i] - cost) / cost < -0.05:
-                cash = shares * df['Close'].iloc[i]
-                pos = 0
+    sig = signals(df)
     
-    if pos == 1:
-        cash = shares * df['Close'].iloc[-1]
+    # 回测: 前60根只算指标，止损5%；rules 时涨停买不进、跌停/停牌卖不出
+    buyable = sellable = None
+    if rules:
+        buyable, sellable = tradable(df['Close'], df['Volume'], limit_rates([ticker])[0])
+    result = simulate(df['Close'].to_numpy(), sig == 1, sig == -1,
+                      start=60, stop_loss=0.05, capital=100000,
+                      buyable=buyable, sellable=sellable)
+    cash = result['equity'][-1]
     
     return (cash - 100000) / 100000 * 100
 
-print("="*60)
-print("智能均线策略 (MA5/MA20 + 量能 + 5%止损)")
-print("="*60)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='智能均线策略回测')
+    parser.add_argument('--ignore-rules', action='store_true', help='忽略A股交易规则 (涨跌停/停牌)')
+    args = parser.parse_args(argv)
+
+    print("="*60)
+    print("智能均线策略 (MA5/MA20 + 量能 + 5%止损)")
+    print("="*60)
+
+    for name, ticker in STOCKS.items():
+        ret = backtest(ticker, not args.ignore_rules)
+        if ret:
+            print(f"{name}: {ret:+.1f}%")
 
-for name, ticker in STOCKS.items():
-    ret = backtest(ticker)
-    if ret:
-        print(f"{name}: {ret:+.1f}%")
+    # 买入持有对比
+    print("\n买入持有对比:")
+    for name, ticker in STOCKS.items():
+        df = get_history(ticker, start='2023-01-01')
+        if len(df) > 60:
+            bh = (df['Close'].iloc[-1] / df['Close'].iloc[60] - 1) * 100
+            print(f"{name}: {bh:+.1f}%")
 
-# 买入持有对比
-print("\n买入持有对比:")
-for name, ticker in STOCKS.items():
-    df = yf.download(ticker, start='2023-01-01', progress=False)
-    if len(df) > 60:
-        bh = (df['Close'].iloc[-1] / df['Close'].iloc[60] - 1) * 100
-        print(f"{name}: {bh:+.1f}%")
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,16 @@
 5. 新高突破 - 创20日/60日新高
 """
 
-import yfinance as yf
+import os
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from quant.data import get_panel, ticker_frame
+from quant.indicators import compute
+
 # 扩大观察名单
 WATCH_LIST = {
     # 有色金属
@@ -35,31 +40,18 @@ WATCH_LIST = {
 }
 
 def calculate_indicators(df):
-    """计算技术指标"""
-    # 均线
-    df['MA5'] = df['Close'].rolling(5).mean()
-    df['MA10'] = df['Close'].rolling(10).mean()
-    df['MA20'] = df['Close'].rolling(20).mean()
-    df['MA60'] = df['Close'].rolling(60).mean()
-    
-    # 量比
-    df['VOL_MA20'] = df['Volume'].rolling(20).mean()
-    df['VOL_RATIO'] = df['Volume'] / df['VOL_MA20']
-    
-    #VOL_MA20 涨跌幅
-    df['RET_5D'] = df['Close'].pct_change(5) * 100
-    df['RET_20D'] = df['Close'].pct_change(20) * 100
-    
-    # 20日/60日新高
-    df['HIGH_20D'] = df['High'].rolling(20).max()
-    df['HIGH_60D'] = df['High'].rolling(60).max()
-    
+    """
+    计算技术指标: 均线、量比、涨跌幅、20日/60日新高
+    (和全市场筛选共用 quant.indicators，所有窗口一次扫描算完)
+    """
+    ind = compute(df['Close'], df['High'], df['Volume'])
+    for name, values in ind.items():
+        df[name] = values
     return df
 
-def check_signals(name, ticker):
+def check_signals(name, ticker, df):
     """检查信号"""
     try:
-        df = yf.Ticker(ticker).history(period='3mo')
         if len(df) < 60:
             return None
         
@@ -119,10 +111,11 @@ def main():
     print(f"杨永兴战法 增强版 - {datetime.now().strftime('%Y-%m-%d')}")
     print("="*70)
     
+    panel = get_panel(WATCH_LIST, '3mo')
     results = []
     
     for name, ticker in WATCH_LIST.items():
-        result = check_signals(name, ticker)
+        result = check_signals(name, ticker, ticker_frame(panel, ticker))
         if result:
             results.append(result)
     
@@ -5,10 +5,16 @@
 加入更多股票池和实时监控
 """
 
-import yfinance as yf
+import os
+import sys
 import pandas as pd
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from quant.data import ROOT, get_history, get_panel, ticker_frame
+from quant.streaming import (RollingMax, RollingStats, load_state, mark_done,
+                             pending_bars, save_state)
+
 # 扩大股票池
 STOCKS = {
     # 有色金属 (你的持仓)
@@ -18,7 +24,7 @@ STOCKS = {
     # 科技
     '英维克': '002837.SZ',
     '剑桥科技': '603083.SS',
-    '中际旭创': '308308.SZ',
+    '中际旭创': '300308.SZ',
     '新易盛': '300502.SZ',
     # 新能源
     '比亚迪': '002594.SZ',
@@ -29,22 +35,54 @@ STOCKS = {
     '五粮液': '000858.SZ',
 }
 
-def check_stock(name, ticker):
-    """检查是否符合十步法"""
+# 各股票均线/量能/新高状态，下次运行只处理新K线
+STATE_PATH = os.path.join(ROOT, 'data', 'state', 'yang_yongxing.json')
+
+def update_state(state, ticker, df):
+    """把新完成的K线喂给该股票的指标状态 (每根 O(1))"""
+    entry = state.get(ticker)
+    bars, rebuild = pending_bars(entry, df, 20)
+    if rebuild:
+        entry = state[ticker] = {
+            'ma5': RollingStats(5),
+            'ma10': RollingStats(10),
+            'ma20': RollingStats(20),
+            'vol20': RollingStats(20),
+            'high20': RollingMax(20),
+            'closes': [],   # 最近19根收盘价，算20日涨幅
+        }
+    for bar in bars.itertuples():
+        entry['ma5'].update(bar.Close)
+        entry['ma10'].update(bar.Close)
+        entry['ma20'].update(bar.Close)
+        entry['vol20'].update(bar.Volume)
+        entry['high20'].update(bar.High)
+        entry['closes'] = (entry['closes'] + [float(bar.Close)])[-19:]
+    mark_done(entry, df)
+    return entry
+
+def check_stock(name, df, state=None):
+    """
+    检查是否符合十步法
+    - state: 各股票的指标状态，传入时只处理新K线，今天的K线用 peek 试算
+    """
     try:
-        df = yf.Ticker(ticker).history(period='3mo')
         if len(df) < 20:
             return None
         
-        price = df['Close'].iloc[-1]
-        ma5 = df['Close'].rolling(5).mean().iloc[-1]
-        ma10 = df['Close'].rolling(10).mean().iloc[-1]
-        ma20 = df['Close'].rolling(20).mean().iloc[-1]
+        state = {} if state is None else state
+        entry = update_state(state, df.attrs.get('ticker', name), df)
+        today = df.iloc[-1]
+        
+        price = today['Close']
+        ma5 = entry['ma5'].peek(price)
+        ma10 = entry['ma10'].peek(price)
+        ma20 = entry['ma20'].peek(price)
         
-        vol = df['Volume'].iloc[-1]
-        vol_ma = df['Volume'].rolling(20).mean().iloc[-1]
+        vol = today['Volume']
+        vol_ma = entry['vol20'].peek(vol)
         
-        ret_20d = (price / df['Close'].iloc[-20] - 1) * 100
+        ret_20d = (price / entry['closes'][0] - 1) * 100
         vol_ratio = vol / vol_ma
         
         # 检查条件
@@ -74,7 +112,7 @@ def check_stock(name, ticker):
             score += 1
         
         # 20日新高
-        high_20 = df['High'].rolling(20).max().iloc[-1]
+        high_20 = entry['high20'].peek(today['High'])
         if price >= high_20:
             checks.append("新高")
             score += 2
@@ -95,13 +133,13 @@ def market_index():
     print("\n【大盘趋势】")
     
     # 创业板
-    cyb = yf.Ticker('159915.SZ').history(period='1mo')
+    cyb = get_history('159915.SZ', '1mo')
     if len(cyb) > 0:
         cyb_ret = (cyb['Close'].iloc[-1] / cyb['Close'].iloc[0] - 1) * 100
         print(f"  创业板: {cyb_ret:+.1f}%")
     
     # 沪深300
-    hs300 = yf.Ticker('510300.SS').history(period='1mo')
+    hs300 = get_history('510300.SS', '1mo')
     if len(hs300) > 0:
         hs_ret = (hs300['Close'].iloc[-1] / hs300['Close'].iloc[0] - 1) * 100
         print(f"  沪深300: {hs_ret:+.1f}%")
@@ -122,11 +160,15 @@ def main():
     trend = market_index()
     print(f"  → 大盘状态: {trend}")
     
+    panel = get_panel(STOCKS, '3mo')
+    
+    state = load_state(STATE_PATH)
     results = []
     for name, ticker in STOCKS.items():
-        r = check_stock(name, ticker)
+        r = check_stock(name, ticker_frame(panel, ticker), state)
         if r:
             results.append(r)
+    save_state(STATE_PATH, state)
     
     # 排序
     results.sort(key=lambda x: x['score'], reverse=True)
@@ -7,12 +7,27 @@
 1. 配对交易 - 两只相关股票做价差
 2. 跨市场套利 - A股vs港股
 3. 统计套利 - 均值回归
+
+用法:
+    python3 pair_trading.py                         # 回测 PAIRS
+    python3 pair_trading.py --discover              # 有色/科技行业内找配对
+    python3 pair_trading.py --discover --industry 银行 --min-corr 0.85 --level 0.01 --save
+    python3 pair_trading.py --monitor               # PAIRS 今日卡尔曼价差信号 (状态存 data/state/pairs.json)
 """
 
-import yfinance as yf
+import argparse
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import ROOT, get_history, get_panel
+from quant.pairs import EG_CRITICAL, EXIT, discover, kalman_backtest, signals
+from quant.streaming import KalmanHedge, load_state, mark_done, pending_bars, save_state
+from quant.symbols import get_industries, symbol_master
+
 # 尝试找配对 - 有色金属相关
 # 紫金矿业 vs 铜陵有色 (都是有色金属)
 # 兴业银锡 vs 铜陵有色 (都产铜/锡)
@@ -21,10 +36,17 @@ PAIRS = [
     ('紫金矿业', '601899.SS', '铜陵有色', '000630.SZ'),
 ]
 
+# 卡尔曼对冲比率状态，下次运行只处理新K线；状态丢失时用最近 WARMUP 根重建
+STATE_PATH = os.path.join(ROOT, 'data', 'state', 'pairs.json')
+WARMUP = 250
+
+# 配对发现默认扫描的行业 (行业名称包含这些关键词)
+DISCOVER_INDUSTRIES = ['有色', '金属', '半导体', '通信', '电子', '计算机', '软件']
+
 def download_data(ticker1, ticker2, period='3y'):
     """下载两只股票数据"""
-    s1 = yf.Ticker(ticker1).history(period=period)
-    s2 = yf.Ticker(ticker2).history(period=period)
+    s1 = get_history(ticker1, period)
+    s2 = get_history(ticker2, period)
     return s1, s2
 
 def pair_trading(s1, s2, window=60):
@@ -81,12 +103,140 @@ def backtest_pair(name1, ticker1, name2, ticker2):
     # 策略收益
     strategy_ret = (1 + df['Pair_Returns'].dropna()).cumprod().iloc[-1] - 1
     
+    # 卡尔曼动态对冲比率版本
+    closes = df[['s1', 's2']].to_numpy()
+    kalman = kalman_backtest(closes[:, :1], closes[:, 1:])
+    
     print(f"持有基准: {market_ret*100:.2f}%")
     print(f"配对策略: {strategy_ret*100:.2f}% ({strategy_ret - market_ret:+.2f}%)")
+    print(f"卡尔曼对冲: {kalman['return'][0]*100:.2f}% (夏普 {kalman['sharpe'][0]:.2f}, 交易 {kalman['trades'][0]} 次)")
     
     return df
 
-def main():
+def pair_signal(name1, name2, z):
+    """今日 z-score 对应的操作 (阈值同 quant.pairs.signals)"""
+    signal = signals(np.array([z]))[0]
+    if signal == 1:
+        return f"买{name1} 卖{name2}"
+    if signal == -1:
+        return f"卖{name1} 买{name2}"
+    if abs(z) < EXIT:
+        return "平仓"
+    return "持有"
+
+def run_monitor():
+    print("="*60)
+    print(f"配对监控 (卡尔曼对冲比率) - {time.strftime('%Y-%m-%d %H:%M')}")
+    print("="*60)
+    
+    tickers = sorted({t for _, t1, _, t2 in PAIRS for t in (t1, t2)})
+    panel = get_panel(tickers, '2y')
+    # 退市 / 负缓存的代码不在面板里
+    available = set(panel.columns.get_level_values(0)) if len(panel) else set()
+    state = load_state(STATE_PATH)
+    for name1, ticker1, name2, ticker2 in PAIRS:
+        key = f"{ticker1}/{ticker2}"
+        if ticker1 not in available or ticker2 not in available:
+            print(f"{name1} vs {name2}: 数据不足")
+            continue
+        df = pd.DataFrame({
+            'Close': panel[ticker1]['Close'],
+            'Close2': panel[ticker2]['Close'],
+        }).dropna()
+        if len(df) < 2:
+            print(f"{name1} vs {name2}: 数据不足")
+            continue
+        
+        # 新完成的K线逐根更新，今天这根只 peek
+        entry = state.get(key)
+        bars, rebuild = pending_bars(entry, df, WARMUP)
+        if rebuild:
+            entry = state[key] = {'filter': KalmanHedge()}
+        hedge = entry['filter']
+        for bar in bars.itertuples():
+            hedge.update(np.log(bar.Close), np.log(bar.Close2))
+        mark_done(entry, df)
+        
+        z = hedge.peek(np.log(df['Close'].iloc[-1]), np.log(df['Close2'].iloc[-1]))[0]
+        print(f"{name1} vs {name2}: {pair_signal(name1, name2, z)} "
+              f"(z={z:.2f} 对冲比={hedge.beta[0]:.2f})")
+    save_state(STATE_PATH, state)
+
+def discover_universe(keywords, tickers=None):
+    """配对发现的股票池和行业: 给了 tickers 就用 tickers，否则取行业名包含关键词的股票"""
+    industries = get_industries()
+    if tickers:
+        return list(tickers), industries.reindex(list(tickers))
+    pattern = '|'.join(keywords)
+    industries = industries[industries.str.contains(pattern)]
+    return list(industries.index), industries
+
+def run_discover(keywords, tickers=None, period='3y', min_corr=0.8, level=0.05,
+                 any_sector=False, top=20, save=False):
+    print("="*60)
+    print("配对发现")
+    print("="*60)
+    
+    universe, industries = discover_universe(keywords, tickers)
+    if not universe:
+        print("股票池为空 (数据源没有行业数据时用 --tickers 指定)")
+        return
+    by_sector = not any_sector and industries.notna().any()
+    
+    started = time.time()
+    closes = get_panel(universe, period).xs('Close', axis=1, level=1)
+    loaded = time.time() - started
+    table = discover(closes, industries if by_sector else None, min_corr, level)
+    elapsed = time.time() - started - loaded
+    
+    info = table.attrs
+    print(f"股票池: {len(universe)} 只, 完整历史 {info['stocks']} 只 (下载 {loaded:.1f}s)")
+    print(f"两两组合 {info['pairs']} -> 相关系数>={min_corr}"
+          f"{' 且同行业' if by_sector else ''} {info['candidates']} "
+          f"-> 协整 (ADF<={EG_CRITICAL[level] if level else '不限'}) {len(table)}, 用时 {elapsed:.2f}s")
+    if len(table) == 0:
+        return
+    
+    master = symbol_master()
+    names = master[master['ticker'] != ''].drop_duplicates('ticker').set_index('ticker')['name']
+    print()
+    for row in table.head(top).to_dict('records'):
+        name1, name2 = names.get(row['s1'], row['s1']), names.get(row['s2'], row['s2'])
+        group = f" [{row['group']}]" if isinstance(row['group'], str) else ''
+        print(f"{name1} vs {name2}{group}: 相关 {row['corr']:.2f} 对冲比 {row['beta']:.2f} "
+              f"ADF {row['adf']:.2f} | z-score 策略 {row['return']*100:+.1f}% "
+              f"夏普 {row['sharpe']:.2f} 交易 {row['trades']} 次 | 卡尔曼 {row['kalman_return']*100:+.1f}%")
+    
+    if save:
+        log_dir = os.path.join(ROOT, 'logs')
+        os.makedirs(log_dir, exist_ok=True)
+        path = os.path.join(log_dir, f"pairs_{time.strftime('%Y%m%d')}.csv")
+        table.assign(name1=table['s1'].map(names), name2=table['s2'].map(names)).to_csv(path, index=False)
+        print(f"\n结果已保存: {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='配对交易')
+    parser.add_argument('--discover', action='store_true', help='在股票池里批量寻找配对')
+    parser.add_argument('--monitor', action='store_true', help='PAIRS 今日卡尔曼价差信号')
+    parser.add_argument('--industry', nargs='+', default=DISCOVER_INDUSTRIES, help='行业关键词')
+    parser.add_argument('--tickers', nargs='+', help='直接指定股票池 (代替 --industry)')
+    parser.add_argument('--period', default='3y', help='历史长度')
+    parser.add_argument('--min-corr', type=float, default=0.8, help='对数收益相关系数下限')
+    parser.add_argument('--level', type=float, choices=sorted(EG_CRITICAL), default=0.05,
+                        help='协整显著性水平')
+    parser.add_argument('--any-sector', action='store_true', help='不要求同行业')
+    parser.add_argument('--top', type=int, default=20, help='显示前几对')
+    parser.add_argument('--save', action='store_true', help='结果保存到 logs/')
+    args = parser.parse_args(argv)
+    
+    if args.discover:
+        run_discover(args.industry, args.tickers, args.period, args.min_corr, args.level,
+                     args.any_sector, args.top, args.save)
+        return
+    if args.monitor:
+        run_monitor()
+        return
+    
     print("="*60)
     print("配对交易策略回测")
     print("="*60)
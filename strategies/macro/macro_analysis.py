@@ -8,10 +8,14 @@
 - CPI/PPI 通胀
 """
 
-import yfinance as yf
+import os
+import sys
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import get_history
+
 def get_macro_data():
     """获取宏观数据"""
     print("="*60)
@@ -19,22 +23,22 @@ def get_macro_data():
     print("="*60)
     
     # 美国利率预期 (TLT = 20年国债)
-    tlt = yf.Ticker('TLT').history(period='1y')['Close']
+    tlt = get_history('TLT', '1y')['Close']
     
     # 标普500 (市场)
-    spy = yf.Ticker('SPY').history(period='1y')['Close']
+    spy = get_history('SPY', '1y')['Close']
     
     # 黄金 (避险)
-    gld = yf.Ticker('GLD').history(period='1y')['Close']
+    gld = get_history('GLD', '1y')['Close']
     
     # 铜 (经济周期)
-    copper = yf.Ticker('CPER').history(period='1y')['Close']
+    copper = get_history('CPER', '1y')['Close']
     
     # 恐慌指数 (VIX)
-    vix = yf.Ticker('^VIX').history(period='1y')['Close']
+    vix = get_history('^VIX', '1y')['Close']
     
     # 美元指数
-    dxy = yf.Ticker('DXY').history(period='1y')['Close']
+    dxy = get_history('DXY', '1y')['Close']
     
     return {
         'TLT (国债)': tlt,
@@ -75,12 +79,12 @@ def market_correlation():
     }
     
     # 宏观
-    spy = yf.Ticker('SPY').history(period='1y')['Close']
-    gld = yf.Ticker('GLD').history(period='1y')['Close']
-    tlt = yf.Ticker('TLT').history(period='1y')['Close']
+    spy = get_history('SPY', '1y')['Close']
+    gld = get_history('GLD', '1y')['Close']
+    tlt = get_history('TLT', '1y')['Close']
     
     for name, ticker in stocks.items():
-        stock = yf.Ticker(ticker).history(period='1y')['Close']
+        stock = get_history(ticker, '1y')['Close']
         
         # 对齐数据
         combined = pd.DataFrame({'stock': stock, 'spy': spy, 'gld': gld, 'tlt': tlt}).dropna()
@@ -110,12 +114,15 @@ def sector_rotation():
     }
     
     for name, ticker in sectors.items():
-        df = yf.Ticker(ticker).history(period='6mo')
+        df = get_history(ticker, '6mo')
         if len(df) > 0:
             ret = (df['Close'].iloc[-1] / df['Close'].iloc[0] - 1) * 100
             print(f"{name:<20}: {ret:+.1f}%")
 
-if __name__ == "__main__":
+def main():
     analyze_macro()
     market_correlation()
     sector_rotation()
+
+if __name__ == "__main__":
+    main()
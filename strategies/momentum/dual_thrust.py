@@ -9,10 +9,16 @@ Dual Thrust 策略
 - 跌破下轨卖出
 """
 
-import yfinance as yf
+import os
+import sys
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import get_history
+from quant.kernels import rolling_max, rolling_min
+from quant.positions import latch
+
 STOCKS = {
     '紫金矿业': '601899.SS',
     '英维克': '002837.SZ',
@@ -24,9 +30,10 @@ def dual_thrust(df, k1=0.5, k2=0.5):
     
     # 过去N天最高/最低价
     n = 20
-    df['HH'] = df['High'].rolling(n).max()  # 最高价
-    df['LC'] = df['Low'].rolling(n).min()   # 最低价
-    df['HC'] = df['Close'].rolling(n).max() # 收盘价
+    highs = rolling_max(df[['High', 'Close']].to_numpy(), [n])[n]
+    df['HH'] = highs[:, 0]  # 最高价
+    df['LC'] = rolling_min(df['Low'].to_numpy(), [n])[n]  # 最低价
+    df['HC'] = highs[:, 1]  # 收盘价
     
     # 枢轴区间
     df['Range'] = np.maximum(df['HH'] - df['Close'], df['Close'] - df['LC'])
@@ -43,36 +50,28 @@ def dual_thrust(df, k1=0.5, k2=0.5):
     return df
 
 def backtest_dual_thrust(ticker):
-    df = yf.Ticker(ticker).history(period='2y')
+    df = get_history(ticker, '2y')
     df = dual_thrust(df)
     
-    # 简化：突破买入持有到跌破
-    position = 0
-    returns = []
-    
-    for i in range(1, len(df)):
-        signal = df['Signal'].iloc[i-1]
-        ret = df['Close'].iloc[i] / df['Close'].iloc[i-1] - 1
-        
-        if signal == 1:
-            position = 1
-        elif signal == -1:
-            position = 0
-        
-        if position:
-            returns.append(ret)
-        else:
-            returns.append(0)
+    # 简化：突破买入持有到跌破，信号次日生效
+    signal = df['Signal'].to_numpy()
+    position = latch(signal == 1, signal == -1)
+    close = df['Close'].to_numpy()
+    returns = np.where(position[:-1], close[1:] / close[:-1] - 1, 0)
     
-    strategy_ret = np.prod(1 + np.array(returns)) - 1
+    strategy_ret = np.prod(1 + returns) - 1
     market_ret = df['Close'].iloc[-1] / df['Close'].iloc[0] - 1
     
     return market_ret, strategy_ret
 
-print("="*50)
-print("Dual Thrust 策略")
-print("="*50)
+def main():
+    print("="*50)
+    print("Dual Thrust 策略")
+    print("="*50)
+
+    for name, ticker in STOCKS.items():
+        market, strategy = backtest_dual_thrust(ticker)
+        print(f"{name}: 市场 {market*100:.1f}% vs 策略 {strategy*100:.1f}%")
 
-for name, ticker in STOCKS.items():
-    market, strategy = backtest_dual_thrust(ticker)
-    print(f"{name}: 市场 {market*100:.1f}% vs 策略 {strategy*100:.1f}%")
+if __name__ == "__main__":
+    main()
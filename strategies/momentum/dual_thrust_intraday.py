@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dual Thrust 日内版 - 1分钟线
+
+- 每天只算一次区间: 用日线缓存里最近N个交易日的 HH/LC 和昨收 (同 dual_thrust_live)
+- 上下轨以当天开盘价为中心: 开盘价 + K1 * Range / 开盘价 - K2 * Range
+- 盘中逐根检查1分钟线，每只股票每天只报第一次突破
+  (同一根既破上轨又破下轨按跌破处理，同 dual_thrust.dual_thrust)
+
+回测: 第一次突破上轨按该分钟收盘价买入，持有到某天第一次跌破下轨卖出
+(每天最多一次信号，买入当天不会卖出，符合 T+1)
+
+用法:
+    python3 dual_thrust_intraday.py backtest --days 60    # 最近60个交易日的分钟线
+    python3 dual_thrust_intraday.py live --interval 60     # 盘中监控，每60秒拉一次
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import get_history, get_minutes
+from quant.kernels import rolling_max, rolling_min
+from quant.positions import latch
+from quant.sources import get_source
+
+STOCKS = {
+    '紫金矿业': '601899.SS',
+    '铜陵有色': '000630.SZ',
+    '兴业银锡': '600737.SS',
+    '英维克': '002837.SZ',
+    '剑桥科技': '603083.SS',
+}
+
+# 区间参数: 最近N个交易日, 上下轨系数
+N = 22
+K1 = 0.5
+K2 = 0.5
+
+# 收盘时间，盘中监控到这里结束
+CLOSE_TIME = pd.Timedelta(hours=15)
+
+
+def trading_days(index):
+    """K线所属交易日 (去掉时区和时间)"""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def day_ranges(daily, n=N):
+    """
+    每个交易日收盘后算出的区间 Range (Series，index 为日期)，供下一交易日使用
+    Range = max(HH - 收盘, 收盘 - LC)，HH/LC 为截至当天最近 n 根日线的最高/最低价
+    """
+    hh = rolling_max(daily['High'].to_numpy(), [n])[n]
+    lc = rolling_min(daily['Low'].to_numpy(), [n])[n]
+    close = daily['Close'].to_numpy()
+    return pd.Series(np.maximum(hh - close, close - lc), index=trading_days(daily.index))
+
+
+def range_on(ranges, days):
+    """交易日 days 可用的 Range (取之前最后一个交易日收盘后的值)"""
+    pos = ranges.index.searchsorted(days) - 1
+    values = ranges.to_numpy()[np.maximum(pos, 0)]
+    return np.where(pos >= 0, values, np.nan)
+
+
+def bands(minutes, ranges, k1=K1, k2=K2):
+    """每根分钟线的 (上轨, 下轨, 交易日序号)，开盘价取当天第一根分钟线"""
+    codes, days = pd.factorize(trading_days(minutes.index))
+    first = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    open_ = minutes['Open'].to_numpy()[first]
+    rng = range_on(ranges, days)
+    return (open_ + k1 * rng)[codes], (open_ - k2 * rng)[codes], codes
+
+
+def first_breakouts(minutes, ranges, k1=K1, k2=K2):
+    """每天第一次突破: 1 突破上轨，-1 跌破下轨，其余 0"""
+    upper, lower, codes = bands(minutes, ranges, k1, k2)
+    event = np.where(minutes['Low'].to_numpy() < lower, -1,
+                     np.where(minutes['High'].to_numpy() > upper, 1, 0))
+    idx = np.flatnonzero(event)
+    first = idx[np.r_[True, codes[idx][1:] != codes[idx][:-1]]] if len(idx) else idx
+    sig = np.zeros(len(minutes), dtype=int)
+    sig[first] = event[first]
+    return sig
+
+
+def backtest(ticker, days=60):
+    """单只股票分钟线回测"""
+    minutes = get_minutes(ticker, days)
+    daily = get_history(ticker, '2y')
+    if len(minutes) == 0 or len(daily) < N:
+        return None
+
+    sig = first_breakouts(minutes, day_ranges(daily))
+    position = latch(sig == 1, sig == -1)
+    close = minutes['Close'].to_numpy()
+    returns = np.where(position[:-1], close[1:] / close[:-1] - 1, 0)
+    return {
+        'days': len(np.unique(trading_days(minutes.index))),
+        'bars': len(minutes),
+        'buys': int((sig == 1).sum()),
+        'sells': int((sig == -1).sum()),
+        'market': close[-1] / close[0] - 1,
+        'strategy': np.prod(1 + returns) - 1,
+    }
+
+
+class BreakoutMonitor:
+    """
+    盘中突破监控，每根分钟线 O(1)
+    - ranges: {ticker: 今日 Range}
+    - 每只股票第一根分钟线的开盘价定下当天上下轨，之后只报第一次突破
+    """
+
+    def __init__(self, ranges, k1=K1, k2=K2):
+        self.ranges = ranges
+        self.k1 = k1
+        self.k2 = k2
+        self.bands = {}
+        self.fired = {}
+        self.last = {}
+
+    def on_bar(self, ticker, when, open_, high, low):
+        """喂一根分钟线，第一次突破时返回 'BUY' / 'SELL'"""
+        if ticker in self.fired or ticker not in self.ranges:
+            return None
+        if ticker not in self.bands:
+            r = self.ranges[ticker]
+            self.bands[ticker] = (open_ + self.k1 * r, open_ - self.k2 * r)
+        upper, lower = self.bands[ticker]
+        if low < lower:
+            signal = 'SELL'
+        elif high > upper:
+            signal = 'BUY'
+        else:
+            return None
+        self.fired[ticker] = (when, signal)
+        return signal
+
+    def feed(self, ticker, minutes):
+        """
+        喂当天的分钟线，只处理上次之后的K线，返回 [(时间, 信号)]
+        最后一根可能还没走完，下次会再检查一遍
+        """
+        last = self.last.get(ticker)
+        if last is not None:
+            minutes = minutes[minutes.index >= last]
+        fired = []
+        for bar in minutes.itertuples():
+            signal = self.on_bar(ticker, bar.Index, bar.Open, bar.High, bar.Low)
+            if signal:
+                fired.append((bar.Index, signal))
+        if len(minutes) > 0:
+            self.last[ticker] = minutes.index[-1]
+        return fired
+
+
+def run_backtest(days):
+    print("=" * 60)
+    print(f"Dual Thrust 日内回测 (1分钟线, 最近{days}个交易日)")
+    print("=" * 60)
+
+    started = time.time()
+    bars = 0
+    for name, ticker in STOCKS.items():
+        r = backtest(ticker, days)
+        if r is None:
+            print(f"{name}: 无分钟线数据")
+            continue
+        bars += r['bars']
+        print(f"{name}: 市场 {r['market']*100:+.1f}% vs 策略 {r['strategy']*100:+.1f}% "
+              f"({r['days']}天, 突破 {r['buys']} / 跌破 {r['sells']})")
+    print(f"\n共 {bars} 根分钟线，用时 {time.time() - started:.2f}s")
+
+
+def run_live(interval):
+    source = get_source()
+    today = trading_days(pd.DatetimeIndex([source.now()]))[0]
+    names = {ticker: name for name, ticker in STOCKS.items()}
+
+    print("=" * 60)
+    print(f"Dual Thrust 日内监控 - {today:%Y-%m-%d}")
+    print("=" * 60)
+
+    ranges = {}
+    for name, ticker in STOCKS.items():
+        r = range_on(day_ranges(get_history(ticker, '3mo')), [today])[0]
+        if np.isnan(r):
+            print(f"{name}: 日线不足，跳过")
+        else:
+            ranges[ticker] = r
+    monitor = BreakoutMonitor(ranges)
+
+    while True:
+        for ticker in ranges:
+            minutes = get_minutes(ticker, 1)
+            if len(minutes) == 0:
+                continue
+            minutes = minutes[trading_days(minutes.index) == today]
+            for when, signal in monitor.feed(ticker, minutes):
+                upper, lower = monitor.bands[ticker]
+                print(f"{when:%H:%M} {names[ticker]}: {signal} (区间:{lower:.2f}-{upper:.2f})")
+        # 回放数据一次就是全天
+        done = len(monitor.fired) == len(ranges) or not source.cacheable
+        if done or source.now() >= today + CLOSE_TIME:
+            break
+        time.sleep(interval)
+
+    print("\n今日:")
+    for ticker in ranges:
+        upper, lower = monitor.bands.get(ticker, (np.nan, np.nan))
+        when, signal = monitor.fired.get(ticker, (None, '持有'))
+        at = f" @ {when:%H:%M}" if when is not None else ''
+        print(f"{names[ticker]}: {signal}{at} (区间:{lower:.2f}-{upper:.2f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Dual Thrust 日内版 (1分钟线)')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    bt = sub.add_parser('backtest', help='分钟线回测')
+    bt.add_argument('--days', type=int, default=60, help='最近多少个交易日')
+    lv = sub.add_parser('live', help='盘中监控')
+    lv.add_argument('--interval', type=int, default=60, help='拉取间隔 (秒)')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'backtest':
+        run_backtest(args.days)
+    else:
+        run_live(args.interval)
+
+
+if __name__ == '__main__':
+    main()
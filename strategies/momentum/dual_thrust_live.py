@@ -4,12 +4,16 @@
 Dual Thrust 实盘信号 - 每日运行版
 """
 
-import yfinance as yf
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import ROOT, get_panel, ticker_frame
+from quant.streaming import DualThrustRange, load_state, mark_done, pending_bars, save_state
+
 STOCKS = {
     '紫金矿业': '601899.SS',
     '铜陵有色': '000630.SZ',
@@ -18,33 +22,45 @@ STOCKS = {
     '剑桥科技': '603083.SS',
 }
 
-def get_signal(name, ticker):
+# 区间参数: 最近N个交易日, 上下轨系数
+N = 22
+K1 = 0.5
+K2 = 0.5
+
+# 各股票区间状态，下次运行只处理新K线
+STATE_PATH = os.path.join(ROOT, 'data', 'state', 'dual_thrust.json')
+
+# 最新信号 (给通知脚本读)
+SIGNAL_PATH = os.path.join(ROOT, 'logs', 'latest_signal.txt')
+
+def update_range(state, ticker, df):
+    """把新完成的K线喂给该股票的 Dual Thrust 区间 (每根 O(1))"""
+    entry = state.get(ticker)
+    bars, rebuild = pending_bars(entry, df, N)
+    if rebuild:
+        entry = state[ticker] = {'range': DualThrustRange(N, K1, K2)}
+    for bar in bars.itertuples():
+        entry['range'].update(bar.Open, bar.High, bar.Low, bar.Close)
+    mark_done(entry, df)
+    return entry['range']
+
+def get_signal(name, df, state=None):
+    """
+    今日收盘价相对 Dual Thrust 区间的信号
+    - 区间: 最近22个交易日 (不含今天) 的 HH/LC 和昨日开盘/收盘
+    - state: 各股票的区间状态，传入时只处理新K线，不重算
+    """
     try:
-        # 使用3个月数据确保足够
-        df = yf.Ticker(ticker).history(period='3mo')
-        
         if len(df) < 25:
             return f"{name}: 数据不足 ({len(df)}天)"
         
-        # 取最近22个交易日
-        recent = df.iloc[:-1].tail(22)
-        yesterday = df.iloc[-2]
-        
-        HH = recent['High'].max()
-        LC = recent['Low'].min()
-        Range = max(HH - yesterday['Close'], yesterday['Close'] - LC)
-        
-        Upper = yesterday['Open'] + 0.5 * Range
-        Lower = yesterday['Open'] - 0.5 * Range
+        state = {} if state is None else state
+        rng = update_range(state, df.attrs.get('ticker', name), df)
+        Upper, Lower = rng.bands()
         
         # 今日
         today_close = df.iloc[-1]['Close']
-        
-        signal = "持有"
-        if today_close > Upper:
-            signal = "BUY"
-        elif today_close < Lower:
-            signal = "SELL"
+        signal = rng.signal(today_close)
         
         return f"{name}: {signal} (当前:{today_close:.2f} 区间:{Lower:.2f}-{Upper:.2f})"
     
@@ -56,14 +72,20 @@ def main():
     print(f"Dual Thrust 信号 - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print("="*60)
     
+    # 使用3个月数据确保足够，一次批量下载
+    panel = get_panel(STOCKS, '3mo')
+    
+    state = load_state(STATE_PATH)
     signals = []
     for name, ticker in STOCKS.items():
-        signal = get_signal(name, ticker)
+        signal = get_signal(name, ticker_frame(panel, ticker), state)
         print(signal)
         signals.append(signal)
+    save_state(STATE_PATH, state)
     
     # 保存到文件
-    with open('/Users/ustar/quant-strategy/logs/latest_signal.txt', 'w') as f:
+    os.makedirs(os.path.dirname(SIGNAL_PATH), exist_ok=True)
+    with open(SIGNAL_PATH, 'w') as f:
         f.write('\n'.join(signals))
 
 if __name__ == "__main__":
@@ -6,12 +6,24 @@
 策略：
 - 过去N个月涨幅最好的资产
 - 持续持有直到反转
+
+用法:
+    python3 factor_momentum.py                                  # 今天的动量排名
+    python3 factor_momentum.py --backtest --lookback 20 60 120 --top 1 --rebalance W
+    python3 factor_momentum.py --backtest --panel --top 50      # 全市场面板 (python3 -m quant.panel 构建)
 """
 
-import yfinance as yf
+import argparse
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import get_panel, ticker_frame
+from quant.rotation import TRADING_DAYS, rotation, schedule
+
 STOCKS = {
     '紫金矿业': '601899.SS',
     '剑桥科技': '603083.SS', 
@@ -23,9 +35,10 @@ STOCKS = {
 def momentum_signal(lookback=60):
     """动量信号"""
     signals = {}
+    panel = get_panel(STOCKS, '2y')
     
     for name, ticker in STOCKS.items():
-        df = yf.Ticker(ticker).history(period='2y')
+        df = ticker_frame(panel, ticker)
         if len(df) < lookback:
             continue
         
@@ -53,5 +66,87 @@ def relative_momentum():
     winner = sorted_stocks[0]
     print(f"\n最强动量: {winner[0]} ({winner[1]:+.1f}%)")
 
+def watchlist_closes(period='3y'):
+    """观察名单的 (日期 × 股票) 收盘价"""
+    panel = get_panel(STOCKS, period)
+    closes = panel.xs('Close', axis=1, level=1)
+    names = {ticker: name for name, ticker in STOCKS.items()}
+    return closes.rename(columns=names)
+
+def panel_closes():
+    """全市场内存映射面板的 (日期 × 股票) 收盘价"""
+    from quant.panel import CLOSE, load_panel
+    panel = load_panel()
+    return pd.DataFrame(panel[:, :, CLOSE].T, index=panel.dates, columns=panel.tickers)
+
+def parse_rebalance(text):
+    """'5' -> 每5个交易日, 'W' / 'M' -> 每周 / 每月最后一个交易日"""
+    return int(text) if text.isdigit() else text
+
+def backtest(closes, lookback=60, top=1, rebalance='W', cost=0.0):
+    """
+    轮动回测: 每个调仓日买入过去 lookback 天涨幅最大的 top 只
+    返回 dict: equity (Series), 收益, 年化收益, 最大回撤, 平均换手率, 调仓次数, 最近持仓
+    """
+    result = rotation(closes.to_numpy(), lookback, top, schedule(closes.index, rebalance), cost)
+    equity = pd.Series(result['equity'], index=closes.index).dropna()
+    if len(equity) < 2:
+        return None
+    years = len(equity) / TRADING_DAYS
+    held = result['holdings'][-1]
+    return {
+        'equity': equity,
+        'total_return': equity.iloc[-1] / equity.iloc[0] - 1,
+        'annual_return': (equity.iloc[-1] / equity.iloc[0]) ** (1 / years) - 1,
+        'max_drawdown': (equity / equity.cummax() - 1).min(),
+        'turnover': result['turnover'][1:].mean() if len(result['turnover']) > 1 else 0.0,
+        'rebalances': len(result['rebalance']),
+        'holdings': [closes.columns[i] for i in held if i >= 0],
+    }
+
+def run_backtest(lookbacks, top=1, rebalance='W', cost=0.0, period='3y', use_panel=False):
+    closes = panel_closes() if use_panel else watchlist_closes(period)
+    universe = '全市场面板' if use_panel else '观察名单'
+    
+    print("="*60)
+    print(f"动量轮动回测: {universe} {closes.shape[1]} 只 × {len(closes)} 天, "
+          f"前 {top} 只, 调仓 {rebalance}")
+    print("="*60)
+    
+    # 同期等权持有全部股票作为基准
+    market = (closes.ffill().iloc[-1] / closes.bfill().iloc[0]).mean() - 1
+    print(f"等权持有: {market*100:+.1f}%")
+    
+    for lookback in lookbacks:
+        started = time.time()
+        r = backtest(closes, lookback, top, rebalance, cost)
+        elapsed = time.time() - started
+        if r is None:
+            print(f"\n{lookback}天动量: 数据不足")
+            continue
+        print(f"\n{lookback}天动量 ({r['rebalances']}次调仓, 用时 {elapsed:.2f}s):")
+        print(f"  收益: {r['total_return']*100:+.1f}% (年化 {r['annual_return']*100:+.1f}%)")
+        print(f"  最大回撤: {r['max_drawdown']*100:.1f}%")
+        print(f"  平均换手率: {r['turnover']*100:.0f}%")
+        shown = ', '.join(map(str, r['holdings'][:10]))
+        print(f"  当前持有: {shown}{' ...' if len(r['holdings']) > 10 else ''}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='动量因子策略')
+    parser.add_argument('--backtest', action='store_true', help='历史轮动回测')
+    parser.add_argument('--lookback', type=int, nargs='+', default=[60], help='动量天数，可给多个')
+    parser.add_argument('--top', type=int, default=1, help='每次持有几只')
+    parser.add_argument('--rebalance', default='W', help='调仓频率: 交易日数或 W / M')
+    parser.add_argument('--cost', type=float, default=0.0, help='单边交易费率，如 0.001')
+    parser.add_argument('--period', default='3y', help='观察名单回测的历史长度')
+    parser.add_argument('--panel', action='store_true', help='用全市场面板代替观察名单')
+    args = parser.parse_args(argv)
+    
+    if args.backtest:
+        run_backtest(args.lookback, args.top, parse_rebalance(args.rebalance),
+                     args.cost, args.period, args.panel)
+    else:
+        relative_momentum()
+
 if __name__ == "__main__":
-    relative_momentum()
+    main()
@@ -7,12 +7,26 @@
 1. RSI - 相对强弱指数
 2. MACD - 移动平均收敛/发散
 3. 动量反转
+
+用法:
+    python3 momentum_backtest.py                         # 回测 STOCKS
+    python3 momentum_backtest.py --bootstrap 10000       # 加上块自助法重采样的置信区间
 """
 
-import yfinance as yf
+import argparse
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import get_history
+from quant.memo import ema
+from quant import robustness
+from quant.rules import limit_map, position
+from quant.runner import by_ticker, load_frames, run
+
 STOCKS = {
     '紫金矿业': '601899.SS',
     '剑桥科技': '603083.SS', 
@@ -22,11 +36,10 @@ STOCKS = {
 }
 
 def download_data(ticker, period='3y'):
-    stock = yf.Ticker(ticker)
-    return stock.history(period=period)
+    return get_history(ticker, period)
 
-def rsi_strategy(df, period=14, oversold=30, overbought=70):
-    """RSI 策略"""
+def rsi_strategy(df, period=14, oversold=30, overbought=70, rules=True, limit=None):
+    """RSI 策略 (rules: 按A股涨跌停/停牌限制换仓，limit: 涨跌幅，None 按代码推断)"""
     df = df.copy()
     
     # 计算 RSI
@@ -45,7 +58,7 @@ def rsi_strategy(df, period=14, oversold=30, overbought=70):
     df.loc[df['RSI'] < oversold, 'Signal'] = 1   # 超卖 -> 买入
     df.loc[df['RSI'] > overbought, 'Signal'] = -1  # 超买 -> 卖出
     
-    df['Position'] = df['Signal'].shift(1)
+    df['Position'] = position(df, df['Signal'], limit) if rules else df['Signal'].shift(1)
     df.fillna(0, inplace=True)
     
     df['Returns'] = df['Close'].pct_change()
@@ -53,21 +66,21 @@ def rsi_strategy(df, period=14, oversold=30, overbought=70):
     
     return df
 
-def macd_strategy(df, fast=12, slow=26, signal=9):
-    """MACD 策略"""
+def macd_strategy(df, fast=12, slow=26, signal=9, rules=True, limit=None):
+    """MACD 策略 (rules: 按A股涨跌停/停牌限制换仓，limit: 涨跌幅，None 按代码推断)"""
     df = df.copy()
     
-    ema_fast = df['Close'].ewm(span=fast).mean()
-    ema_slow = df['Close'].ewm(span=slow).mean()
+    ema_fast = ema(df, fast)
+    ema_slow = ema(df, slow)
     
     df['MACD'] = ema_fast - ema_slow
-    df['Signal_Line'] = df['MACD'].ewm(span=signal).mean()
+    df['Signal_Line'] = ema(df, signal, column='MACD')
     
     df['Signal'] = 0
     df.loc[df['MACD'] > df['Signal_Line'], 'Signal'] = 1
     df.loc[df['MACD'] < df['Signal_Line'], 'Signal'] = -1
     
-    df['Position'] = df['Signal'].shift(1)
+    df['Position'] = position(df, df['Signal'], limit) if rules else df['Signal'].shift(1)
     df.fillna(0, inplace=True)
     
     df['Returns'] = df['Close'].pct_change()
@@ -75,38 +88,87 @@ def macd_strategy(df, fast=12, slow=26, signal=9):
     
     return df
 
-def backtest(stock_name, ticker):
-    print(f"\n{'='*50}")
-    print(f"动量策略回测: {stock_name} ({ticker})")
-    print(f"{'='*50}")
-    
-    df = download_data(ticker)
+def evaluate(df, rules=True, limit=None):
+    """RSI / MACD / 市场基准收益 (quant.runner 任务)，数据不足返回 None"""
     if df is None or len(df) < 50:
-        print("数据不足")
-        return
+        return None
     
     # RSI 策略
-    df_rsi = rsi_strategy(df.copy())
+    df_rsi = rsi_strategy(df.copy(), rules=rules, limit=limit)
     rsi_return = (1 + df_rsi['Strategy_Returns'].dropna()).cumprod().iloc[-1] - 1
     
     # MACD 策略
-    df_macd = macd_strategy(df.copy())
+    df_macd = macd_strategy(df.copy(), rules=rules, limit=limit)
     macd_return = (1 + df_macd['Strategy_Returns'].dropna()).cumprod().iloc[-1] - 1
     
     # 市场基准
     market_return = (1 + df['Close'].pct_change().dropna()).cumprod().iloc[-1] - 1
     
+    return {'market': market_return, 'rsi': rsi_return, 'macd': macd_return}
+
+def report(stock_name, ticker, stats):
+    print(f"\n{'='*50}")
+    print(f"动量策略回测: {stock_name} ({ticker})")
+    print(f"{'='*50}")
+    
+    if stats is None:
+        print("数据不足")
+        return
+    
+    market_return = stats['market']
     print(f"市场基准: {market_return*100:.2f}%")
-    print(f"RSI策略:   {rsi_return*100:.2f}% ({rsi_return - market_return:+.2f}%)")
-    print(f"MACD策略:  {macd_return*100:.2f}% ({macd_return - market_return:+.2f}%)")
+    print(f"RSI策略:   {stats['rsi']*100:.2f}% ({stats['rsi'] - market_return:+.2f}%)")
+    print(f"MACD策略:  {stats['macd']*100:.2f}% ({stats['macd'] - market_return:+.2f}%)")
 
-def main():
+def backtest(stock_name, ticker):
+    stats = evaluate(download_data(ticker))
+    report(stock_name, ticker, stats)
+    return stats
+
+def run_bootstrap(opts, rules=True):
+    print("="*60)
+    print(f"动量策略稳健性检验 (RSI + MACD): {robustness.describe(**opts)}")
+    print("="*60)
+    
+    frames = load_frames(STOCKS, '3y')
+    started = time.time()
+    for name, ticker in STOCKS.items():
+        df = frames.get(ticker)
+        if df is None or len(df) < 50:
+            print(f"\n{name}: 数据不足")
+            continue
+        print(f"\n{name}:")
+        market = df['Close'].iloc[-1] / df['Close'].iloc[0] - 1
+        for label, strategy in (('RSI', rsi_strategy), ('MACD', macd_strategy)):
+            robustness.report(f"  {label:<5}", strategy(df, rules=rules)['Strategy_Returns'], market, **opts)
+    print(f"\n用时 {time.time() - started:.1f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='动量策略回测 (RSI + MACD)')
+    parser.add_argument('--workers', type=int, default=None, help='进程数 (默认CPU核数)')
+    parser.add_argument('--ignore-rules', action='store_true', help='忽略A股交易规则 (涨跌停/停牌)')
+    robustness.add_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    if args.bootstrap:
+        run_bootstrap(robustness.options(args), not args.ignore_rules)
+        return
+    
     print("="*60)
     print("动量策略回测 (RSI + MACD)")
     print("="*60)
     
+    # 各股票并行回测，价格数据经共享内存传给子进程
+    frames = load_frames(STOCKS, '3y')
+    # 涨跌幅在主进程算好 (ST 状态要查代码表)，子进程不访问网络
+    limits = {} if args.ignore_rules else limit_map(STOCKS.values())
+    jobs = [(evaluate, ticker, {'rules': not args.ignore_rules, 'limit': limits.get(ticker)})
+            for ticker in STOCKS.values()]
+    table = run(jobs, frames, args.workers)
+    stats = {t: r for t, r in by_ticker(table).items() if 'market' in r}
+    
     for name, ticker in STOCKS.items():
-        backtest(name, ticker)
+        report(name, ticker, stats.get(ticker))
 
 if __name__ == "__main__":
     main()
@@ -7,12 +7,20 @@
 - 标的: 用户持仓股票
 """
 
-import yfinance as yf
+import argparse
+import os
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime, timedelta
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import get_history
+from quant.memo import sma
+from quant.metrics import summarize
+from quant.rules import limit_map, position
+from quant.runner import by_ticker, load_frames, run
+
 # 持仓股票 (A股用 .SS 或 .SZ 后缀)
 STOCKS = {
     '紫金矿业': '601899.SS',
@@ -29,20 +37,18 @@ LONG_WINDOW = 50     # 长期均线
 def download_data(ticker, period='3y'):
     """下载历史数据"""
     try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=period)
-        return df
+        return get_history(ticker, period)
     except Exception as e:
         print(f"下载 {ticker} 失败: {e}")
         return None
 
-def moving_average_crossover(df, short=20, long=50):
-    """均线交叉策略"""
+def moving_average_crossover(df, short=20, long=50, rules=True, limit=None):
+    """均线交叉策略 (rules: 按A股涨跌停/停牌限制换仓，limit: 涨跌幅，None 按代码推断)"""
     df = df.copy()
     
     # 计算均线
-    df['SMA_short'] = df['Close'].rolling(window=short).mean()
-    df['SMA_long'] = df['Close'].rolling(window=long).mean()
+    df['SMA_short'] = sma(df, short)
+    df['SMA_long'] = sma(df, long)
     
     # 生成信号
     df['Signal'] = 0
@@ -50,7 +56,8 @@ def moving_average_crossover(df, short=20, long=50):
     df.loc[df['SMA_short'] < df['SMA_long'], 'Signal'] = -1  # 死叉空仓
     
     # 计算持仓
-    df['Position'] = df['Signal'].shift(1)  # 信号次日执行
+    # 信号次日执行；涨停买不进、跌停卖不出、停牌不动
+    df['Position'] = position(df, df['Signal'], limit) if rules else df['Signal'].shift(1)
     df.fillna(0, inplace=True)
     
     # 计算收益
@@ -63,69 +70,103 @@ def moving_average_crossover(df, short=20, long=50):
     
     return df
 
-def backtest(stock_name, ticker):
-    """回测单只股票"""
-    print(f"\n{'='*50}")
-    print(f"回测: {stock_name} ({ticker})")
-    print(f"{'='*50}")
-    
-    df = download_data(ticker)
-    if df is None or len(df) < LONG_WINDOW + 10:
-        print(f"数据不足，跳过")
+def evaluate(df, short=SHORT_WINDOW, long=LONG_WINDOW, rules=True, limit=None):
+    """回测统计 (quant.runner 任务)，数据不足返回 None"""
+    if df is None or len(df) < long + 10:
         return None
     
-    df = moving_average_crossover(df, SHORT_WINDOW, LONG_WINDOW)
-    
-    # 统计结果
-    market_return = df['Cumulative_Market'].iloc[-1] - 1
-    strategy_return = df['Cumulative_Strategy'].iloc[-1] - 1
+    df = moving_average_crossover(df, short, long, rules, limit)
     
-    # 年化收益
-    years = len(df) / 252
-    market_annual = (1 + market_return) ** (1/years) - 1
-    strategy_annual = (1 + strategy_return) ** (1/years) - 1
+    # 市场 / 策略两条收益曲线的指标一次算完 (市场视为一直持有)
+    positions = np.column_stack([np.ones(len(df)), df['Position']])
+    market, strategy = summarize(df[['Returns', 'Strategy_Returns']], positions).to_dict('records')
     
-    # 夏普比率 (简化)
-    strategy_returns = df['Strategy_Returns'].dropna()
-    sharpe = strategy_returns.mean() / strategy_returns.std() * np.sqrt(252) if strategy_returns.std() > 0 else 0
-    
-    # 交易次数
+    # 交易次数: 信号变化次数 (口径同原来，不用 summarize 按持仓变化算的 trades)
     trades = (df['Signal'].diff() != 0).sum()
     
-    print(f"回测周期: {df.index[0].strftime('%Y-%m-%d')} ~ {df.index[-1].strftime('%Y-%m-%d')}")
-    print(f"交易次数: {trades}")
-    print(f"市场收益: {market_return*100:.2f}%")
-    print(f"策略收益: {strategy_return*100:.2f}%")
-    print(f"年化市场: {market_annual*100:.2f}%")
-    print(f"年化策略: {strategy_annual*100:.2f}%")
-    print(f"夏普比率: {sharpe:.2f}")
+    return {
+        'start': df.index[0].strftime('%Y-%m-%d'),
+        'end': df.index[-1].strftime('%Y-%m-%d'),
+        'trades': int(trades),
+        'market': market['total_return'],
+        'strategy': strategy['total_return'],
+        'market_annual': market['cagr'],
+        'strategy_annual': strategy['cagr'],
+        'sharpe': strategy['sharpe'],
+        'sortino': strategy['sortino'],
+        'max_drawdown': strategy['max_drawdown'],
+        'drawdown_days': int(strategy['drawdown_days']),
+        'market_drawdown': market['max_drawdown'],
+        'calmar': strategy['calmar'],
+        'hit_rate': strategy['hit_rate'],
+        'exposure': strategy['exposure'],
+    }
+
+def report(stock_name, ticker, stats):
+    """打印单只股票的回测结果"""
+    print(f"\n{'='*50}")
+    print(f"回测: {stock_name} ({ticker})")
+    print(f"{'='*50}")
     
-    return df
+    if stats is None:
+        print(f"数据不足，跳过")
+        return
+    
+    print(f"回测周期: {stats['start']} ~ {stats['end']}")
+    print(f"交易次数: {stats['trades']}")
+    print(f"市场收益: {stats['market']*100:.2f}%")
+    print(f"策略收益: {stats['strategy']*100:.2f}%")
+    print(f"年化市场: {stats['market_annual']*100:.2f}%")
+    print(f"年化策略: {stats['strategy_annual']*100:.2f}%")
+    print(f"夏普比率: {stats['sharpe']:.2f}")
+    print(f"索提诺比率: {stats['sortino']:.2f}")
+    print(f"最大回撤: {stats['max_drawdown']*100:.2f}% (市场 {stats['market_drawdown']*100:.2f}%), "
+          f"最长 {stats['drawdown_days']} 天未创新高")
+    print(f"卡玛比率: {stats['calmar']:.2f}")
+    print(f"胜率: {stats['hit_rate']*100:.1f}%, 持仓时间: {stats['exposure']*100:.1f}%")
 
-def main():
+def backtest(stock_name, ticker):
+    """回测单只股票"""
+    stats = evaluate(download_data(ticker))
+    report(stock_name, ticker, stats)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='均线交叉策略回测')
+    parser.add_argument('--workers', type=int, default=None, help='进程数 (默认CPU核数)')
+    parser.add_argument('--ignore-rules', action='store_true', help='忽略A股交易规则 (涨跌停/停牌)')
+    args = parser.parse_args(argv)
+    
     print("="*60)
     print("均线交叉策略回测")
     print(f"短期均线: {SHORT_WINDOW}日, 长期均线: {LONG_WINDOW}日")
     print("="*60)
     
+    # 各股票并行回测，价格数据经共享内存传给子进程
+    frames = load_frames(STOCKS, '3y')
+    # 涨跌幅在主进程算好 (ST 状态要查代码表)，子进程不访问网络
+    limits = {} if args.ignore_rules else limit_map(STOCKS.values())
+    jobs = [(evaluate, ticker, {'rules': not args.ignore_rules, 'limit': limits.get(ticker)})
+            for ticker in STOCKS.values()]
+    table = run(jobs, frames, args.workers)
+    stats = {t: r for t, r in by_ticker(table).items() if 'market' in r}
+    
     results = {}
     for name, ticker in STOCKS.items():
-        df = backtest(name, ticker)
-        if df is not None:
-            results[name] = df
+        report(name, ticker, stats.get(ticker))
+        if stats.get(ticker) is not None:
+            results[name] = stats[ticker]
     
     # 汇总
     print("\n" + "="*60)
     print("汇总")
     print("="*60)
-    print(f"{'股票':<12}{'市场收益':>12}{'策略收益':>12}{'夏普比率':>10}")
-    print("-"*50)
-    
-    for name, df in results.items():
-        market = df['Cumulative_Market'].iloc[-1] - 1
-        strategy = df['Cumulative_Strategy'].iloc[-1] - 1
-        sharpe = df['Strategy_Returns'].mean() / df['Strategy_Returns'].std() * np.sqrt(252) if df['Strategy_Returns'].std() > 0 else 0
-        print(f"{name:<12}{market*100:>11.2f}%{strategy*100:>11.2f}%{sharpe:>10.2f}")
+    print(f"{'股票':<12}{'市场收益':>12}{'策略收益':>12}{'夏普比率':>10}{'最大回撤':>10}")
+    print("-"*60)
+    
+    for name, r in results.items():
+        print(f"{name:<12}{r['market']*100:>11.2f}%{r['strategy']*100:>11.2f}%{r['sharpe']:>10.2f}"
+              f"{r['max_drawdown']*100:>9.2f}%")
 
 if __name__ == "__main__":
     main()
@@ -7,12 +7,28 @@
 - 价格突破上轨 -> 卖出
 - 价格突破下轨 -> 买入
 - 价格回归中轨 -> 平仓
+
+用法:
+    python3 bollinger.py                                    # 默认参数 (20, 2)
+    python3 bollinger.py --surface --window 10:60 --std 1:3:0.25 --top 5 --save
+    python3 bollinger.py --bootstrap 10000 --block 20       # 策略收益重采样的置信区间
 """
 
-import yfinance as yf
+import argparse
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import ROOT, get_history
+from quant.memo import rolling_std, sma
+from quant import robustness
+from quant.rules import limit_map, position
+from quant.runner import by_ticker, load_frames, run
+from quant.sweep import bollinger_surface
+
 STOCKS = {
     '紫金矿业': '601899.SS',
     '剑桥科技': '603083.SS', 
@@ -23,14 +39,17 @@ STOCKS = {
 
 def bollinger_bands(df, window=20, num_std=2):
     df = df.copy()
-    df['MA'] = df['Close'].rolling(window).mean()
-    df['STD'] = df['Close'].rolling(window).std()
+    df['MA'] = sma(df, window)
+    df['STD'] = rolling_std(df, window)
     df['Upper'] = df['MA'] + num_std * df['STD']
     df['Lower'] = df['MA'] - num_std * df['STD']
     return df
 
-def backtest_bollinger(ticker, window=20, num_std=2):
-    df = yf.Ticker(ticker).history(period='3y')
+def bollinger_strategy(df, window=20, num_std=2, rules=True, limit=None):
+    """
+    布林带信号、持仓和每日收益 (Returns / Strategy_Returns)
+    rules: 按A股涨跌停/停牌限制换仓，limit: 涨跌幅，None 按代码推断
+    """
     df = bollinger_bands(df, window, num_std)
     
     # 信号
@@ -39,19 +58,126 @@ def backtest_bollinger(ticker, window=20, num_std=2):
     df.loc[df['Close'] > df['Upper'], 'Signal'] = -1  # 超买卖出
     df.loc[(df['Close'] > df['MA']) & (df['Close'].shift(1) < df['MA'].shift(1)), 'Signal'] = 0  # 回归平仓
     
-    df['Position'] = df['Signal'].shift(1)
+    df['Position'] = position(df, df['Signal'], limit) if rules else df['Signal'].shift(1)
     df['Returns'] = df['Close'].pct_change()
     df['Strategy_Returns'] = df['Position'] * df['Returns']
-    
+    return df
+
+def bollinger_returns(df, window=20, num_std=2, rules=True, limit=None):
+    """布林带策略的 (市场收益, 策略收益)"""
+    df = bollinger_strategy(df, window, num_std, rules, limit)
     market_ret = (1 + df['Returns'].dropna()).cumprod().iloc[-1] - 1
     strategy_ret = (1 + df['Strategy_Returns'].dropna()).cumprod().iloc[-1] - 1
     
     return market_ret, strategy_ret
 
-print("="*50)
-print("布林带策略回测")
-print("="*50)
+def backtest_bollinger(ticker, window=20, num_std=2, rules=True):
+    return bollinger_returns(get_history(ticker, '3y'), window, num_std, rules)
+
+def evaluate(df, window=20, num_std=2, rules=True, limit=None):
+    """quant.runner 任务"""
+    market, strategy = bollinger_returns(df, window, num_std, rules, limit)
+    return {'market': market, 'strategy': strategy}
+
+def surface(df, windows, num_stds):
+    """
+    全部 (window, num_std) 组合的 收益/夏普/交易次数 表，索引为 (window, num_std)
+    (不考虑涨跌停/停牌，同 bollinger_returns(rules=False))
+    """
+    grid = bollinger_surface(df['Close'].to_numpy(), windows, num_stds)
+    index = pd.MultiIndex.from_product([list(windows), list(num_stds)], names=['window', 'num_std'])
+    return pd.DataFrame({key: values.ravel() for key, values in grid.items()}, index=index)
+
+def parse_range(text, kind=int):
+    """'10:60' -> 10..60, '1:3:0.25' -> 1, 1.25, ..., 3"""
+    parts = [kind(x) for x in text.split(':')]
+    low, high = parts[0], parts[1]
+    step = parts[2] if len(parts) > 2 else 1
+    return [kind(round(x, 6)) for x in np.arange(low, high + step / 2, step)]
+
+def run_surface(windows, num_stds, top=5, save=False):
+    print("="*50)
+    print(f"布林带参数曲面: 窗口 {windows[0]}-{windows[-1]} × 倍数 {num_stds[0]}-{num_stds[-1]}")
+    print("="*50)
+    
+    frames = load_frames(STOCKS, '3y')
+    for name, ticker in STOCKS.items():
+        df = frames.get(ticker)
+        if df is None or len(df) < max(windows) + 10:
+            print(f"\n{name}: 数据不足")
+            continue
+        
+        started = time.time()
+        table = surface(df, windows, num_stds)
+        elapsed = time.time() - started
+        market = df['Close'].iloc[-1] / df['Close'].iloc[0] - 1
+        print(f"\n{name} ({ticker}): {len(table)} 组参数, 用时 {elapsed*1000:.0f}ms, 市场 {market*100:.1f}%")
+        for (window, num_std), row in table.nlargest(top, 'sharpe').iterrows():
+            print(f"  ({window}, {num_std:g}): {row['return']*100:.1f}% 夏普 {row['sharpe']:.2f} "
+                  f"交易 {int(row['trades'])} 次")
+        
+        if save:
+            log_dir = os.path.join(ROOT, 'logs')
+            os.makedirs(log_dir, exist_ok=True)
+            path = os.path.join(log_dir, f"bollinger_surface_{ticker}.csv")
+            table.to_csv(path)
+            print(f"  曲面已保存: {path}")
+
+def run_bootstrap(opts, rules=True):
+    print("="*50)
+    print(f"布林带策略稳健性检验: {robustness.describe(**opts)}")
+    print("="*50)
+    
+    frames = load_frames(STOCKS, '3y')
+    started = time.time()
+    for name, ticker in STOCKS.items():
+        df = frames.get(ticker)
+        if df is None or len(df) < 30:
+            print(f"{name}: 数据不足")
+            continue
+        market = df['Close'].iloc[-1] / df['Close'].iloc[0] - 1
+        robustness.report(f"{name}:", bollinger_strategy(df, rules=rules)['Strategy_Returns'], market, **opts)
+    print(f"\n用时 {time.time() - started:.1f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='布林带策略回测')
+    parser.add_argument('--workers', type=int, default=None, help='进程数 (默认CPU核数)')
+    parser.add_argument('--ignore-rules', action='store_true', help='忽略A股交易规则 (涨跌停/停牌)')
+    parser.add_argument('--surface', action='store_true', help='扫描 窗口 × 倍数 全部组合')
+    parser.add_argument('--window', default='10:60', help='窗口范围，如 10:60')
+    parser.add_argument('--std', default='1:3:0.25', help='倍数范围，如 1:3:0.25')
+    parser.add_argument('--top', type=int, default=5, help='每只股票显示夏普最高的几组')
+    parser.add_argument('--save', action='store_true', help='曲面保存到 logs/')
+    robustness.add_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    if args.surface:
+        run_surface(parse_range(args.window), parse_range(args.std, float), args.top, args.save)
+        return
+    if args.bootstrap:
+        run_bootstrap(robustness.options(args), not args.ignore_rules)
+        return
+    
+    print("="*50)
+    print("布林带策略回测")
+    print("="*50)
+    
+    # 各股票并行回测，价格数据经共享内存传给子进程
+    frames = load_frames(STOCKS, '3y')
+    # 涨跌幅在主进程算好 (ST 状态要查代码表)，子进程不访问网络
+    limits = {} if args.ignore_rules else limit_map(STOCKS.values())
+    jobs = [(evaluate, ticker, {'rules': not args.ignore_rules, 'limit': limits.get(ticker)})
+            for ticker in STOCKS.values()]
+    table = run(jobs, frames, args.workers)
+    stats = by_ticker(table)
+    
+    for name, ticker in STOCKS.items():
+        r = stats.get(ticker, {})
+        if 'market' not in r:
+            print(f"{name}: 数据不足 {r.get('error', '')}")
+            continue
+        market, strategy = r['market'], r['strategy']
+        print(f"{name}: 市场 {market*100:.1f}% vs 策略 {strategy*100:.1f}% ({strategy-market:+.1f}%)")
 
-for name, ticker in STOCKS.items():
-    market, strategy = backtest_bollinger(ticker)
-    print(f"{name}: 市场 {market*100:.1f}% vs 策略 {strategy*100:.1f}% ({strategy-market:+.1f}%)")
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,14 @@
 低买高卖，不断赚取差价
 """
 
-import yfinance as yf
+import os
+import sys
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import get_history
+
 STOCKS = {
     '紫金矿业': '601899.SS',
     '铜陵有色': '000630.SZ',
@@ -22,7 +26,7 @@ def grid_trading(ticker, grid_pct=0.03, holdings=5):
     - grid_pct: 网格间距百分比
     - holdings: 持仓手数
     """
-    df = yf.Ticker(ticker).history(period='1y')
+    df = get_history(ticker, '1y')
     
     # 计算网格区间
     price = df['Close']
@@ -51,6 +55,9 @@ def grid_trading(ticker, grid_pct=0.03, holdings=5):
     
     return buy_hold, grid_profit
 
-if __name__ == "__main__":
+def main():
     for name, ticker in STOCKS.items():
         grid_trading(ticker)
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,26 @@
 # -*- coding: utf-8 -*-
 """
 均线策略参数优化 - 50日/200日
+
+用法:
+    python3 optimize.py                                  # PARAM_SETS 几组参数
+    python3 optimize.py --sweep                          # 扫描全部 短均线 × 长均线 组合
+    python3 optimize.py --sweep --short 2:120 --long 10:250 --top 10 --save
+    python3 optimize.py --walk-forward --train 250 --test 20 --folds 30   # 滚动前推优化
 """
 
-import yfinance as yf
+import argparse
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from quant.data import ROOT, get_history
+from quant.memo import sma, smas
+from quant.sweep import ma_crossover_surface, walk_forward
+
 STOCKS = {
     '紫金矿业': '601899.SS',
     '剑桥科技': '603083.SS', 
@@ -24,14 +38,20 @@ PARAM_SETS = [
     (10, 30),
 ]
 
+# 扫描范围 (含两端)
+SWEEP_SHORT = (2, 120)
+SWEEP_LONG = (10, 250)
+
+# 所有参数组合用到的均线窗口，每只股票一次扫描算完
+WINDOWS = sorted({w for pair in PARAM_SETS for w in pair})
+
 def download_data(ticker, period='3y'):
-    stock = yf.Ticker(ticker)
-    return stock.history(period=period)
+    return get_history(ticker, period)
 
 def backtest_ma(df, short, long):
     df = df.copy()
-    df['SMA_short'] = df['Close'].rolling(window=short).mean()
-    df['SMA_long'] = df['Close'].rolling(window=long).mean()
+    df['SMA_short'] = sma(df, short)
+    df['SMA_long'] = sma(df, long)
     df['Signal'] = np.where(df['SMA_short'] > df['SMA_long'], 1, -1)
     df['Position'] = df['Signal'].shift(1)
     df['Returns'] = df['Close'].pct_change()
@@ -40,24 +60,139 @@ def backtest_ma(df, short, long):
     strategy_return = (1 + df['Strategy_Returns'].dropna()).cumprod().iloc[-1] - 1
     return strategy_return
 
-print("="*60)
-print("均线参数优化结果")
-print("="*60)
+def run_param_sets():
+    print("="*60)
+    print("均线参数优化结果")
+    print("="*60)
+    
+    for name, ticker in STOCKS.items():
+        print(f"\n{name} ({ticker}):")
+        df = download_data(ticker)
+        if df is None or len(df) < 200:
+            print("  数据不足")
+            continue
+        
+        market_return = (1 + df['Close'].pct_change().dropna()).cumprod().iloc[-1] - 1
+        print(f"  市场基准: {market_return*100:.2f}%")
+        
+        smas(df, WINDOWS)
+        for short, long in PARAM_SETS:
+            if len(df) < long + 10:
+                continue
+            ret = backtest_ma(df, short, long)
+            diff = ret - market_return
+            mark = "✓" if diff > 0 else "✗"
+            print(f"  {short}/{long}: {ret*100:.2f}% ({diff:+.2f}%) {mark}")
+
+def sweep(df, shorts, longs):
+    """
+    全部 (short, long) 组合的收益/夏普曲面 (行: 短均线, 列: 长均线)
+    长均线超过 len(df) - 10 的组合同 PARAM_SETS 一样跳过 (NaN)
+    """
+    surface = ma_crossover_surface(df['Close'].to_numpy(), shorts, longs)
+    too_long = np.asarray(longs) > len(df) - 10
+    return {
+        key: pd.DataFrame(np.where(too_long, np.nan, values),
+                          index=pd.Index(shorts, name='short'),
+                          columns=pd.Index(longs, name='long'))
+        for key, values in surface.items()
+    }
 
-for name, ticker in STOCKS.items():
-    print(f"\n{name} ({ticker}):")
-    df = download_data(ticker)
-    if df is None or len(df) < 200:
-        print("  数据不足")
-        continue
+def parse_range(text):
+    """'2:120' -> range(2, 121)"""
+    low, high = (int(x) for x in text.split(':'))
+    return range(low, high + 1)
+
+def run_sweep(shorts, longs, top=10, save=False):
+    print("="*60)
+    print(f"均线参数扫描: 短 {shorts.start}-{shorts.stop - 1} × 长 {longs.start}-{longs.stop - 1}")
+    print("="*60)
     
-    market_return = (1 + df['Close'].pct_change().dropna()).cumprod().iloc[-1] - 1
-    print(f"  市场基准: {market_return*100:.2f}%")
+    for name, ticker in STOCKS.items():
+        print(f"\n{name} ({ticker}):")
+        df = download_data(ticker)
+        if df is None or len(df) < 200:
+            print("  数据不足")
+            continue
+        
+        started = time.time()
+        surface = sweep(df, shorts, longs)
+        elapsed = time.time() - started
+        table = pd.DataFrame({key: s.stack() for key, s in surface.items()}).dropna()
+        market_return = df['Close'].iloc[-1] / df['Close'].iloc[0] - 1
+        print(f"  {len(table)} 组参数, 用时 {elapsed*1000:.0f}ms, 市场基准: {market_return*100:.2f}%")
+        
+        for short, long in table.nlargest(top, 'sharpe').index:
+            row = table.loc[(short, long)]
+            print(f"  {short}/{long}: {row['return']*100:.2f}% 夏普 {row['sharpe']:.2f}")
+        
+        if save:
+            log_dir = os.path.join(ROOT, 'logs')
+            os.makedirs(log_dir, exist_ok=True)
+            path = os.path.join(log_dir, f"ma_sweep_{ticker}.csv")
+            table.to_csv(path)
+            print(f"  曲面已保存: {path}")
+
+def run_walk_forward(shorts, longs, train=250, test=20, folds=None, metric='sharpe', save=False):
+    print("="*60)
+    print(f"均线滚动前推优化: 训练 {train} 天 / 测试 {test} 天, 按{metric}选参")
+    print("="*60)
     
-    for short, long in PARAM_SETS:
-        if len(df) < long + 10:
+    for name, ticker in STOCKS.items():
+        print(f"\n{name} ({ticker}):")
+        df = download_data(ticker)
+        if df is None or len(df) < train + test + 1:
+            print("  数据不足")
             continue
-        ret = backtest_ma(df, short, long)
-        diff = ret - market_return
-        mark = "✓" if diff > 0 else "✗"
-        print(f"  {short}/{long}: {ret*100:.2f}% ({diff:+.2f}%) {mark}")
+        
+        started = time.time()
+        rows = walk_forward(df['Close'].to_numpy(), shorts, longs, train, test, folds, metric)
+        elapsed = time.time() - started
+        # 第 j 个收益对应 df.index[j + 1] 这一天
+        table = pd.DataFrame(rows)
+        table['test_from'] = df.index[table['test_start'] + 1]
+        table['test_to'] = df.index[table['test_end']]
+        
+        close = df['Close'].to_numpy()
+        first, last = table['test_start'].iloc[0], table['test_end'].iloc[-1]
+        oos_return = np.prod(1 + table['test_return']) - 1
+        market_return = close[last] / close[first] - 1
+        print(f"  {len(table)} 折, 用时 {elapsed*1000:.0f}ms, "
+              f"样本外 {table['test_from'].iloc[0]:%Y-%m-%d} ~ {table['test_to'].iloc[-1]:%Y-%m-%d}")
+        print(f"  样本外收益: {oos_return*100:.2f}% vs 市场 {market_return*100:.2f}%")
+        print(f"  样本内平均夏普 {table['train_sharpe'].mean():.2f} / 样本外平均夏普 {table['test_sharpe'].mean():.2f}")
+        
+        common = table.groupby(['short', 'long']).size().nlargest(3)
+        print("  最常选中: " + ", ".join(f"{s}/{l} ({n}次)" for (s, l), n in common.items()))
+        
+        if save:
+            log_dir = os.path.join(ROOT, 'logs')
+            os.makedirs(log_dir, exist_ok=True)
+            path = os.path.join(log_dir, f"ma_walk_forward_{ticker}.csv")
+            table.to_csv(path, index=False)
+            print(f"  各折结果已保存: {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='均线参数优化')
+    parser.add_argument('--sweep', action='store_true', help='扫描全部参数组合')
+    parser.add_argument('--short', default='%d:%d' % SWEEP_SHORT, help='短均线范围，如 2:120')
+    parser.add_argument('--long', default='%d:%d' % SWEEP_LONG, help='长均线范围，如 10:250')
+    parser.add_argument('--walk-forward', action='store_true', help='滚动前推优化 (样本内选参, 样本外检验)')
+    parser.add_argument('--train', type=int, default=250, help='前推: 训练天数')
+    parser.add_argument('--test', type=int, default=20, help='前推: 测试天数')
+    parser.add_argument('--folds', type=int, default=None, help='前推: 只做最后几折')
+    parser.add_argument('--metric', choices=['sharpe', 'return'], default='sharpe', help='前推: 选参指标')
+    parser.add_argument('--top', type=int, default=10, help='每只股票显示夏普最高的几组')
+    parser.add_argument('--save', action='store_true', help='曲面 / 各折结果保存到 logs/')
+    args = parser.parse_args(argv)
+    
+    if args.walk_forward:
+        run_walk_forward(parse_range(args.short), parse_range(args.long), args.train, args.test,
+                         args.folds, args.metric, args.save)
+    elif args.sweep:
+        run_sweep(parse_range(args.short), parse_range(args.long), args.top, args.save)
+    else:
+        run_param_sets()
+
+if __name__ == "__main__":
+    main()